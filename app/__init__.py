@@ -0,0 +1,4 @@
+import time
+
+# Worker boot time (dorm_worker_boot_seconds) is measured from the first import of the package.
+BOOT_STARTED = time.perf_counter()
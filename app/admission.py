@@ -0,0 +1,225 @@
+"""Admission control (`DORM_ADMISSION_CONTROL`): shed load at the door instead of queueing it in threads.
+
+Every request except the healthcheck and /metrics takes a token from a bucket per role and client address;
+an empty bucket answers 429 with Retry-After. Requests that reach the database then need an in-flight slot.
+Reads, writes and bulk requests each have a cap, and all share `admission_max_inflight`, of which
+`admission_reserved` slots are only given to technicians. Waiters are admitted by priority: technician status
+changes and claims first, then other technician requests, then students, so a burst of student reads cannot
+hold up a technician. A request without a slot after `admission_queue_timeout_ms` gets 503. Both answers use
+the usual error format. Limits are per worker process, like the metrics that report them.
+"""
+
+import asyncio
+import itertools
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import Settings, settings
+from app.errors import AppException, error_response
+from app.metrics import admission_inflight, admission_limit, admission_queued, admission_rejections
+from app.models import Role
+
+ROUTE_CLASSES = ("read", "write", "bulk")
+UNTHROTTLED_PATHS = frozenset({"/", "/metrics"})
+# Technician requests that move a ticket along: admitted ahead of everything else.
+STATUS_CHANGE_PATH = re.compile(r"^/tickets/(?:\d+/status|status/bulk|claim)$")
+
+STATUS_CHANGE, TECHNICIAN, STUDENT = range(3)
+
+
+def route_class(method: str, path: str) -> str | None:
+    """The cap a request counts against; None for routes that do no database work per request."""
+    if not path.startswith(("/tickets", "/categories")) or path == "/tickets/events":
+        # The event stream holds its connection open for as long as the client listens.
+        return None
+    if path.endswith("/bulk"):
+        return "bulk"
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+def request_role(x_role: str | None) -> str:
+    # Anything that is not a technician is limited like a student; get_role rejects invalid values later.
+    value = (x_role or "").strip().lower()
+    return Role.technician.value if value == Role.technician.value else Role.student.value
+
+
+def request_priority(role: str, method: str, path: str) -> int:
+    if role != Role.technician.value:
+        return STUDENT
+    return STATUS_CHANGE if method != "GET" and STATUS_CHANGE_PATH.match(path) else TECHNICIAN
+
+
+class TokenBuckets:
+    def __init__(self, rates: dict[str, tuple[int, int]], max_keys: int = 10_000) -> None:
+        self.rates = rates
+        self.max_keys = max_keys
+        self._buckets: dict[tuple[str, str], list[float]] = {}
+
+    def take(self, role: str, client: str, now: float | None = None) -> float:
+        """Take one token; 0 when admitted, else the seconds until a token is available."""
+        rate, burst = self.rates[role]
+        if rate <= 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get((role, client))
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            bucket = self._buckets[(role, client)] = [float(burst), now]
+        tokens = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return (1 - tokens) / rate
+        bucket[0] = tokens - 1
+        return 0.0
+
+    def _prune(self, now: float) -> None:
+        # Buckets that have refilled are indistinguishable from new ones.
+        for key, (tokens, updated) in list(self._buckets.items()):
+            rate, burst = self.rates[key[0]]
+            if tokens + (now - updated) * rate >= burst:
+                del self._buckets[key]
+
+
+@dataclass(eq=False)
+class _Waiter:
+    priority: int
+    seq: int
+    route_class: str
+    future: asyncio.Future
+
+
+class AdmissionGate:
+    """In-flight slots per route class under one shared total, handed to waiters in priority order.
+
+    Runs on the event loop only, so it needs no locks.
+    """
+
+    def __init__(self, max_inflight: int, limits: dict[str, int], reserved: int) -> None:
+        self.max_inflight = max_inflight
+        self.limits = limits
+        self.reserved = reserved
+        self.inflight: Counter[str] = Counter()
+        self.total = 0
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        admission_limit.set(("total",), max_inflight)
+        for name, limit in limits.items():
+            admission_limit.set((name,), limit)
+        self._publish()
+
+    def _fits(self, name: str, priority: int) -> bool:
+        cap = self.max_inflight - (self.reserved if priority == STUDENT else 0)
+        return self.total < cap and self.inflight[name] < self.limits[name]
+
+    def _take(self, name: str) -> None:
+        self.total += 1
+        self.inflight[name] += 1
+
+    async def acquire(self, name: str, priority: int, timeout: float) -> bool:
+        if not self._waiters and self._fits(name, priority):
+            self._take(name)
+            self._publish()
+            return True
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, next(self._seq), name, loop.create_future())
+        self._waiters.append(waiter)
+        # Queued requests blocked on another class's cap must not hold this one back.
+        self._grant()
+        expiry = loop.call_later(timeout, lambda: waiter.future.done() or waiter.future.set_result(False))
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            # The client went away; hand back a slot granted just before the cancellation.
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.result():
+                self.release(name)
+            raise
+        finally:
+            expiry.cancel()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                self._publish()
+
+    def release(self, name: str) -> None:
+        self.total -= 1
+        self.inflight[name] -= 1
+        self._grant()
+
+    def _grant(self) -> None:
+        for waiter in sorted(self._waiters, key=lambda w: (w.priority, w.seq)):
+            if not waiter.future.done() and self._fits(waiter.route_class, waiter.priority):
+                self._take(waiter.route_class)
+                waiter.future.set_result(True)
+        self._waiters = [w for w in self._waiters if not w.future.done()]
+        self._publish()
+
+    def _publish(self) -> None:
+        queued = Counter(w.route_class for w in self._waiters if not w.future.done())
+        for name in ROUTE_CLASSES:
+            admission_inflight.set((name,), self.inflight[name])
+            admission_queued.set((name,), queued[name])
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp, config: Settings | None = None) -> None:
+        self.app = app
+        self.config = config = config or settings
+        self.enabled = config.admission_control
+        if not self.enabled:
+            return
+        self.buckets = TokenBuckets(
+            {
+                Role.student.value: (config.rate_limit_student_rps, config.rate_limit_student_burst),
+                Role.technician.value: (config.rate_limit_technician_rps, config.rate_limit_technician_burst),
+            }
+        )
+        limits = {
+            "read": config.admission_read_limit,
+            "write": config.admission_write_limit,
+            "bulk": config.admission_bulk_limit,
+        }
+        self.gate = AdmissionGate(config.admission_max_inflight, limits, config.admission_reserved)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled or scope["path"] in UNTHROTTLED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        role = request_role(Headers(scope=scope).get("x-role"))
+        name = route_class(method, path)
+        client = scope.get("client")
+        retry_after = self.buckets.take(role, client[0] if client else "")
+        if retry_after:
+            admission_rejections.inc(("rate_limited", name or "other", role))
+            rate = self.buckets.rates[role][0]
+            exc = AppException(
+                status_code=429,
+                code="RATE_LIMITED",
+                message="Too many requests",
+                details=[{"field": "X-Role", "message": f"{role} requests are limited to {rate}/s per client"}],
+            )
+            await error_response(exc, {"Retry-After": str(math.ceil(retry_after))})(scope, receive, send)
+            return
+
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        timeout = self.config.admission_queue_timeout_ms / 1000
+        if not await self.gate.acquire(name, request_priority(role, method, path), timeout):
+            admission_rejections.inc(("overloaded", name, role))
+            exc = AppException(status_code=503, code="OVERLOADED", message="Server is busy, retry shortly")
+            await error_response(exc, {"Retry-After": "1"})(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.gate.release(name)
@@ -0,0 +1,195 @@
+"""Time-in-status rollups for GET /tickets/analytics/sla, maintained as `ticket_events` rows arrive.
+
+Every status change already appends a `status_changed` event in the transaction that makes it. A trigger
+on `ticket_events` looks up when the ticket entered its previous status (its `created` or last
+`status_changed` event) and adds the time spent there to `ticket_status_durations`: one row per day the
+status was left, status, next status, category, priority, building and duration bucket, holding a count,
+the total and the longest duration. Percentiles are interpolated within those buckets, so a report reads
+a few rows per day and group however many years of events there are.
+
+    python -m app.analytics rebuild    # recompute the rollups from the full event history
+"""
+
+import argparse
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy import DDL, Connection, Engine, event, text
+
+from app.models import TicketEvent
+
+# Upper bounds (seconds) of the duration buckets; longer durations share one overflow bucket.
+BUCKET_BOUNDS_S = (
+    60, 120, 300, 600, 900, 1800, 2700, 3600, 5400, 7200, 10800, 14400, 21600, 28800, 43200, 64800,
+    86400, 129600, 172800, 259200, 345600, 432000, 604800, 864000, 1209600, 1814400, 2592000, 5184000,
+)  # fmt: skip
+
+GROUP_COLUMNS = {
+    "none": "NULL",
+    "category": "category_id",
+    "priority": "priority",
+    "building": "building",
+    "day": "day",
+}
+
+_KEY = "day, status, next_status, category_id, priority, building, bucket"
+_UPSERT = (
+    f"ON CONFLICT({_KEY}) DO UPDATE SET count = count + excluded.count, "
+    "total_seconds = total_seconds + excluded.total_seconds, max_seconds = MAX(max_seconds, excluded.max_seconds)"
+)
+
+
+def _bucket(seconds: str) -> str:
+    cases = " ".join(f"WHEN {seconds} <= {bound} THEN {index}" for index, bound in enumerate(BUCKET_BOUNDS_S))
+    return f"CASE {cases} ELSE {len(BUCKET_BOUNDS_S)} END"
+
+
+def _since(entered_at: str, left_at: str) -> str:
+    return f"MAX((julianday({left_at}) - julianday({entered_at})) * 86400.0, 0)"
+
+
+SLA_DDL = [
+    "CREATE TABLE IF NOT EXISTS ticket_status_durations ("
+    "day VARCHAR(10) NOT NULL, status VARCHAR(20) NOT NULL, next_status VARCHAR(20) NOT NULL, "
+    "category_id INTEGER NOT NULL, priority VARCHAR(20) NOT NULL, building VARCHAR(1) NOT NULL, "
+    "bucket INTEGER NOT NULL, count INTEGER NOT NULL, total_seconds REAL NOT NULL, max_seconds REAL NOT NULL, "
+    f"PRIMARY KEY ({_KEY})) WITHOUT ROWID",
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_events_ai_sla AFTER INSERT ON ticket_events
+    WHEN new.type = 'status_changed' BEGIN
+        INSERT INTO ticket_status_durations ({_KEY}, count, total_seconds, max_seconds)
+        SELECT date(new.created_at), new.previous_status, new.status, new.category_id,
+            json_extract(new.data, '$.priority'), substr(new.room, 1, 1), {_bucket("seconds")}, 1, seconds, seconds
+        FROM (
+            SELECT {_since("created_at", "new.created_at")} AS seconds FROM ticket_events
+            WHERE ticket_id = new.ticket_id AND id < new.id AND type IN ('created', 'status_changed')
+            ORDER BY id DESC LIMIT 1
+        ) AS entered
+        WHERE true {_UPSERT};
+    END""",
+]
+
+for _statement in SLA_DDL:
+    event.listen(TicketEvent.__table__, "after_create", DDL(_statement))
+
+REBUILD_SQL = f"""INSERT INTO ticket_status_durations ({_KEY}, count, total_seconds, max_seconds)
+    SELECT day, status, next_status, category_id, priority, building, {_bucket("seconds")} AS bucket,
+        COUNT(*), SUM(seconds), MAX(seconds)
+    FROM (
+        SELECT date(created_at) AS day, previous_status AS status, status AS next_status, category_id,
+            json_extract(data, '$.priority') AS priority, substr(room, 1, 1) AS building, type,
+            {_since("LAG(created_at) OVER (PARTITION BY ticket_id ORDER BY id)", "created_at")} AS seconds
+        FROM ticket_events WHERE type IN ('created', 'status_changed')
+    ) AS transitions
+    WHERE type = 'status_changed' AND seconds IS NOT NULL
+    GROUP BY day, status, next_status, category_id, priority, building, bucket"""
+
+
+def ensure_sla_rollups(bind: Engine) -> bool:
+    """Create the rollup table and trigger; fill it from the event history when the table was just created."""
+    with bind.begin() as conn:
+        existing = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'ticket_status_durations'")).first()
+        for statement in SLA_DDL:
+            conn.execute(text(statement))
+        if existing is None:
+            conn.execute(text(REBUILD_SQL))
+            return True
+    return False
+
+
+def rebuild_sla_rollups(bind: Engine) -> None:
+    with bind.begin() as conn:
+        # No event may land between the delete and the recount.
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        for statement in SLA_DDL:
+            conn.execute(text(statement))
+        conn.execute(text("DELETE FROM ticket_status_durations"))
+        conn.execute(text(REBUILD_SQL))
+
+
+@dataclass
+class Durations:
+    """A histogram of time spent in a status, as summed from rollup rows."""
+
+    buckets: Counter = field(default_factory=Counter)
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def add(self, bucket: int, count: int, total_seconds: float, max_seconds: float) -> None:
+        self.buckets[bucket] += count
+        self.count += count
+        self.total_seconds += total_seconds
+        self.max_seconds = max(self.max_seconds, max_seconds)
+
+    def merge(self, other: "Durations") -> None:
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.total_seconds += other.total_seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+
+    def percentile(self, q: float) -> float:
+        """Linear interpolation inside the bucket holding the q-th duration; the top bucket ends at the max."""
+        rank = q * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            count = self.buckets[bucket]
+            if seen + count >= rank:
+                lower = BUCKET_BOUNDS_S[bucket - 1] if bucket else 0
+                upper = BUCKET_BOUNDS_S[bucket] if bucket < len(BUCKET_BOUNDS_S) else self.max_seconds
+                upper = min(upper, self.max_seconds)
+                return lower + max(upper - lower, 0) * (rank - seen) / count
+            seen += count
+        return self.max_seconds
+
+
+def read_durations(
+    conn: Connection,
+    status: str,
+    next_status: str | None,
+    since: date,
+    until: date,
+    group_by: str,
+    filters: dict[str, object],
+) -> dict[object, Durations]:
+    conditions = ["day BETWEEN :since AND :until", "status = :status"]
+    params: dict[str, object] = {"since": since.isoformat(), "until": until.isoformat(), "status": status}
+    if next_status is not None:
+        conditions.append("next_status = :next_status")
+        params["next_status"] = next_status
+    for column, value in filters.items():
+        conditions.append(f"{column} = :{column}")
+        params[column] = value
+
+    grouped: dict[object, Durations] = {}
+    rows = conn.execute(
+        text(
+            f"SELECT {GROUP_COLUMNS[group_by]} AS grp, bucket, SUM(count), SUM(total_seconds), MAX(max_seconds) "
+            f"FROM ticket_status_durations WHERE {' AND '.join(conditions)} GROUP BY grp, bucket"
+        ),
+        params,
+    )
+    for group, bucket, count, total_seconds, max_seconds in rows:
+        grouped.setdefault(group, Durations()).add(bucket, count, total_seconds, max_seconds)
+    return grouped
+
+
+def main() -> None:
+    from app.sharding import ticket_engines
+
+    parser = argparse.ArgumentParser(description="Maintain the time-in-status rollups")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    started = time.perf_counter()
+    rows = 0
+    for bind in ticket_engines():
+        rebuild_sla_rollups(bind)
+        with bind.connect() as conn:
+            rows += conn.execute(text("SELECT COUNT(*) FROM ticket_status_durations")).scalar()
+    print(f"rebuilt {rows} rollup row(s) in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
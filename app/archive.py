@@ -0,0 +1,127 @@
+"""Hot/cold split: closed tickets move out of `tickets` into `archived_tickets` once they are old enough.
+
+    python -m app.archive
+    python -m app.archive --older-than-days 30 --batch-size 1000
+
+`done` and `rejected` are terminal, so an archived ticket never changes again. Each batch copies tickets
+untouched for `DORM_ARCHIVE_AFTER_DAYS` and their comments into the archive tables and deletes them from
+`tickets`/`comments` in one `BEGIN IMMEDIATE` transaction, so readers see every ticket in exactly one place.
+Archiving is not a delete: the stats keep counting archived tickets and the change feed sends no events.
+Search only covers the hot set. GET /tickets lists the hot set unless `include_archived=true`; GET
+/tickets/{id} and its comments fall back to the archive.
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import Engine, delete, insert, literal, select, text
+from sqlalchemy.orm import aliased
+
+from app.config import settings
+from app.events import EVENTS_DDL, ensure_ticket_events
+from app.models import ArchivedComment, ArchivedTicket, Comment, Ticket
+from app.stats import STATS_DDL, ensure_ticket_stats
+
+TICKET_COLUMNS = [column.name for column in Ticket.__table__.columns]
+COMMENT_COLUMNS = [column.name for column in Comment.__table__.columns]
+
+# Delete triggers that must not see a ticket being archived. The FTS delete triggers still run.
+ARCHIVE_SUPPRESSED_TRIGGERS = ("ticket_stats_ad", "ticket_events_ad")
+
+# Hot and archived rows as one Ticket/Comment source for `include_archived=true` listings.
+ALL_TICKETS = aliased(
+    Ticket,
+    select(*Ticket.__table__.columns)
+    .union_all(select(*(ArchivedTicket.__table__.c[name] for name in TICKET_COLUMNS)))
+    .subquery("all_tickets"),
+)
+ALL_COMMENTS = aliased(
+    Comment,
+    select(*Comment.__table__.columns)
+    .union_all(select(*(ArchivedComment.__table__.c[name] for name in COMMENT_COLUMNS)))
+    .subquery("all_comments"),
+)
+
+
+@dataclass
+class ArchiveRun:
+    tickets: int = 0
+    comments: int = 0
+    batches: int = 0
+
+
+def archive_closed_tickets(
+    bind: Engine, older_than: timedelta, batch_size: int, now: datetime | None = None
+) -> ArchiveRun:
+    from app.routers.tickets import VALID_TRANSITIONS
+
+    now = now or datetime.utcnow()
+    terminal = [current for current, targets in VALID_TRANSITIONS.items() if not targets]
+    due = (
+        select(Ticket.id)
+        .where(Ticket.status.in_(terminal), Ticket.updated_at < now - older_than)
+        .order_by(Ticket.id)
+        .limit(batch_size)
+    )
+
+    run = ArchiveRun()
+    while True:
+        with bind.begin() as conn:
+            # Take the write lock before picking the batch so no status change lands in between.
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            ids = list(conn.scalars(due))
+            if not ids:
+                return run
+            for trigger in ARCHIVE_SUPPRESSED_TRIGGERS:
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+
+            conn.execute(
+                insert(ArchivedTicket).from_select(
+                    [*TICKET_COLUMNS, "archived_at"],
+                    select(*Ticket.__table__.columns, literal(now)).where(Ticket.id.in_(ids)),
+                )
+            )
+            comments = conn.execute(
+                insert(ArchivedComment).from_select(
+                    COMMENT_COLUMNS, select(*Comment.__table__.columns).where(Comment.ticket_id.in_(ids))
+                )
+            ).rowcount
+            conn.execute(delete(Comment).where(Comment.ticket_id.in_(ids)))
+            conn.execute(delete(Ticket).where(Ticket.id.in_(ids)))
+
+            for statement in STATS_DDL + EVENTS_DDL:
+                conn.execute(text(statement))
+        run.tickets += len(ids)
+        run.comments += comments
+        run.batches += 1
+
+
+def main() -> None:
+    from app.database import init_db
+    from app.sharding import ticket_engines
+
+    parser = argparse.ArgumentParser(description="Move old done/rejected tickets to the archive tables")
+    parser.add_argument("--older-than-days", type=int, default=settings.archive_after_days)
+    parser.add_argument("--batch-size", type=int, default=settings.archive_batch_size)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    run = ArchiveRun()
+    for bind in ticket_engines():
+        init_db(bind)
+        ensure_ticket_stats(bind)
+        ensure_ticket_events(bind)
+        shard_run = archive_closed_tickets(bind, timedelta(days=args.older_than_days), args.batch_size)
+        run.tickets += shard_run.tickets
+        run.comments += shard_run.comments
+        run.batches += shard_run.batches
+    print(
+        f"archived {run.tickets} ticket(s) and {run.comments} comment(s) in {run.batches} batch(es)"
+        f" in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
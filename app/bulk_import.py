@@ -0,0 +1,450 @@
+"""Bulk import of categories, tickets and comments from NDJSON or CSV.
+
+    python -m app.bulk_import tickets.ndjson
+    python -m app.bulk_import building_h.csv --kind ticket --rejects building_h.rejects.ndjson
+
+Records are validated with the API's create rules, categories are resolved from one up-front lookup and
+rows are written with `executemany` in chunked `BEGIN IMMEDIATE` transactions. NDJSON lines pick their
+kind with `"type"` (`category`, `ticket` or `comment`; default `ticket`), so the output of
+GET /tickets/export imports as is. A CSV file holds one kind, given by `--kind`.
+
+Tickets keep their `status`/`created_at`/`updated_at` when given. A ticket's `id` in the file only links
+the file's comments to it; the database assigns new ids. A comment's `ticket_id` that is not an id from
+the file refers to an existing ticket. Tickets must appear before their comments.
+
+With `DORM_SHARDS` each ticket and its comments go to its building's shard, and new categories are written
+to the home database and copied to every shard. A chunk then commits once per shard it touches.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+import uuid
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO
+
+from pydantic import BaseModel, ValidationError, model_validator
+from sqlalchemy import create_engine
+
+from app.category_cache import CATEGORY_VERSION
+from app.config import settings
+from app.events import EVENTS_DDL, created_events_sql
+from app.models import NEXT_TICKET_ID_SQL, Role, TicketStatus
+from app.response_cache import GENERATION_DDL, TICKETS_VERSION
+from app.schema import bootstrap_schema
+from app.schemas import CategoryCreate, CommentCreate, TicketCreate
+from app.search import SEARCH_DDL
+from app.sharding import ShardSet, building_of_id, building_of_room
+from app.stats import STATS_DDL, recount_sql
+
+KINDS = ("category", "ticket", "comment")
+
+# Insert triggers whose work flush() does set-based for a whole chunk. Imported tickets get their `created`
+# events, which the SLA rollups time later transitions from; imported comments are not sent as events.
+ROW_TRIGGERS = (
+    "tickets_fts_ai",
+    "comments_fts_ai",
+    "ticket_stats_ai",
+    "ticket_events_ai",
+    "comment_events_ai",
+    "ticket_generation_ai",
+)
+
+TICKET_INSERT = (
+    "INSERT INTO tickets (id, title, description, room, priority, status, category_id, created_at, updated_at,"
+    " comment_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)"
+)
+COMMENT_INSERT = "INSERT INTO comments (ticket_id, message, author_role, created_at) VALUES (?, ?, ?, ?)"
+TICKET_FTS_INSERT = (
+    "INSERT INTO tickets_fts(rowid, title, description)"
+    " SELECT id, title, description FROM tickets WHERE id BETWEEN :first AND :last"
+)
+TICKET_STATS_INSERT = (
+    f"INSERT INTO ticket_stats(dimension, bucket, count) {recount_sql('WHERE id BETWEEN :first AND :last')}"
+    " ON CONFLICT(dimension, bucket) DO UPDATE SET count = count + excluded.count"
+)
+TICKET_GENERATIONS_BUMP = (
+    "INSERT INTO cache_versions (name, version)"
+    f" SELECT '{TICKETS_VERSION}', lower(hex(randomblob(16))) UNION ALL"
+    f" SELECT DISTINCT '{TICKETS_VERSION}:category:' || category_id, lower(hex(randomblob(16))) FROM tickets"
+    " WHERE id BETWEEN :first AND :last ON CONFLICT(name) DO UPDATE SET version = excluded.version"
+)
+TICKET_EVENTS_INSERT = created_events_sql("WHERE id BETWEEN :first AND :last")
+COMMENT_FTS_INSERT = (
+    "INSERT INTO comments_fts(rowid, message, ticket_id) SELECT id, message, ticket_id FROM comments WHERE id > ?"
+)
+CATEGORY_INSERT = "INSERT INTO categories (id, name, description, is_active, created_at) VALUES (?, ?, ?, 1, ?)"
+CATEGORY_VERSION_BUMP = (
+    "INSERT INTO cache_versions (name, version) VALUES (?, ?)"
+    " ON CONFLICT(name) DO UPDATE SET version = excluded.version"
+)
+COMMENT_COUNTERS = (
+    "UPDATE tickets SET comment_count = comment_count + ?,"
+    " last_comment_at = MAX(COALESCE(last_comment_at, ?), ?) WHERE id = ?"
+)
+
+
+class TicketImport(TicketCreate):
+    id: int | None = None
+    category_id: int | None = None
+    category: str | None = None
+    status: TicketStatus = TicketStatus.open
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+    @model_validator(mode="after")
+    def _category_given(self) -> "TicketImport":
+        if self.category_id is None and self.category is None:
+            raise ValueError("category_id or category is required")
+        return self
+
+
+class CommentImport(CommentCreate):
+    ticket_id: int
+    author_role: Role
+    created_at: datetime | None = None
+
+
+SCHEMAS: dict[str, type[BaseModel]] = {"category": CategoryCreate, "ticket": TicketImport, "comment": CommentImport}
+
+
+def _timestamp(value: datetime | None, default: str) -> str:
+    if value is None:
+        return default
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    # Same textual format SQLAlchemy's SQLite DateTime type writes.
+    return value.isoformat(sep=" ", timespec="microseconds")
+
+
+def _details(exc: ValidationError) -> list[dict]:
+    return [{"field": ".".join(str(item) for item in err["loc"]), "message": err["msg"]} for err in exc.errors()]
+
+
+def read_records(stream: IO[str], file_format: str, kind: str | None) -> Iterator[tuple[int, str, dict]]:
+    """(line number, kind, raw record) for every record in the input."""
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Empty CSV cells mean "not given", not empty strings.
+            yield reader.line_num, kind or "ticket", {key: value for key, value in row.items() if value != ""}
+        return
+
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_no, "invalid", {"line": line.rstrip("\n"), "error": str(exc)}
+            continue
+        if not isinstance(record, dict):
+            yield line_no, "invalid", {"line": line.rstrip("\n"), "error": "Expected a JSON object"}
+            continue
+        yield line_no, kind or record.get("type", "ticket"), record
+
+
+class BulkImporter:
+    def __init__(self, conn, batch_size: int, rejects: IO[str] | None = None, shard_conns: dict | None = None) -> None:
+        self.conn = conn
+        # Building -> connection of its shard; empty keeps tickets and comments in `conn`.
+        self.shard_conns = shard_conns or {}
+        self.batch_size = batch_size
+        self.rejects = rejects
+        self.now = _timestamp(datetime.utcnow(), "")
+        self.categories_by_name: dict[str, int] = {}
+        self.active_categories: set[int] = set()
+        for category_id, name, is_active in conn.execute("SELECT id, name, is_active FROM categories"):
+            self.categories_by_name[name] = category_id
+            if is_active:
+                self.active_categories.add(category_id)
+        self.ticket_ids: dict[int, int] = {}
+        self.tickets: list[tuple[int | None, list]] = []
+        self.comments: list[tuple[int, int, list]] = []
+        self.counts = {kind: 0 for kind in KINDS}
+        self.rejected = 0
+
+    def reject(self, line_no: int, kind: str, record: dict, details: list[dict]) -> None:
+        self.rejected += 1
+        if self.rejects is not None:
+            entry = {"line": line_no, "type": kind, "errors": details, "record": record}
+            self.rejects.write(json.dumps(entry, default=str) + "\n")
+
+    def add(self, line_no: int, kind: str, record: dict) -> None:
+        schema = SCHEMAS.get(kind)
+        if schema is None:
+            self.reject(line_no, kind, record, [{"field": "type", "message": f"Must be one of: {', '.join(KINDS)}"}])
+            return
+        try:
+            item = schema.model_validate(record)
+        except ValidationError as exc:
+            self.reject(line_no, kind, record, _details(exc))
+            return
+
+        if kind == "category":
+            self._add_category(item)
+        elif kind == "ticket":
+            self._add_ticket(line_no, record, item)
+        else:
+            created_at = _timestamp(item.created_at, self.now)
+            self.comments.append((line_no, item.ticket_id, [record, item.message, item.author_role.value, created_at]))
+        if len(self.tickets) + len(self.comments) >= self.batch_size:
+            self.flush()
+
+    def _add_category(self, item: CategoryCreate) -> None:
+        if item.name in self.categories_by_name:
+            return
+        version = uuid.uuid4().hex
+        category_id = None
+        # The home database assigns the id; shards copy the row under the same id, as replication does.
+        for conn in (self.conn, *self.shard_conns.values()):
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(CATEGORY_INSERT, (category_id, item.name, item.description, self.now))
+            category_id = cursor.lastrowid
+            conn.execute(CATEGORY_VERSION_BUMP, (CATEGORY_VERSION, version))
+            conn.commit()
+        self.categories_by_name[item.name] = category_id
+        self.active_categories.add(category_id)
+        self.counts["category"] += 1
+
+    def _conn_for_room(self, room: str):
+        return self.shard_conns.get(building_of_room(room)) if self.shard_conns else self.conn
+
+    def _conn_for_id(self, ticket_id: int):
+        return self.shard_conns.get(building_of_id(ticket_id)) if self.shard_conns else self.conn
+
+    def _add_ticket(self, line_no: int, record: dict, item: TicketImport) -> None:
+        if self._conn_for_room(item.room) is None:
+            details = [{"field": "room", "message": f"No shard for building {building_of_room(item.room)}"}]
+            self.reject(line_no, "ticket", record, details)
+            return
+        category_id = item.category_id
+        if category_id is None:
+            category_id = self.categories_by_name.get(item.category)
+        if category_id not in self.active_categories:
+            details = [{"field": "category_id", "message": "Category not found or inactive"}]
+            self.reject(line_no, "ticket", record, details)
+            return
+        created_at = _timestamp(item.created_at, self.now)
+        self.tickets.append(
+            (
+                item.id,
+                [
+                    None,
+                    item.title,
+                    item.description,
+                    item.room,
+                    item.priority.value,
+                    item.status.value,
+                    category_id,
+                    created_at,
+                    _timestamp(item.updated_at, created_at),
+                ],
+            )
+        )
+
+    def flush(self) -> None:
+        if not self.tickets and not self.comments:
+            return
+        tickets_by_conn: dict = {}
+        for source_id, row in self.tickets:
+            tickets_by_conn.setdefault(self._conn_for_room(row[3]), []).append((source_id, row))
+
+        # One transaction per database the chunk touches, all held until every one of them is written.
+        begun: list = []
+        ticket_count = 0
+        try:
+            for conn, tickets in tickets_by_conn.items():
+                self._begin(conn)
+                begun.append(conn)
+                ticket_count += self._insert_tickets(conn, tickets)
+
+            comments_by_conn: dict = {}
+            for row in self._resolve_comments():
+                comments_by_conn.setdefault(self._conn_for_id(row[0]), []).append(row)
+            for conn, comment_rows in comments_by_conn.items():
+                if conn not in begun:
+                    self._begin(conn)
+                    begun.append(conn)
+                self._insert_comments(conn, comment_rows)
+
+            for conn in begun:
+                for statement in SEARCH_DDL + STATS_DDL + EVENTS_DDL + GENERATION_DDL:
+                    conn.execute(statement)
+                conn.commit()
+        except BaseException:
+            for conn in begun:
+                conn.rollback()
+            raise
+        self.counts["ticket"] += ticket_count
+        self.counts["comment"] += sum(len(comment_rows) for comment_rows in comments_by_conn.values())
+        self.tickets.clear()
+        self.comments.clear()
+
+    def _begin(self, conn) -> None:
+        conn.execute("BEGIN IMMEDIATE")
+        # Per-row index triggers cost more than the insert itself; drop them inside this transaction and
+        # index the chunk set-based instead. Other connections only ever see the recreated triggers.
+        for trigger in ROW_TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    def _insert_tickets(self, conn, tickets: list[tuple[int | None, list]]) -> int:
+        # Ids are assigned here, under the write lock, so file comments can be linked without a read-back.
+        first_id = next_id = conn.execute(f"SELECT {NEXT_TICKET_ID_SQL}").fetchone()[0]
+        rows = []
+        for source_id, row in tickets:
+            row[0] = next_id
+            if source_id is not None:
+                self.ticket_ids[source_id] = next_id
+            rows.append(row)
+            next_id += 1
+        conn.executemany(TICKET_INSERT, rows)
+        ticket_range = {"first": first_id, "last": next_id - 1}
+        conn.execute(TICKET_FTS_INSERT, ticket_range)
+        conn.execute(TICKET_STATS_INSERT, ticket_range)
+        conn.execute(TICKET_EVENTS_INSERT, ticket_range)
+        conn.execute(TICKET_GENERATIONS_BUMP, ticket_range)
+        return len(rows)
+
+    def _insert_comments(self, conn, comment_rows: list[tuple]) -> None:
+        last_comment_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM comments").fetchone()[0]
+        conn.executemany(COMMENT_INSERT, comment_rows)
+        conn.execute(COMMENT_FTS_INSERT, (last_comment_id,))
+        counters: dict[int, list] = {}
+        for ticket_id, _, _, created_at in comment_rows:
+            counter = counters.setdefault(ticket_id, [0, created_at])
+            counter[0] += 1
+            counter[1] = max(counter[1], created_at)
+        conn.executemany(
+            COMMENT_COUNTERS,
+            [(count, latest, latest, ticket_id) for ticket_id, (count, latest) in counters.items()],
+        )
+
+    def _resolve_comments(self) -> list[tuple]:
+        unknown: dict = {}
+        for _, ticket_id, _ in self.comments:
+            if ticket_id not in self.ticket_ids:
+                unknown.setdefault(self._conn_for_id(ticket_id), set()).add(ticket_id)
+        unknown.pop(None, None)
+        existing: set[int] = set()
+        for conn, ids in unknown.items():
+            unknown_ids = list(ids)
+            for start in range(0, len(unknown_ids), 500):
+                chunk = unknown_ids[start : start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                existing.update(
+                    row[0] for row in conn.execute(f"SELECT id FROM tickets WHERE id IN ({placeholders})", chunk)
+                )
+
+        rows = []
+        for line_no, ticket_id, (record, *values) in self.comments:
+            target = self.ticket_ids.get(ticket_id, ticket_id if ticket_id in existing else None)
+            if target is None:
+                self.reject(line_no, "comment", record, [{"field": "ticket_id", "message": "Ticket not found"}])
+                continue
+            rows.append((target, *values))
+        return rows
+
+
+def run_import(
+    database_url: str,
+    stream: IO[str],
+    file_format: str,
+    kind: str | None = None,
+    batch_size: int = 20_000,
+    rejects: IO[str] | None = None,
+    progress: IO[str] | None = None,
+    shards: ShardSet | None = None,
+) -> BulkImporter:
+    bind = create_engine(database_url)
+    bootstrap_schema(bind)
+    if shards is not None:
+        shards.open()
+        shards.replicate_categories(bind)
+
+    raw = bind.raw_connection()
+    shard_raws = {} if shards is None else {building: e.raw_connection() for building, e in shards.engines.items()}
+    try:
+        for conn in (raw.driver_connection, *(shard_raw.driver_connection for shard_raw in shard_raws.values())):
+            if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+                # Durable across application crashes in WAL mode; only an OS crash can lose the last commits.
+                conn.execute("PRAGMA synchronous=NORMAL")
+        shard_conns = {building: shard_raw.driver_connection for building, shard_raw in shard_raws.items()}
+        importer = BulkImporter(raw.driver_connection, batch_size, rejects, shard_conns)
+        started = last_report = time.perf_counter()
+        for line_no, record_kind, record in read_records(stream, file_format, kind):
+            if record_kind == "invalid":
+                importer.reject(line_no, record_kind, record, [{"field": "", "message": "Invalid JSON line"}])
+                continue
+            importer.add(line_no, record_kind, record)
+            if progress is not None and time.perf_counter() - last_report >= 2:
+                last_report = time.perf_counter()
+                _report(progress, importer, last_report - started)
+        importer.flush()
+        if progress is not None:
+            _report(progress, importer, time.perf_counter() - started, final=True)
+        return importer
+    finally:
+        for connection in (raw, *shard_raws.values()):
+            connection.close()
+        bind.dispose()
+
+
+def _report(progress: IO[str], importer: BulkImporter, elapsed: float, final: bool = False) -> None:
+    rows = sum(importer.counts.values())
+    print(
+        f"{'imported' if final else 'progress'}: {importer.counts['ticket']} tickets, "
+        f"{importer.counts['comment']} comments, {importer.counts['category']} categories, "
+        f"{importer.rejected} rejected in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)",
+        file=progress,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import categories, tickets and comments")
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", dest="file_format", choices=["ndjson", "csv"], help="default: from the extension")
+    parser.add_argument("--kind", choices=KINDS, help="record kind for every row (CSV default: ticket)")
+    parser.add_argument("--rejects", type=Path, help="where rejected rows go (default: <path>.rejects.ndjson)")
+    parser.add_argument("--batch-size", type=int, default=20_000, help="rows per transaction")
+    parser.add_argument("--database-url", default=settings.database_url)
+    args = parser.parse_args()
+
+    file_format = args.file_format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    rejects_path = args.rejects or Path("rejects.ndjson" if args.path == "-" else args.path + ".rejects.ndjson")
+    if args.path != "-" and rejects_path.resolve() == Path(args.path).resolve():
+        parser.error("--rejects must not be the input file")
+
+    shards = ShardSet.from_config(settings)
+    stream = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+    try:
+        with rejects_path.open("w", encoding="utf-8") as rejects:
+            importer = run_import(
+                args.database_url,
+                stream,
+                file_format,
+                args.kind,
+                args.batch_size,
+                rejects,
+                progress=sys.stderr,
+                shards=shards,
+            )
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if shards is not None:
+            shards.close()
+
+    if importer.rejected:
+        print(f"rejected rows written to {rejects_path}", file=sys.stderr)
+    else:
+        rejects_path.unlink()
+    sys.exit(1 if importer.rejected else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import threading
+import uuid
+from dataclasses import dataclass, field
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models import CacheVersion, Category
+from app.schemas import CategoryOut
+
+CATEGORY_VERSION = "categories"
+
+_category_list = TypeAdapter(list[CategoryOut])
+
+
+@dataclass(frozen=True)
+class CategorySnapshot:
+    version: str | None
+    by_id: dict[int, CategoryOut] = field(default_factory=dict)
+    bodies: dict[int, bytes] = field(default_factory=dict)
+    active_body: bytes = b"[]"
+    all_body: bytes = b"[]"
+
+    def active(self, category_id: int) -> CategoryOut | None:
+        category = self.by_id.get(category_id)
+        return category if category is not None and category.is_active else None
+
+
+def bump_version(db: Session, name: str) -> None:
+    """Mark `name` as changed in the current transaction; every worker sees it once this commits."""
+    stmt = insert(CacheVersion).values(name=name, version=uuid.uuid4().hex)
+    db.execute(stmt.on_conflict_do_update(index_elements=[CacheVersion.name], set_={"version": stmt.excluded.version}))
+
+
+class CategoryRegistry:
+    """Process-local copy of the categories table plus prebuilt GET /categories bodies.
+
+    Each use costs one primary-key read of the version row; the table is only reloaded when another
+    request or worker process has committed a category change since.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot = CategorySnapshot(version=None)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def snapshot(self, db: Session) -> CategorySnapshot:
+        version = db.scalar(select(CacheVersion.version).where(CacheVersion.name == CATEGORY_VERSION))
+        snapshot = self._snapshot
+        if self._loaded and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            if self._loaded and self._snapshot.version == version:
+                return self._snapshot
+            # The version was read before the rows, so a concurrent change at worst tags fresh rows with
+            # the old version and triggers one extra reload.
+            categories = [
+                CategoryOut.model_validate(category)
+                for category in db.scalars(select(Category).order_by(Category.id.asc()))
+            ]
+            self._snapshot = CategorySnapshot(
+                version=version,
+                by_id={category.id: category for category in categories},
+                bodies={category.id: category.model_dump_json().encode() for category in categories},
+                active_body=_category_list.dump_json([c for c in categories if c.is_active]),
+                all_body=_category_list.dump_json(categories),
+            )
+            self._loaded = True
+            return self._snapshot
+
+    def invalidate(self, db: Session) -> None:
+        bump_version(db, CATEGORY_VERSION)
+        with self._lock:
+            self._loaded = False
+
+
+category_registry = CategoryRegistry()
@@ -0,0 +1,124 @@
+import os
+from dataclasses import dataclass
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return default if value is None else int(value)
+
+
+def _env_list(name: str, default: tuple[str, ...]) -> tuple[str, ...]:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: str = "sqlite:///./dorm.db"
+    # WAL journaling, tuned pragmas and a pooled read-only engine next to a single-connection writer.
+    sqlite_production: bool = False
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_read_pool_size: int = 8
+    # Group commit for ticket/comment/status writes: up to N items or a few milliseconds per transaction.
+    write_batching: bool = False
+    write_batch_max_items: int = 64
+    write_batch_max_delay_ms: int = 5
+    # GET /tickets/events: resume window, how often other workers' events are picked up, per-client backlog.
+    events_buffer_size: int = 1000
+    events_poll_interval_ms: int = 500
+    events_max_pending: int = 1000
+    events_keepalive_s: int = 15
+    # Read endpoints encode rows straight to JSON bytes instead of re-validating them against response_model.
+    fast_json: bool = False
+    # Server-Timing header with DB time and statement count; log requests repeating one statement > N times.
+    server_timing: bool = True
+    n_plus_one_threshold: int = 0
+    # async def handlers whose DB work runs on dedicated read/write executors instead of the shared threadpool.
+    async_handlers: bool = False
+    db_read_workers: int = 16
+    db_write_workers: int = 4
+    # Per-worker LRU of serialized GET /tickets responses, invalidated by the ticket write generation.
+    response_cache: bool = False
+    response_cache_max_bytes: int = 32 * 1024 * 1024
+    response_cache_ttl_s: int = 30
+    # python -m app.archive: done/rejected tickets untouched for this many days move to the archive tables.
+    archive_after_days: int = 180
+    archive_batch_size: int = 500
+    # gzip response bodies of at least this many bytes for clients that accept it (0 disables).
+    gzip_min_bytes: int = 1024
+    # Log a warning when a worker takes longer than this from import to serving (dorm_worker_boot_seconds).
+    cold_start_budget_ms: int = 2000
+    # Admission control: token buckets per role and client (0 rps = unlimited), in-flight caps per route class
+    # sharing one total of which `admission_reserved` slots are technician-only, and a short queue before 503.
+    admission_control: bool = False
+    rate_limit_student_rps: int = 20
+    rate_limit_student_burst: int = 40
+    rate_limit_technician_rps: int = 100
+    rate_limit_technician_burst: int = 200
+    admission_max_inflight: int = 16
+    admission_read_limit: int = 8
+    admission_write_limit: int = 4
+    admission_bulk_limit: int = 2
+    admission_reserved: int = 4
+    admission_queue_timeout_ms: int = 100
+    # One SQLite file per listed building (e.g. "A,B,C") for its tickets and comments; empty keeps one database.
+    shards: tuple[str, ...] = ()
+    shard_url: str = "sqlite:///./dorm_{building}.db"
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            database_url=os.getenv("DORM_DATABASE_URL", cls.database_url),
+            sqlite_production=_env_bool("DORM_SQLITE_PRODUCTION", cls.sqlite_production),
+            sqlite_busy_timeout_ms=_env_int("DORM_SQLITE_BUSY_TIMEOUT_MS", cls.sqlite_busy_timeout_ms),
+            sqlite_mmap_size=_env_int("DORM_SQLITE_MMAP_SIZE", cls.sqlite_mmap_size),
+            sqlite_cache_size_kib=_env_int("DORM_SQLITE_CACHE_SIZE_KIB", cls.sqlite_cache_size_kib),
+            sqlite_read_pool_size=_env_int("DORM_SQLITE_READ_POOL_SIZE", cls.sqlite_read_pool_size),
+            write_batching=_env_bool("DORM_WRITE_BATCHING", cls.write_batching),
+            write_batch_max_items=_env_int("DORM_WRITE_BATCH_MAX_ITEMS", cls.write_batch_max_items),
+            write_batch_max_delay_ms=_env_int("DORM_WRITE_BATCH_MAX_DELAY_MS", cls.write_batch_max_delay_ms),
+            events_buffer_size=_env_int("DORM_EVENTS_BUFFER_SIZE", cls.events_buffer_size),
+            events_poll_interval_ms=_env_int("DORM_EVENTS_POLL_INTERVAL_MS", cls.events_poll_interval_ms),
+            events_max_pending=_env_int("DORM_EVENTS_MAX_PENDING", cls.events_max_pending),
+            events_keepalive_s=_env_int("DORM_EVENTS_KEEPALIVE_S", cls.events_keepalive_s),
+            fast_json=_env_bool("DORM_FAST_JSON", cls.fast_json),
+            server_timing=_env_bool("DORM_SERVER_TIMING", cls.server_timing),
+            n_plus_one_threshold=_env_int("DORM_N_PLUS_ONE_THRESHOLD", cls.n_plus_one_threshold),
+            async_handlers=_env_bool("DORM_ASYNC_HANDLERS", cls.async_handlers),
+            db_read_workers=_env_int("DORM_DB_READ_WORKERS", cls.db_read_workers),
+            db_write_workers=_env_int("DORM_DB_WRITE_WORKERS", cls.db_write_workers),
+            response_cache=_env_bool("DORM_RESPONSE_CACHE", cls.response_cache),
+            response_cache_max_bytes=_env_int("DORM_RESPONSE_CACHE_MAX_BYTES", cls.response_cache_max_bytes),
+            response_cache_ttl_s=_env_int("DORM_RESPONSE_CACHE_TTL_S", cls.response_cache_ttl_s),
+            archive_after_days=_env_int("DORM_ARCHIVE_AFTER_DAYS", cls.archive_after_days),
+            archive_batch_size=_env_int("DORM_ARCHIVE_BATCH_SIZE", cls.archive_batch_size),
+            gzip_min_bytes=_env_int("DORM_GZIP_MIN_BYTES", cls.gzip_min_bytes),
+            cold_start_budget_ms=_env_int("DORM_COLD_START_BUDGET_MS", cls.cold_start_budget_ms),
+            admission_control=_env_bool("DORM_ADMISSION_CONTROL", cls.admission_control),
+            rate_limit_student_rps=_env_int("DORM_RATE_LIMIT_STUDENT_RPS", cls.rate_limit_student_rps),
+            rate_limit_student_burst=_env_int("DORM_RATE_LIMIT_STUDENT_BURST", cls.rate_limit_student_burst),
+            rate_limit_technician_rps=_env_int("DORM_RATE_LIMIT_TECHNICIAN_RPS", cls.rate_limit_technician_rps),
+            rate_limit_technician_burst=_env_int("DORM_RATE_LIMIT_TECHNICIAN_BURST", cls.rate_limit_technician_burst),
+            admission_max_inflight=_env_int("DORM_ADMISSION_MAX_INFLIGHT", cls.admission_max_inflight),
+            admission_read_limit=_env_int("DORM_ADMISSION_READ_LIMIT", cls.admission_read_limit),
+            admission_write_limit=_env_int("DORM_ADMISSION_WRITE_LIMIT", cls.admission_write_limit),
+            admission_bulk_limit=_env_int("DORM_ADMISSION_BULK_LIMIT", cls.admission_bulk_limit),
+            admission_reserved=_env_int("DORM_ADMISSION_RESERVED", cls.admission_reserved),
+            admission_queue_timeout_ms=_env_int("DORM_ADMISSION_QUEUE_TIMEOUT_MS", cls.admission_queue_timeout_ms),
+            shards=_env_list("DORM_SHARDS", cls.shards),
+            shard_url=os.getenv("DORM_SHARD_URL", cls.shard_url),
+        )
+
+
+settings = Settings.from_env()
@@ -1,18 +1,114 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator
 
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import Engine, create_engine, event, inspect, text
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.schema import CreateColumn
+
+from app.config import Settings
+from app.metrics import TimedQueuePool
+
+
+def create_sqlite_engine(url: str, config: Settings, read_only: bool = False) -> Engine:
+    if not config.sqlite_production:
+        return create_engine(url, connect_args={"check_same_thread": False}, poolclass=TimedQueuePool)
+
+    # One writer connection serializes writes in the pool instead of in SQLite's busy handler;
+    # WAL lets the reader pool keep serving snapshots while it commits.
+    pool_size = config.sqlite_read_pool_size if read_only else 1
+    bind = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": config.sqlite_busy_timeout_ms / 1000},
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=0,
+    )
+
+    @event.listens_for(bind, "connect")
+    def _set_pragmas(dbapi_connection, _) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(config.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA mmap_size={int(config.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size={-int(config.sqlite_cache_size_kib)}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    return bind
+
+
+class Database:
+    """The writer and reader engines of one app, built from its settings, and their session factories.
+
+    Engines connect lazily, so building one does not touch the database file.
+    """
+
+    def __init__(self, config: Settings) -> None:
+        self.engine = create_sqlite_engine(config.database_url, config)
+        self.read_engine = (
+            create_sqlite_engine(config.database_url, config, read_only=True)
+            if config.sqlite_production
+            else self.engine
+        )
+        self.sessions = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.read_sessions = sessionmaker(autocommit=False, autoflush=False, bind=self.read_engine)
+
+    def dispose(self) -> None:
+        self.engine.dispose()
+        self.read_engine.dispose()
 
-DATABASE_URL = "sqlite:///./dorm.db"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Populates columns that init_db adds to an existing database file.
+COLUMN_BACKFILLS = {
+    ("tickets", "comment_count"): (
+        "UPDATE tickets SET comment_count = (SELECT COUNT(*) FROM comments WHERE comments.ticket_id = tickets.id)"
+    ),
+    ("tickets", "last_comment_at"): (
+        "UPDATE tickets SET last_comment_at = (SELECT MAX(created_at) FROM comments WHERE comments.ticket_id = tickets.id)"
+    ),
+}
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
+
+# Async so FastAPI opens and closes the session on the event loop instead of hopping to the thread pool
+# around every request; the session connects lazily on the handler's own thread, and closing only returns
+# its connection to the pool (the engines allow it across threads).
+async def get_db(request: Request) -> AsyncGenerator[Session, None]:
+    db = request.app.state.database.sessions()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[Session, None]:
+    db = request.app.state.database.read_sessions()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def init_db(bind: Engine) -> None:
+    Base.metadata.create_all(bind=bind)
+
+    # create_all skips tables that already exist, so add new columns and indexes explicitly.
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=bind.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+                if backfill:
+                    conn.execute(text(backfill))
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
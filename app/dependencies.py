@@ -1,10 +1,12 @@
-from fastapi import Header
+from fastapi import Header, Request
 
+from app.config import Settings
 from app.errors import AppException
 from app.models import Role
 
 
-def get_role(x_role: str = Header(..., alias="X-Role")) -> Role:
+# async: FastAPI runs sync dependencies on the thread pool, a round-trip a header check does not need.
+async def get_role(x_role: str = Header(..., alias="X-Role")) -> Role:
     value = x_role.strip().lower()
     if value not in {Role.student.value, Role.technician.value}:
         raise AppException(
@@ -14,3 +16,7 @@ def get_role(x_role: str = Header(..., alias="X-Role")) -> Role:
             details=[{"field": "X-Role", "message": "Must be student or technician"}],
         )
     return Role(value)
+
+
+async def get_config(request: Request) -> Settings:
+    return request.app.state.config
@@ -15,13 +15,18 @@ def _payload(code: str, message: str, details: list[dict] | None = None) -> dict
     return {"code": code, "message": message, "details": details or []}
 
 
+def error_response(exc: AppException, headers: dict[str, str] | None = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=_payload(exc.code, exc.message, exc.details),
+        headers=headers,
+    )
+
+
 def register_exception_handlers(app: FastAPI) -> None:
     @app.exception_handler(AppException)
     async def app_exception_handler(_: Request, exc: AppException) -> JSONResponse:
-        return JSONResponse(
-            status_code=exc.status_code,
-            content=_payload(exc.code, exc.message, exc.details),
-        )
+        return error_response(exc)
 
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(_: Request, exc: RequestValidationError) -> JSONResponse:
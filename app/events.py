@@ -0,0 +1,264 @@
+"""Ticket change feed: append-only `ticket_events` rows fanned out to Server-Sent Events subscribers.
+
+Triggers write one event per ticket insert, edit, status change, delete and new comment in the same
+transaction as the change. Each worker process runs one tailer thread that reads new rows in id order
+(SQLite serializes writers, so ids commit in order), keeps the newest ones in a ring buffer for
+`Last-Event-ID` resumes and hands them to its subscribers. A commit in this process wakes the tailer at
+once; commits from other workers are picked up on the next poll.
+"""
+
+import asyncio
+import threading
+import weakref
+from collections import deque
+from dataclasses import dataclass
+
+from fastapi import Request
+from sqlalchemy import DDL, Engine, event, text
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.models import Comment, Ticket
+
+_TICKET_JSON = """json_object(
+    'id', {row}.id, 'title', {row}.title, 'room', {row}.room, 'priority', {row}.priority,
+    'status', {row}.status, 'category_id', {row}.category_id,
+    'created_at', replace({row}.created_at, ' ', 'T'), 'updated_at', replace({row}.updated_at, ' ', 'T'),
+    'comment_count', {row}.comment_count
+)"""
+
+_INSERT_EVENT = (
+    "INSERT INTO ticket_events (ticket_id, type, status, previous_status, category_id, room, created_at, data)"
+)
+
+EVENTS_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_events_ai AFTER INSERT ON tickets BEGIN
+        {_INSERT_EVENT} VALUES (new.id, 'created', new.status, NULL, new.category_id, new.room, new.created_at,
+            {_TICKET_JSON.format(row="new")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_events_au_status AFTER UPDATE OF status ON tickets
+    WHEN old.status IS NOT new.status BEGIN
+        {_INSERT_EVENT} VALUES (new.id, 'status_changed', new.status, old.status, new.category_id, new.room,
+            new.updated_at, {_TICKET_JSON.format(row="new")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_events_au AFTER UPDATE OF title, description, room, priority, category_id
+    ON tickets BEGIN
+        {_INSERT_EVENT} VALUES (new.id, 'updated', new.status, NULL, new.category_id, new.room, new.updated_at,
+            {_TICKET_JSON.format(row="new")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_events_ad AFTER DELETE ON tickets BEGIN
+        {_INSERT_EVENT} VALUES (old.id, 'deleted', old.status, NULL, old.category_id, old.room,
+            strftime('%Y-%m-%d %H:%M:%f000', 'now'), json_object('id', old.id));
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS comment_events_ai AFTER INSERT ON comments BEGIN
+        {_INSERT_EVENT} SELECT new.ticket_id, 'commented', status, NULL, category_id, room, new.created_at,
+            json_object('id', new.id, 'ticket_id', new.ticket_id, 'message', new.message,
+                'author_role', new.author_role, 'created_at', replace(new.created_at, ' ', 'T'))
+        FROM tickets WHERE id = new.ticket_id;
+    END""",
+]
+
+# DDL() runs the statement through %-formatting, hence the escaping for strftime.
+for _statement in EVENTS_DDL[:4]:
+    event.listen(Ticket.__table__, "after_create", DDL(_statement.replace("%", "%%")))
+event.listen(Comment.__table__, "after_create", DDL(EVENTS_DDL[4].replace("%", "%%")))
+
+
+def ensure_ticket_events(bind: Engine) -> None:
+    with bind.begin() as conn:
+        for statement in EVENTS_DDL:
+            conn.execute(text(statement))
+
+
+def created_events_sql(where: str) -> str:
+    """`created` events for the tickets matching `where`, written set-based for loads that skip the trigger.
+
+    A ticket loaded in a later status entered it at its `updated_at`, so that is when its event happened.
+    """
+    return (
+        f"{_INSERT_EVENT} SELECT id, 'created', status, NULL, category_id, room,"
+        f" CASE WHEN status = 'open' THEN created_at ELSE updated_at END, {_TICKET_JSON.format(row='tickets')}"
+        f" FROM tickets {where} ORDER BY id"
+    )
+
+
+@dataclass(frozen=True)
+class TicketEventMessage:
+    id: int
+    type: str
+    ticket_id: int
+    status: str
+    previous_status: str | None
+    category_id: int
+    room: str
+    frame: str
+
+    def matches(self, status: str | None, category_id: int | None, room: str | None) -> bool:
+        if status is not None and status not in (self.status, self.previous_status):
+            return False
+        if category_id is not None and category_id != self.category_id:
+            return False
+        return room is None or room == self.room
+
+
+def _frame(event_id: int, event_type: str, ticket_id: int, created_at: str, data: str) -> str:
+    # Built once per event, so fanning out to many subscribers costs no serialization.
+    at = created_at.replace(" ", "T")
+    body = f'{{"id":{event_id},"type":"{event_type}","ticket_id":{ticket_id},"at":"{at}","data":{data}}}'
+    return f"id: {event_id}\nevent: {event_type}\ndata: {body}\n\n"
+
+
+class Subscription:
+    """One SSE client: an asyncio queue fed from the tailer thread; None means the client fell behind."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_pending: int) -> None:
+        self.loop = loop
+        self.queue: asyncio.Queue[TicketEventMessage | None] = asyncio.Queue()
+        self.max_pending = max_pending
+        self.overflowed = False
+
+    def deliver(self, messages: list[TicketEventMessage]) -> None:
+        self.loop.call_soon_threadsafe(self._put, messages)
+
+    def _put(self, messages: list[TicketEventMessage]) -> None:
+        for message in messages:
+            if self.overflowed:
+                return
+            if self.queue.qsize() >= self.max_pending:
+                self.overflowed = True
+                self.queue.put_nowait(None)
+                return
+            self.queue.put_nowait(message)
+
+
+# Every live broker in this process, so a commit through any session wakes their tailers.
+_brokers: "weakref.WeakSet[TicketEventBroker]" = weakref.WeakSet()
+
+
+class TicketEventBroker:
+    def __init__(self, buffer_size: int, poll_interval: float, max_pending: int) -> None:
+        self.buffer: deque[TicketEventMessage] = deque(maxlen=buffer_size)
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending
+        self.subscribers: set[Subscription] = set()
+        self.last_id = 0
+        self.bind: Engine | None = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        _brokers.add(self)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def subscribe(
+        self, bind: Engine, loop: asyncio.AbstractEventLoop, last_event_id: int | None
+    ) -> tuple[Subscription, list[TicketEventMessage] | None]:
+        """Register a subscriber and return the buffered events after `last_event_id`.
+
+        The backlog is None when the buffer no longer reaches back to `last_event_id`: the client missed
+        events and has to refetch its state.
+        """
+        subscription = Subscription(loop, self.max_pending)
+        with self._lock:
+            if bind is not self.bind:
+                self._restart(bind)
+            backlog: list[TicketEventMessage] | None = []
+            if last_event_id is not None and last_event_id < self.last_id:
+                oldest = self.buffer[0].id if self.buffer else self.last_id + 1
+                if last_event_id + 1 < oldest:
+                    backlog = None
+                else:
+                    backlog = [message for message in self.buffer if message.id > last_event_id]
+            self.subscribers.add(subscription)
+        return subscription, backlog
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self.subscribers.discard(subscription)
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop_thread()
+            self.bind = None
+
+    def _stop_thread(self) -> None:
+        # Not joined: the tailer may be waiting for the lock we hold; a stopped tailer never publishes again.
+        self._stop.set()
+        self._wake.set()
+        self._thread = None
+
+    def _restart(self, bind: Engine) -> None:
+        self._stop_thread()
+        self.bind = bind
+        self.buffer.clear()
+        with bind.connect() as conn:
+            self.last_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM ticket_events")).scalar()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._tail, args=(bind, self._stop), name="ticket-events", daemon=True)
+        self._thread.start()
+
+    def _tail(self, bind: Engine, stop: threading.Event) -> None:
+        while not stop.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self._poll(bind, stop)
+            except Exception:  # noqa: BLE001 - a failed poll (locked/busy database) is retried next round
+                continue
+
+    def _poll(self, bind: Engine, stop: threading.Event) -> None:
+        while True:
+            with bind.connect() as conn:
+                rows = conn.execute(
+                    text(
+                        "SELECT id, type, ticket_id, status, previous_status, category_id, room, created_at, data"
+                        " FROM ticket_events WHERE id > :last_id ORDER BY id LIMIT 500"
+                    ),
+                    {"last_id": self.last_id},
+                ).all()
+            if not rows:
+                return
+            messages = [
+                TicketEventMessage(
+                    id=row.id,
+                    type=row.type,
+                    ticket_id=row.ticket_id,
+                    status=row.status,
+                    previous_status=row.previous_status,
+                    category_id=row.category_id,
+                    room=row.room,
+                    frame=_frame(row.id, row.type, row.ticket_id, row.created_at, row.data),
+                )
+                for row in rows
+            ]
+            with self._lock:
+                if stop.is_set():
+                    return
+                self.buffer.extend(messages)
+                self.last_id = messages[-1].id
+                subscribers = list(self.subscribers)
+            for subscription in subscribers:
+                try:
+                    subscription.deliver(messages)
+                except RuntimeError:  # the subscriber's event loop is gone
+                    self.unsubscribe(subscription)
+
+
+def create_ticket_events(config: Settings) -> TicketEventBroker:
+    return TicketEventBroker(
+        buffer_size=config.events_buffer_size,
+        poll_interval=config.events_poll_interval_ms / 1000,
+        max_pending=config.events_max_pending,
+    )
+
+
+async def get_ticket_events(request: Request) -> TicketEventBroker:
+    return request.app.state.ticket_events
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(_: Session) -> None:
+    for broker in list(_brokers):
+        broker.wake()
@@ -0,0 +1,93 @@
+"""Async request path (`DORM_ASYNC_HANDLERS`): route handlers run on dedicated database executors.
+
+Sync handlers normally share Starlette's anyio thread pool, so a burst of slow queries or of writes queued
+on SQLite's write lock can hold every thread and stall unrelated requests. In async mode `create_app` builds
+the app's `DbLanes` and registers each handler marked `@db_lane("read")` or `@db_lane("write")` as an
+`async def` that awaits its original body on that lane's bounded `ThreadPoolExecutor`. A request waiting
+for a lane holds no thread, and writes can only ever occupy the write lane's threads, so reads keep their
+own capacity. The lanes run the same SQLAlchemy sessions (stdlib sqlite3 underneath); size them to match
+the engines' pools.
+
+In async mode FastAPI validates the returned value against `response_model` on the event loop, as it
+does for any `async def` route; pair it with `DORM_FAST_JSON` to keep large listings off the loop.
+"""
+
+import asyncio
+import contextvars
+import copy
+import functools
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from fastapi import APIRouter
+
+from app.config import Settings
+from app.metrics import lane_wait
+
+LANES = ("read", "write")
+
+
+class DbLanes:
+    def __init__(self, read_workers: int, write_workers: int) -> None:
+        self.executors = {
+            "read": ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="db-read"),
+            "write": ThreadPoolExecutor(max_workers=write_workers, thread_name_prefix="db-write"),
+        }
+
+    def wrap(self, handler: Callable[..., Any], lane: str) -> Callable[..., Any]:
+        """An async endpoint with `handler`'s signature that runs `handler` on `lane`."""
+        executor = self.executors[lane]
+
+        @functools.wraps(handler)
+        async def endpoint(*args: Any, **kwargs: Any) -> Any:
+            queued = time.perf_counter()
+            # The metrics ContextVar carries the request's SQL counters into the lane thread.
+            context = contextvars.copy_context()
+
+            def run() -> Any:
+                lane_wait.observe(time.perf_counter() - queued, (lane,))
+                return context.run(handler, *args, **kwargs)
+
+            return await asyncio.get_running_loop().run_in_executor(executor, run)
+
+        return endpoint
+
+    def shutdown(self) -> None:
+        for executor in self.executors.values():
+            executor.shutdown(wait=True)
+
+
+def create_db_lanes(config: Settings) -> DbLanes | None:
+    """The app's read and write lanes, or None unless `DORM_ASYNC_HANDLERS` is on."""
+    if not config.async_handlers:
+        return None
+    return DbLanes(config.db_read_workers, config.db_write_workers)
+
+
+def db_lane(lane: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Route decorator, applied below `@router.<method>`: marks the handler for `lane`."""
+    if lane not in LANES:
+        raise ValueError(f"Unknown DB lane {lane!r}")
+
+    def decorate(handler: Callable[..., Any]) -> Callable[..., Any]:
+        handler.db_lane = lane
+        return handler
+
+    return decorate
+
+
+def on_lanes(router: APIRouter, lanes: DbLanes | None) -> APIRouter:
+    """`router` with each `@db_lane` handler running on `lanes`, for `include_router`; unchanged without lanes."""
+    if lanes is None:
+        return router
+    laned = APIRouter()
+    for route in router.routes:
+        lane = getattr(getattr(route, "endpoint", None), "db_lane", None)
+        if lane is not None:
+            # include_router builds the app's own route from the endpoint, so a shallow copy is enough.
+            route = copy.copy(route)
+            route.endpoint = lanes.wrap(route.endpoint, lane)
+        laned.routes.append(route)
+    return laned
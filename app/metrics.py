@@ -0,0 +1,256 @@
+"""Request and SQL instrumentation, exposed in Prometheus text format at GET /metrics.
+
+`MetricsMiddleware` times every request by route template and keeps a `RequestStats` in a ContextVar.
+Sync endpoints run in the threadpool (or a DB lane) with a copy of that context, so the engine and ORM hooks below
+attribute statements, database time and loaded rows to the request that caused them. Work on other
+threads (the group-commit writer, the events tailer) has no request and only shows up in pool waits.
+Metrics are per process; with several workers, scrape each one.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Mapper
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_IN_LIST = re.compile(r"IN \((?:\?, )*\?\)")
+
+
+@dataclass
+class RequestStats:
+    started: float = field(default_factory=time.perf_counter)
+    statements: int = 0
+    db_seconds: float = 0.0
+    rows_loaded: int = 0
+    # Statement shapes are only counted when the N+1 detector is on.
+    track_shapes: bool = False
+    shapes: Counter = field(default_factory=Counter)
+
+
+_request: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...] = BUCKETS) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        with self._lock:
+            series = self._series.setdefault(labels, [[0] * len(self.buckets), 0, 0.0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self, label_names: tuple[str, ...] = ()) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, value_sum) in sorted(self._series.items()):
+                pairs = list(zip(label_names, labels))
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_labels(pairs + [('le', repr(bound))])} {count}")
+                lines.append(f"{self.name}_bucket{_labels(pairs + [('le', '+Inf')])} {total}")
+                lines.append(f"{self.name}_sum{_labels(pairs)} {value_sum}")
+                lines.append(f"{self.name}_count{_labels(pairs)} {total}")
+        return lines
+
+
+class CounterMetric:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, label_names: tuple[str, ...] = ()) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(list(zip(label_names, labels)))} {value}")
+        return lines
+
+
+class Gauge(CounterMetric):
+    kind = "gauge"
+
+    def set(self, labels: tuple, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+def _labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+ROUTE_LABELS = ("method", "route")
+
+http_requests = CounterMetric("dorm_http_requests_total", "HTTP requests by route template and status code.")
+http_duration = Histogram("dorm_http_request_duration_seconds", "Time until the response body was sent.")
+db_statements = CounterMetric("dorm_db_statements_total", "SQL statements executed on behalf of requests.")
+db_seconds = CounterMetric("dorm_db_seconds_total", "Time spent executing SQL on behalf of requests.")
+orm_rows = CounterMetric("dorm_orm_rows_loaded_total", "ORM instances loaded into the identity map.")
+n_plus_one = CounterMetric("dorm_n_plus_one_requests_total", "Requests that repeated one statement too often.")
+response_cache_lookups = CounterMetric("dorm_response_cache_lookups_total", "GET /tickets response cache lookups.")
+response_cache_evictions = CounterMetric(
+    "dorm_response_cache_evictions_total", "GET /tickets responses dropped to stay under the byte cap."
+)
+pool_wait = Histogram(
+    "dorm_db_pool_wait_seconds",
+    "Time to check a connection out of the pool, including opening a new one.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+
+lane_wait = Histogram(
+    "dorm_db_lane_wait_seconds",
+    "Time a request waited for a DB executor thread (DORM_ASYNC_HANDLERS).",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+
+admission_rejections = CounterMetric(
+    "dorm_admission_rejections_total", "Requests turned away by admission control (DORM_ADMISSION_CONTROL)."
+)
+admission_limit = Gauge("dorm_admission_limit", "In-flight request cap per route class.")
+admission_inflight = Gauge("dorm_admission_inflight", "Requests holding an admission slot, per route class.")
+admission_queued = Gauge("dorm_admission_queued", "Requests waiting for an admission slot, per route class.")
+
+worker_boot = Gauge("dorm_worker_boot_seconds", "Worker start-up time by phase, measured from the package import.")
+
+
+def render_metrics() -> str:
+    lines = [
+        *http_requests.render((*ROUTE_LABELS, "status")),
+        *http_duration.render(ROUTE_LABELS),
+        *db_statements.render(ROUTE_LABELS),
+        *db_seconds.render(ROUTE_LABELS),
+        *orm_rows.render(ROUTE_LABELS),
+        *n_plus_one.render(ROUTE_LABELS),
+        *response_cache_lookups.render(("result",)),
+        *response_cache_evictions.render(),
+        *pool_wait.render(),
+        *lane_wait.render(("lane",)),
+        *admission_rejections.render(("reason", "route_class", "role")),
+        *admission_limit.render(("route_class",)),
+        *admission_inflight.render(("route_class",)),
+        *admission_queued.render(("route_class",)),
+        *worker_boot.render(("phase",)),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class TimedQueuePool(QueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.observe(time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None:
+        context.dorm_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _request.get()
+    if stats is None or context is None:
+        return
+    stats.db_seconds += time.perf_counter() - context.dorm_started
+    stats.statements += 1
+    if stats.track_shapes:
+        stats.shapes[_IN_LIST.sub("IN (?)", statement)] += 1
+
+
+@event.listens_for(Mapper, "load")
+def _on_load(target, context) -> None:
+    stats = _request.get()
+    if stats is not None:
+        stats.rows_loaded += 1
+
+
+def server_timing(stats: RequestStats) -> str:
+    total_ms = (time.perf_counter() - stats.started) * 1000
+    return (
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} queries", '
+        f'orm;desc="{stats.rows_loaded} rows", total;dur={total_ms:.1f}'
+    )
+
+
+class MetricsMiddleware:
+    """Per-route latency, SQL and ORM counters, the N+1 detector and the Server-Timing header."""
+
+    def __init__(self, app: ASGIApp, config: Settings) -> None:
+        self.app = app
+        self.config = config
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(track_shapes=bool(self.config.n_plus_one_threshold))
+        token = _request.set(stats)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.config.server_timing:
+                    header = (b"server-timing", server_timing(stats).encode())
+                    message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request.reset(token)
+            self._record(scope, stats, status_code)
+
+    def _record(self, scope: Scope, stats: RequestStats, status_code: int) -> None:
+        route = scope.get("route")
+        labels = (scope["method"], route.path if route is not None else "unmatched")
+        http_requests.inc((*labels, str(status_code)))
+        http_duration.observe(time.perf_counter() - stats.started, labels)
+        db_statements.inc(labels, stats.statements)
+        db_seconds.inc(labels, stats.db_seconds)
+        orm_rows.inc(labels, stats.rows_loaded)
+
+        threshold = self.config.n_plus_one_threshold
+        if threshold and stats.shapes:
+            statement, count = stats.shapes.most_common(1)[0]
+            if count > threshold:
+                n_plus_one.inc(labels)
+                logger.warning(
+                    "possible N+1: %s %s ran one statement %d times: %s", *labels, count, " ".join(statement.split())
+                )
@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Computed, DateTime, Enum, ForeignKey, Index, Integer, String, Text, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -14,6 +14,18 @@ class Priority(str, enum.Enum):
     urgent = "urgent"
 
 
+# Numeric order of Priority, so "most urgent first" is an index scan instead of a sort over enum names.
+PRIORITY_RANKS = {Priority.low: 1, Priority.medium: 2, Priority.high: 3, Priority.urgent: 4}
+PRIORITY_RANK_SQL = "CASE priority " + " ".join(f"WHEN '{p.name}' THEN {r}" for p, r in PRIORITY_RANKS.items()) + " END"
+
+# SQLite hands out max(rowid) + 1, which would reuse the id of an archived ticket once every newer ticket is
+# deleted. New tickets are numbered past both tables instead, and past the id base of a shard file.
+NEXT_TICKET_ID_SQL = (
+    "(SELECT MAX(COALESCE((SELECT MAX(id) FROM tickets), 0), COALESCE((SELECT MAX(id) FROM archived_tickets), 0), "
+    "COALESCE((SELECT id_base FROM shard_info), 0)) + 1)"
+)
+
+
 class TicketStatus(str, enum.Enum):
     open = "open"
     in_progress = "in_progress"
@@ -40,27 +52,53 @@ class Category(Base):
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        Index("ix_tickets_created_at_id", "created_at", "id"),
+        Index("ix_tickets_updated_at_id", "updated_at", "id"),
+        Index("ix_tickets_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_tickets_priority_created_at_id", "priority", "created_at", "id"),
+        Index("ix_tickets_category_id_created_at_id", "category_id", "created_at", "id"),
+        Index("ix_tickets_priority_rank_id", "priority_rank", "id"),
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True, default=text(NEXT_TICKET_ID_SQL))
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=False)
     room: Mapped[str] = mapped_column(String(6), nullable=False, index=True)
     priority: Mapped[Priority] = mapped_column(Enum(Priority), nullable=False)
+    # Generated from priority, so no write path can let the two disagree.
+    priority_rank: Mapped[int] = mapped_column(Integer, Computed(PRIORITY_RANK_SQL), nullable=False)
     status: Mapped[TicketStatus] = mapped_column(Enum(TicketStatus), default=TicketStatus.open, nullable=False)
     category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
+    comment_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    last_comment_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     category: Mapped[Category] = relationship(back_populates="tickets")
     comments: Mapped[list["Comment"]] = relationship(
-        back_populates="ticket", cascade="all, delete-orphan", passive_deletes=True
+        back_populates="ticket",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="(Comment.created_at, Comment.id)",
     )
 
 
+# The technician work queue: open tickets, most urgent first, oldest first within a priority.
+Index(
+    "ix_tickets_status_priority_rank_created_at",
+    Ticket.status,
+    Ticket.priority_rank.desc(),
+    Ticket.created_at,
+    Ticket.id,
+)
+
+
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (Index("ix_comments_ticket_id_created_at_id", "ticket_id", "created_at", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     ticket_id: Mapped[int] = mapped_column(ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False)
@@ -69,3 +107,81 @@ class Comment(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
     ticket: Mapped[Ticket] = relationship(back_populates="comments")
+
+
+class ArchivedTicket(Base):
+    """A closed ticket moved out of `tickets` by `python -m app.archive`; never changes again."""
+
+    __tablename__ = "archived_tickets"
+    __table_args__ = (
+        Index("ix_archived_tickets_created_at_id", "created_at", "id"),
+        Index("ix_archived_tickets_status_created_at_id", "status", "created_at", "id"),
+    )
+
+    # Keeps the id it had in `tickets`.
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    title: Mapped[str] = mapped_column(String(200), nullable=False)
+    description: Mapped[str] = mapped_column(Text, nullable=False)
+    room: Mapped[str] = mapped_column(String(6), nullable=False)
+    priority: Mapped[Priority] = mapped_column(Enum(Priority), nullable=False)
+    priority_rank: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[TicketStatus] = mapped_column(Enum(TicketStatus), nullable=False)
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    comment_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_comment_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    comments: Mapped[list["ArchivedComment"]] = relationship(
+        back_populates="ticket",
+        order_by="(ArchivedComment.created_at, ArchivedComment.id)",
+    )
+
+
+class ArchivedComment(Base):
+    __tablename__ = "archived_comments"
+    __table_args__ = (Index("ix_archived_comments_ticket_id_created_at_id", "ticket_id", "created_at", "id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    ticket_id: Mapped[int] = mapped_column(ForeignKey("archived_tickets.id"), nullable=False)
+    message: Mapped[str] = mapped_column(Text, nullable=False)
+    author_role: Mapped[Role] = mapped_column(Enum(Role), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    ticket: Mapped[ArchivedTicket] = relationship(back_populates="comments")
+
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    # Random token replaced on every write, so workers (and restored database files) never confuse generations.
+    version: Mapped[str] = mapped_column(String(32), nullable=False)
+
+
+class ShardInfo(Base):
+    """The building a shard file belongs to (`DORM_SHARDS`); empty in the home or an unsharded database."""
+
+    __tablename__ = "shard_info"
+
+    building: Mapped[str] = mapped_column(String(1), primary_key=True)
+    # Ticket ids in the file start above this, so an id alone names its shard.
+    id_base: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class TicketEvent(Base):
+    """Append-only change feed of tickets, written by triggers in the same transaction as the change."""
+
+    __tablename__ = "ticket_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    ticket_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    type: Mapped[str] = mapped_column(String(20), nullable=False)
+    status: Mapped[TicketStatus] = mapped_column(Enum(TicketStatus), nullable=False)
+    previous_status: Mapped[TicketStatus | None] = mapped_column(Enum(TicketStatus), nullable=True)
+    category_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    room: Mapped[str] = mapped_column(String(6), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # JSON snapshot of the ticket (or the new comment) as SSE clients receive it.
+    data: Mapped[str] = mapped_column(Text, nullable=False)
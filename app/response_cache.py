@@ -0,0 +1,155 @@
+"""Per-worker LRU cache of serialized GET /tickets responses (`DORM_RESPONSE_CACHE`).
+
+Entries are keyed by the parsed query parameters and tagged with the ticket write generation they were
+built under. Triggers replace the generation token in `cache_versions` on every insert, update and
+delete of a ticket (adding a comment updates its ticket), in the same transaction as the write: one
+token for all tickets and one per category. A listing filtered by category follows its category's
+token, every other listing the global one. Each request reads the current token with one primary-key
+lookup, so no worker serves an entry built before a write that has committed, whichever process made it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+from sqlalchemy import DDL, Engine, event, select, text
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.metrics import response_cache_evictions, response_cache_lookups
+from app.models import CacheVersion, Ticket
+
+TICKETS_VERSION = "tickets"
+
+_UPSERT = (
+    "INSERT INTO cache_versions (name, version) VALUES {values} "
+    "ON CONFLICT(name) DO UPDATE SET version = excluded.version;"
+)
+_TOKEN = "lower(hex(randomblob(16)))"
+# Set again for the cached body when it is served.
+_BODY_HEADERS = (b"content-length", b"content-type")
+
+
+def _bumps(*rows: str) -> str:
+    names = [f"'{TICKETS_VERSION}'", *(f"'{TICKETS_VERSION}:category:' || {row}.category_id" for row in rows)]
+    return _UPSERT.format(values=", ".join(f"({name}, {_TOKEN})" for name in names))
+
+
+GENERATION_DDL = [
+    f"CREATE TRIGGER IF NOT EXISTS ticket_generation_ai AFTER INSERT ON tickets BEGIN {_bumps('new')} END",
+    f"CREATE TRIGGER IF NOT EXISTS ticket_generation_au AFTER UPDATE ON tickets BEGIN {_bumps('old', 'new')} END",
+    f"CREATE TRIGGER IF NOT EXISTS ticket_generation_ad AFTER DELETE ON tickets BEGIN {_bumps('old')} END",
+]
+
+for _statement in GENERATION_DDL:
+    event.listen(Ticket.__table__, "after_create", DDL(_statement))
+
+
+def ensure_ticket_generations(bind: Engine) -> None:
+    with bind.begin() as conn:
+        for statement in GENERATION_DDL:
+            conn.execute(text(statement))
+
+
+def ticket_generation(db: Session, category_id: int | None) -> str | None:
+    name = TICKETS_VERSION if category_id is None else f"{TICKETS_VERSION}:category:{category_id}"
+    return db.scalar(select(CacheVersion.version).where(CacheVersion.name == name))
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    generation: str | None
+    expires_at: float
+    body: bytes
+    headers: tuple[tuple[bytes, bytes], ...]
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(name) + len(value) for name, value in self.headers)
+
+    def response(self) -> Response:
+        raw = Response(content=self.body, media_type="application/json")
+        raw.headers.raw.extend(self.headers)
+        return raw
+
+
+class ResponseCache:
+    """LRU by bytes: entries expire after `ttl_s` or when their generation is no longer current."""
+
+    def __init__(self, max_bytes: int, ttl_s: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, generation: str | None) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                result = "miss"
+            elif entry.generation != generation:
+                result = "stale"
+            elif entry.expires_at <= time.monotonic():
+                result = "expired"
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                response_cache_lookups.inc(("hit",))
+                return entry
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+        response_cache_lookups.inc((result,))
+        return None
+
+    def put(self, key: Hashable, generation: str | None, body: bytes, response: Response) -> None:
+        entry = CachedResponse(
+            generation=generation,
+            expires_at=time.monotonic() + self.ttl_s,
+            body=body,
+            headers=tuple((name, value) for name, value in response.headers.raw if name not in _BODY_HEADERS),
+        )
+        if entry.size > self.max_bytes:
+            return
+        evicted = 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            response_cache_evictions.inc(amount=evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _remove(self, key: Hashable) -> None:
+        self._size -= self._entries.pop(key).size
+
+
+def create_ticket_list_cache(config: Settings) -> ResponseCache | None:
+    """The app's GET /tickets cache, or None unless `DORM_RESPONSE_CACHE` is on."""
+    if not config.response_cache:
+        return None
+    return ResponseCache(config.response_cache_max_bytes, config.response_cache_ttl_s)
+
+
+async def get_ticket_list_cache(request: Request) -> ResponseCache | None:
+    return request.app.state.ticket_list_cache
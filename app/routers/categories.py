@@ -1,16 +1,26 @@
 from fastapi import APIRouter, Depends, Response, status
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.category_cache import category_registry
+from app.config import Settings
+from app.database import get_db, get_read_db
+from app.dependencies import get_config
 from app.errors import AppException
+from app.lanes import db_lane
 from app.models import Category
 from app.schemas import CategoryCreate, CategoryOut, CategoryUpdate
+from app.sharding import ShardSet, get_shard_set, replicate_categories
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 
 @router.post("", response_model=CategoryOut, status_code=status.HTTP_201_CREATED)
-def create_category(payload: CategoryCreate, db: Session = Depends(get_db)) -> Category:
+@db_lane("write")
+def create_category(
+    payload: CategoryCreate,
+    db: Session = Depends(get_db),
+    shard_set: ShardSet | None = Depends(get_shard_set),
+) -> Category:
     exists = db.query(Category).filter(Category.name == payload.name).first()
     if exists:
         raise AppException(
@@ -22,29 +32,43 @@ def create_category(payload: CategoryCreate, db: Session = Depends(get_db)) -> C
 
     category = Category(name=payload.name, description=payload.description)
     db.add(category)
+    category_registry.invalidate(db)
     db.commit()
+    replicate_categories(db, shard_set)
     db.refresh(category)
     return category
 
 
 @router.get("", response_model=list[CategoryOut])
-def list_categories(include_inactive: bool = False, db: Session = Depends(get_db)) -> list[Category]:
-    query = db.query(Category)
-    if not include_inactive:
-        query = query.filter(Category.is_active.is_(True))
-    return query.order_by(Category.id.asc()).all()
+@db_lane("read")
+def list_categories(include_inactive: bool = False, db: Session = Depends(get_read_db)) -> Response:
+    snapshot = category_registry.snapshot(db)
+    body = snapshot.all_body if include_inactive else snapshot.active_body
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/{category_id}", response_model=CategoryOut)
-def get_category(category_id: int, db: Session = Depends(get_db)) -> Category:
-    category = db.query(Category).filter(Category.id == category_id).first()
+@db_lane("read")
+def get_category(
+    category_id: int, db: Session = Depends(get_read_db), config: Settings = Depends(get_config)
+) -> CategoryOut | Response:
+    snapshot = category_registry.snapshot(db)
+    category = snapshot.by_id.get(category_id)
     if not category:
         raise AppException(status_code=404, code="NOT_FOUND", message="Category not found")
+    if config.fast_json:
+        return Response(content=snapshot.bodies[category_id], media_type="application/json")
     return category
 
 
 @router.put("/{category_id}", response_model=CategoryOut)
-def update_category(category_id: int, payload: CategoryUpdate, db: Session = Depends(get_db)) -> Category:
+@db_lane("write")
+def update_category(
+    category_id: int,
+    payload: CategoryUpdate,
+    db: Session = Depends(get_db),
+    shard_set: ShardSet | None = Depends(get_shard_set),
+) -> Category:
     category = db.query(Category).filter(Category.id == category_id).first()
     if not category:
         raise AppException(status_code=404, code="NOT_FOUND", message="Category not found")
@@ -63,17 +87,24 @@ def update_category(category_id: int, payload: CategoryUpdate, db: Session = Dep
     for key, value in updates.items():
         setattr(category, key, value)
 
+    category_registry.invalidate(db)
     db.commit()
+    replicate_categories(db, shard_set)
     db.refresh(category)
     return category
 
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_category(category_id: int, db: Session = Depends(get_db)) -> Response:
+@db_lane("write")
+def delete_category(
+    category_id: int, db: Session = Depends(get_db), shard_set: ShardSet | None = Depends(get_shard_set)
+) -> Response:
     category = db.query(Category).filter(Category.id == category_id).first()
     if not category:
         raise AppException(status_code=404, code="NOT_FOUND", message="Category not found")
 
     category.is_active = False
+    category_registry.invalidate(db)
     db.commit()
+    replicate_categories(db, shard_set)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,11 +1,61 @@
-from fastapi import APIRouter, Depends, Query, Response, status
-from sqlalchemy.orm import Session, joinedload
+import asyncio
+import base64
+import binascii
+import hashlib
+import heapq
+import json
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from itertools import islice, repeat
 
-from app.database import get_db
-from app.dependencies import get_role
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.orm import Session, noload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.analytics import Durations, read_durations
+from app.archive import ALL_COMMENTS, ALL_TICKETS
+from app.category_cache import category_registry
+from app.config import Settings
+from app.dependencies import get_config, get_role
 from app.errors import AppException
-from app.models import Category, Comment, Priority, Role, Ticket, TicketStatus
-from app.schemas import CommentCreate, CommentOut, StatusUpdateRequest, TicketCreate, TicketOut, TicketUpdate
+from app.events import TicketEventBroker, get_ticket_events
+from app.export import MEDIA_TYPES, stream_tickets
+from app.lanes import db_lane
+from app.models import (
+    PRIORITY_RANKS,
+    ArchivedComment,
+    ArchivedTicket,
+    Comment,
+    Priority,
+    Role,
+    Ticket,
+    TicketStatus,
+)
+from app.response_cache import ResponseCache, get_ticket_list_cache, ticket_generation
+from app.schemas import (
+    BulkItemResult,
+    CommentCreate,
+    CommentOut,
+    ErrorResponse,
+    SlaGroupOut,
+    SlaReportOut,
+    StatusUpdateRequest,
+    TicketBulkCreateRequest,
+    TicketBulkStatusRequest,
+    TicketCreate,
+    TicketOut,
+    TicketStatsOut,
+    TicketSummaryOut,
+    TicketUpdate,
+)
+from app.search import match_expression, search_hits
+from app.serialization import comment_dict, json_response, summary_dict, ticket_dict
+from app.sharding import ShardSessions, building_of_id, building_of_room, get_read_shards, get_shards
+from app.stats import read_stats
+from app.write_queue import run_write
 
 router = APIRouter(prefix="/tickets", tags=["tickets"])
 
@@ -21,42 +71,376 @@ SORT_COLUMNS = {
     "id": Ticket.id,
     "created_at": Ticket.created_at,
     "updated_at": Ticket.updated_at,
-    "priority": Ticket.priority,
+    "priority": Ticket.priority_rank,
     "status": Ticket.status,
 }
 
+SUMMARY_COLUMNS = (
+    Ticket.id,
+    Ticket.title,
+    Ticket.room,
+    Ticket.priority,
+    Ticket.status,
+    Ticket.category_id,
+    Ticket.created_at,
+    Ticket.updated_at,
+    Ticket.comment_count,
+)
+
+# Columns returned by INSERT/UPDATE ... RETURNING so write responses need no reload.
+TICKET_COLUMNS = tuple(Ticket.__table__.columns)
+
+EPOCH = datetime(1970, 1, 1)
+
+# Window of GET /tickets/analytics/sla when no dates are given.
+SLA_DEFAULT_DAYS = 7
+
+# How long an EventSource waits before reconnecting (with Last-Event-ID) after the stream drops.
+EVENTS_RETRY_MS = 3000
+
+COMMENT_LIMIT_QUERY = Query(
+    default=None,
+    ge=0,
+    le=100,
+    description="Embed only the newest N comments (0 for none); all comments when omitted",
+)
+
+
+def _invalid_cursor() -> AppException:
+    return AppException(
+        status_code=400,
+        code="VALIDATION_ERROR",
+        message="Invalid cursor",
+        details=[{"field": "cursor", "message": "Cursor is malformed or does not match the requested ordering"}],
+    )
+
+
+def _encode_cursor(values: list) -> str:
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(values, separators=(",", ":"), default=lambda value: value.value)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise _invalid_cursor() from None
+    if not isinstance(values, list) or len(values) != size:
+        raise _invalid_cursor()
+    return values
+
 
-def _get_ticket_or_404(ticket_id: int, db: Session) -> Ticket:
-    ticket = (
-        db.query(Ticket)
-        .options(joinedload(Ticket.comments), joinedload(Ticket.category))
-        .filter(Ticket.id == ticket_id)
-        .first()
+def _ticket_cursor_key(cursor: str, sort_by: str, sort_order: str) -> tuple:
+    cursor_sort_by, cursor_sort_order, value, ticket_id = _decode_cursor(cursor, 4)
+    if cursor_sort_by != sort_by or cursor_sort_order != sort_order or not isinstance(ticket_id, int):
+        raise _invalid_cursor()
+    try:
+        if sort_by in ("created_at", "updated_at"):
+            value = datetime.fromisoformat(value)
+        elif sort_by == "priority":
+            value = PRIORITY_RANKS[Priority(value)]
+        elif sort_by == "status":
+            value = TicketStatus(value)
+        elif not isinstance(value, int):
+            raise ValueError
+    except (TypeError, ValueError):
+        raise _invalid_cursor() from None
+    return (ticket_id,) if sort_by == "id" else (value, ticket_id)
+
+
+def _etag(*parts: object) -> str:
+    return '"' + hashlib.blake2b(repr(parts).encode(), digest_size=10).hexdigest() + '"'
+
+
+def _ticket_etag(ticket: Ticket) -> str:
+    # Comments do not touch updated_at, so the count is part of the version. The tag is decodable so an
+    # If-Match can be checked inside the UPDATE itself.
+    updated_us = (ticket.updated_at - EPOCH) // timedelta(microseconds=1)
+    return f'"{ticket.id}-{updated_us}-{ticket.comment_count}"'
+
+
+def _if_match_conditions(if_match: str | None, ticket_id: int) -> list:
+    if if_match is None:
+        return []
+    versions = []
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return []
+        try:
+            tag_id, updated_us, comment_count = (int(part) for part in tag.strip('"').split("-"))
+        except ValueError:
+            continue
+        if tag.startswith('"') and tag_id == ticket_id:
+            updated_at = EPOCH + timedelta(microseconds=updated_us)
+            versions.append(and_(Ticket.updated_at == updated_at, Ticket.comment_count == comment_count))
+    if not versions:
+        raise _precondition_failed()
+    return [or_(*versions)]
+
+
+def _etag_matches(header: str | None, etag: str, weak: bool = True) -> bool:
+    if header is None:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if weak and tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in ("*", etag):
+            return True
+    return False
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def _precondition_failed() -> AppException:
+    return AppException(
+        status_code=412,
+        code="PRECONDITION_FAILED",
+        message="Ticket has changed since it was read",
+        details=[{"field": "If-Match", "message": "Does not match the current ETag"}],
     )
-    if not ticket:
+
+
+def _summarize(rows: list, db: Session, comments=Comment) -> list[dict]:
+    ticket_ids = [row.id for row in rows if row.comment_count]
+    latest = {}
+    if ticket_ids:
+        ranked = (
+            select(
+                comments.ticket_id,
+                comments.id,
+                comments.message,
+                comments.author_role,
+                comments.created_at,
+                func.row_number()
+                .over(partition_by=comments.ticket_id, order_by=(comments.created_at.desc(), comments.id.desc()))
+                .label("position"),
+            )
+            .where(comments.ticket_id.in_(ticket_ids))
+            .subquery()
+        )
+        latest = {row.ticket_id: row for row in db.execute(select(ranked).where(ranked.c.position == 1))}
+
+    summaries = []
+    for row in rows:
+        summary = dict(row._mapping)
+        comment = latest.get(row.id)
+        summary["latest_comment"] = (
+            {
+                "id": comment.id,
+                "message": comment.message,
+                "author_role": comment.author_role,
+                "created_at": comment.created_at,
+            }
+            if comment
+            else None
+        )
+        summaries.append(summary)
+    return summaries
+
+
+def _prefers_minimal(prefer: str | None) -> bool:
+    return prefer is not None and any(
+        token.strip().lower() == "return=minimal" for preference in prefer.split(",") for token in preference.split(";")
+    )
+
+
+def _minimal_response(ticket_id: int, etag: str, created: bool = False) -> Response:
+    headers = {"ETag": etag, "Preference-Applied": "return=minimal"}
+    if created:
+        headers["Location"] = f"{router.prefix}/{ticket_id}"
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+
+
+def _latest_comments(ticket_id: int, db: Session, limit: int | None, model=Comment) -> list:
+    query = db.query(model).filter(model.ticket_id == ticket_id)
+    if limit is None:
+        return query.order_by(model.created_at.asc(), model.id.asc()).all()
+    latest = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit).all()
+    return latest[::-1]
+
+
+def _ticket_payload(row, db: Session, comment_limit: int | None) -> dict:
+    payload = dict(row._mapping)
+    payload["comments"] = (
+        _latest_comments(row.id, db, comment_limit) if comment_limit != 0 and row.comment_count else []
+    )
+    return payload
+
+
+def _listing_response(
+    tickets: list, view: str, db: Session, response: Response, comments=Comment, raw: bool = False
+) -> list | Response:
+    if view == "summary":
+        summaries = _summarize(tickets, db, comments)
+        if raw:
+            return json_response([summary_dict(summary) for summary in summaries], response)
+        return summaries
+    if raw or comments is not Comment:
+        by_ticket = _comments_by_ticket(db, [ticket.id for ticket in tickets if ticket.comment_count], comments)
+        payload = [ticket_dict(ticket, by_ticket.get(ticket.id, ())) for ticket in tickets]
+        return json_response(payload, response) if raw else payload
+    return tickets
+
+
+def _comments_by_ticket(db: Session, ticket_ids: list[int], comments=Comment) -> dict[int, list]:
+    grouped: dict[int, list] = defaultdict(list)
+    if ticket_ids:
+        rows = db.execute(
+            select(comments.ticket_id, comments.message, comments.id, comments.author_role, comments.created_at)
+            .where(comments.ticket_id.in_(ticket_ids))
+            .order_by(comments.ticket_id, comments.created_at, comments.id)
+        )
+        for row in rows:
+            grouped[row.ticket_id].append(row)
+    return grouped
+
+
+def _merge_pages(pages: list[list], sessions: list[Session], key, reverse: bool, start: int, stop: int) -> list:
+    """K-way merge of per-shard result lists, each already ordered by `key`; (row, session) pairs start..stop."""
+    streams = [zip(rows, repeat(db)) for rows, db in zip(pages, sessions)]
+    return list(islice(heapq.merge(*streams, key=lambda entry: key(entry[0]), reverse=reverse), start, stop))
+
+
+def _merged_listing_response(
+    entries: list, view: str, response: Response, comments=Comment, raw: bool = False
+) -> list[dict] | Response:
+    # Comments live in the ticket's shard, so they are fetched per shard and the merged order is restored after.
+    by_shard: dict[Session, list] = defaultdict(list)
+    for row, db in entries:
+        by_shard[db].append(row)
+    payloads = {}
+    for db, rows in by_shard.items():
+        if view == "summary":
+            payloads.update((summary["id"], summary) for summary in _summarize(rows, db, comments))
+        else:
+            by_ticket = _comments_by_ticket(db, [row.id for row in rows if row.comment_count], comments)
+            payloads.update((row.id, ticket_dict(row, by_ticket.get(row.id, ()))) for row in rows)
+    payload = [payloads[row.id] for row, _ in entries]
+    if not raw:
+        return payload
+    return json_response([summary_dict(item) for item in payload] if view == "summary" else payload, response)
+
+
+def _sort_value(sort_by: str):
+    # The in-memory counterpart of the ORDER BY in list_tickets.
+    if sort_by == "id":
+        return lambda row: row.id
+    if sort_by == "priority":
+        return lambda row: (PRIORITY_RANKS[row.priority], row.id)
+    return lambda row: (getattr(row, sort_by), row.id)
+
+
+def _ids_by_shard(ticket_ids, shards: ShardSessions) -> dict[Session, set[int]]:
+    # Ids that no configured shard can hold are left out, so they come back as not found.
+    grouped: dict[Session, set[int]] = defaultdict(set)
+    for ticket_id in ticket_ids:
+        db = shards.session(building_of_id(ticket_id))
+        if db is not None:
+            grouped[db].add(ticket_id)
+    return grouped
+
+
+def _ticket_filters(
+    status_filter: TicketStatus | None,
+    priority: Priority | None,
+    category_id: int | None,
+    room: str | None,
+    tickets=Ticket,
+) -> list:
+    conditions = []
+    if status_filter is not None:
+        conditions.append(tickets.status == status_filter)
+    if priority is not None:
+        conditions.append(tickets.priority == priority)
+    if category_id is not None:
+        conditions.append(tickets.category_id == category_id)
+    if room is not None:
+        conditions.append(tickets.room == room)
+    return conditions
+
+
+def _listing_query(db: Session, view: str, tickets=Ticket, raw: bool = False):
+    if view == "summary":
+        return db.query(*(getattr(tickets, column.key) for column in SUMMARY_COLUMNS))
+    if raw or tickets is not Ticket:
+        # Plain rows; _listing_response fetches their comments without building ORM objects either.
+        return db.query(*(getattr(tickets, column.key) for column in TICKET_COLUMNS))
+    # selectinload keeps the page query a plain LIMIT and loads comments in one extra IN query.
+    return db.query(Ticket).options(selectinload(Ticket.comments))
+
+
+def _archived_ticket() -> AppException:
+    return AppException(status_code=409, code="TICKET_ARCHIVED", message="Archived tickets are read-only")
+
+
+def _missing_ticket(ticket_id: int, db: Session) -> AppException:
+    """The error for a write that found no live ticket: 409 if the archiver moved it, else 404."""
+    if db.scalar(select(ArchivedTicket.id).where(ArchivedTicket.id == ticket_id)) is not None:
+        return _archived_ticket()
+    return AppException(status_code=404, code="NOT_FOUND", message="Ticket not found")
+
+
+def _get_ticket_or_404(ticket_id: int, db: Session, comment_limit: int | None = None) -> Ticket | ArchivedTicket:
+    for model, comments in ((Ticket, Comment), (ArchivedTicket, ArchivedComment)):
+        query = db.query(model).filter(model.id == ticket_id).populate_existing()
+        if comment_limit is None:
+            query = query.options(selectinload(model.comments))
+        else:
+            query = query.options(noload(model.comments))
+        ticket = query.first()
+        if ticket:
+            break
+    else:
         raise AppException(status_code=404, code="NOT_FOUND", message="Ticket not found")
+
+    if comment_limit and ticket.comment_count:
+        # Read-only view of the newest comments; set without history so a later flush never orphans the rest.
+        set_committed_value(ticket, "comments", _latest_comments(ticket_id, db, comment_limit, comments))
     return ticket
 
 
-@router.post("", response_model=TicketOut, status_code=status.HTTP_201_CREATED)
-def create_ticket(payload: TicketCreate, db: Session = Depends(get_db)) -> Ticket:
-    category = db.query(Category).filter(Category.id == payload.category_id, Category.is_active.is_(True)).first()
-    if not category:
-        raise AppException(
-            status_code=400,
-            code="VALIDATION_ERROR",
-            message="Invalid category",
-            details=[{"field": "category_id", "message": "Category not found or inactive"}],
-        )
+@router.post(
+    "",
+    response_model=TicketOut,
+    status_code=status.HTTP_201_CREATED,
+    responses={204: {"description": "Created; body omitted for `Prefer: return=minimal`"}},
+)
+@db_lane("write")
+def create_ticket(
+    payload: TicketCreate,
+    response: Response,
+    prefer: str | None = Header(default=None),
+    shards: ShardSessions = Depends(get_shards),
+) -> dict | Response:
+    db = shards.for_room(payload.room)
 
-    ticket = Ticket(**payload.model_dump())
-    db.add(ticket)
-    db.commit()
-    return _get_ticket_or_404(ticket.id, db)
+    def insert_ticket(session: Session):
+        if category_registry.snapshot(session).active(payload.category_id) is None:
+            raise AppException(
+                status_code=400,
+                code="VALIDATION_ERROR",
+                message="Invalid category",
+                details=[{"field": "category_id", "message": "Category not found or inactive"}],
+            )
+        return session.execute(insert(Ticket).values(**payload.model_dump()).returning(*TICKET_COLUMNS)).one()
 
+    row = run_write(insert_ticket, db, shards.write_queue(db))
+    etag = _ticket_etag(row)
+    if _prefers_minimal(prefer):
+        return _minimal_response(row.id, etag, created=True)
+    response.headers["ETag"] = etag
+    return _ticket_payload(row, db, comment_limit=0)
 
-@router.get("", response_model=list[TicketOut])
+
+@router.get("", response_model=list[TicketOut] | list[TicketSummaryOut])
+@db_lane("read")
 def list_tickets(
+    response: Response,
     status_filter: TicketStatus | None = Query(default=None, alias="status"),
     priority: Priority | None = None,
     category_id: int | None = None,
@@ -65,18 +449,23 @@ def list_tickets(
     sort_order: str = Query(default="desc", pattern="^(asc|desc)$"),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=10, ge=1, le=100),
-    db: Session = Depends(get_db),
-) -> list[Ticket]:
-    query = db.query(Ticket).options(joinedload(Ticket.comments))
-
-    if status_filter is not None:
-        query = query.filter(Ticket.status == status_filter)
-    if priority is not None:
-        query = query.filter(Ticket.priority == priority)
-    if category_id is not None:
-        query = query.filter(Ticket.category_id == category_id)
-    if room is not None:
-        query = query.filter(Ticket.room == room)
+    cursor: str | None = None,
+    view: str = Query(default="full", pattern="^(full|summary)$"),
+    include_archived: bool = Query(default=False, description="Also list tickets moved to the archive"),
+    if_none_match: str | None = Header(default=None),
+    shards: ShardSessions = Depends(get_read_shards),
+    config: Settings = Depends(get_config),
+    list_cache: ResponseCache | None = Depends(get_ticket_list_cache),
+) -> list[Ticket] | list[dict] | Response:
+    tickets_source, comments_source = (ALL_TICKETS, ALL_COMMENTS) if include_archived else (Ticket, Comment)
+    # Cached responses are stored as the bytes fast JSON produces, which match the validated output.
+    raw = config.fast_json or list_cache is not None
+    conditions = _ticket_filters(status_filter, priority, category_id, room, tickets_source)
+    if room is None or not shards.sharded:
+        sessions = shards.all()
+    else:
+        # A room filter names the only shard that can match.
+        sessions = [db for db in (shards.session(building_of_room(room)),) if db is not None]
 
     sort_column = SORT_COLUMNS.get(sort_by)
     if sort_column is None:
@@ -87,99 +476,726 @@ def list_tickets(
             details=[{"field": "sort_by", "message": f"Must be one of: {', '.join(SORT_COLUMNS.keys())}"}],
         )
 
+    cache_key = (
+        status_filter,
+        priority,
+        category_id,
+        room,
+        sort_by,
+        sort_order,
+        skip,
+        limit,
+        cursor,
+        view,
+        include_archived,
+    )
+    # ETags are scoped to the full URL. Triggers replace the generation token with every ticket write (a new
+    # comment updates its ticket), so one primary-key lookup versions the listing without scanning it.
+    # Read before the listing: a write committing in between only makes the response look older than it is.
+    generation = tuple(ticket_generation(db, category_id) for db in sessions)
+    etag = _etag("list", *generation)
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    if list_cache is not None:
+        cached = list_cache.get(cache_key, generation)
+        if cached is not None:
+            return cached.response()
+    response.headers["ETag"] = etag
+
+    # Ticket.id breaks ties so pages are stable and cursors can resume exactly where the last page ended.
+    sort_column = getattr(tickets_source, sort_column.key)
+    sort_key = (sort_column,) if sort_by == "id" else (sort_column, tickets_source.id)
+    filters = list(conditions)
+
+    if cursor is not None:
+        if skip:
+            raise AppException(
+                status_code=400,
+                code="VALIDATION_ERROR",
+                message="skip cannot be combined with cursor",
+                details=[{"field": "skip", "message": "Must be 0 when cursor is given"}],
+            )
+        last_key = _ticket_cursor_key(cursor, sort_by, sort_order)
+        if sort_order == "asc":
+            filters.append(tuple_(*sort_key) > last_key)
+        else:
+            filters.append(tuple_(*sort_key) < last_key)
+
     if sort_order == "asc":
-        query = query.order_by(sort_column.asc())
+        order = [column.asc() for column in sort_key]
     else:
-        query = query.order_by(sort_column.desc())
+        order = [column.desc() for column in sort_key]
 
-    return query.offset(skip).limit(limit).all()
+    if not shards.sharded:
+        db = shards.home
+        query = _listing_query(db, view, tickets_source, raw).filter(*filters).order_by(*order)
+        tickets = query.offset(skip).limit(limit + 1).all()
+    else:
+        # Scatter-gather: no shard can contribute more than the first skip + limit + 1 rows of its own order.
+        pages = [
+            _listing_query(db, view, tickets_source, raw=True)
+            .filter(*filters)
+            .order_by(*order)
+            .limit(skip + limit + 1)
+            .all()
+            for db in sessions
+        ]
+        entries = _merge_pages(pages, sessions, _sort_value(sort_by), sort_order == "desc", skip, skip + limit + 1)
+        tickets = [row for row, _ in entries]
+    if len(tickets) > limit:
+        tickets = tickets[:limit]
+        last = tickets[-1]
+        response.headers["X-Next-Cursor"] = _encode_cursor([sort_by, sort_order, getattr(last, sort_by), last.id])
+    if not shards.sharded:
+        result = _listing_response(tickets, view, db, response, comments_source, raw)
+    else:
+        result = _merged_listing_response(entries[:limit], view, response, comments_source, raw)
+    if list_cache is not None:
+        list_cache.put(cache_key, generation, result.body, response)
+    return result
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}}},
+)
+@db_lane("read")
+def export_tickets(
+    status_filter: TicketStatus | None = Query(default=None, alias="status"),
+    priority: Priority | None = None,
+    category_id: int | None = None,
+    room: str | None = None,
+    export_format: str = Query(default="ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    include_comments: bool = False,
+    shards: ShardSessions = Depends(get_read_shards),
+) -> StreamingResponse:
+    conditions = _ticket_filters(status_filter, priority, category_id, room)
+    return StreamingResponse(
+        stream_tickets(shards.all(), conditions, export_format, include_comments),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="tickets.{export_format}"'},
+    )
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events stream"}},
+)
+async def ticket_event_stream(
+    request: Request,
+    status_filter: TicketStatus | None = Query(default=None, alias="status"),
+    category_id: int | None = None,
+    room: str | None = None,
+    last_event_id: str | None = Header(default=None),
+    shards: ShardSessions = Depends(get_read_shards),
+    config: Settings = Depends(get_config),
+    broker: TicketEventBroker = Depends(get_ticket_events),
+) -> StreamingResponse:
+    if shards.sharded:
+        # Each shard numbers its own events, so there is no single Last-Event-ID to resume from.
+        raise AppException(
+            status_code=501, code="NOT_IMPLEMENTED", message="The change feed is not available with DORM_SHARDS"
+        )
+    resume_from = None
+    if last_event_id is not None:
+        if not last_event_id.isdigit():
+            raise AppException(
+                status_code=400,
+                code="VALIDATION_ERROR",
+                message="Invalid Last-Event-ID",
+                details=[{"field": "Last-Event-ID", "message": "Must be an event id"}],
+            )
+        resume_from = int(last_event_id)
+
+    # The session is only used for its bind: holding a pooled connection for the life of the stream would
+    # starve the reader pool.
+    subscription, backlog = await run_in_threadpool(
+        broker.subscribe, shards.home.get_bind(), asyncio.get_running_loop(), resume_from
+    )
+    wanted = status_filter.value if status_filter is not None else None
+
+    def reset() -> str:
+        # Moves the client's Last-Event-ID to the present; it must refetch what it shows.
+        return f"id: {broker.last_id}\nevent: reset\ndata: {{}}\n\n"
+
+    async def stream():
+        try:
+            yield f"retry: {EVENTS_RETRY_MS}\n\n"
+            if backlog is None:
+                yield reset()
+            else:
+                for message in backlog:
+                    if message.matches(wanted, category_id, room):
+                        yield message.frame
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), config.events_keepalive_s)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    yield reset()
+                    return
+                if message.matches(wanted, category_id, room):
+                    yield message.frame
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/stats", response_model=TicketStatsOut)
+@db_lane("read")
+def ticket_stats(shards: ShardSessions = Depends(get_read_shards)) -> TicketStatsOut:
+    stats: dict[str, dict[str, int]] = defaultdict(dict)
+    for db in shards.all():
+        for dimension, buckets in read_stats(db.connection()).items():
+            for bucket, count in buckets.items():
+                stats[dimension][bucket] = stats[dimension].get(bucket, 0) + count
+    by_status = {ticket_status: stats["status"].get(ticket_status.value, 0) for ticket_status in TicketStatus}
+    return TicketStatsOut(
+        total=sum(by_status.values()),
+        by_status=by_status,
+        by_priority={priority: stats["priority"].get(priority.value, 0) for priority in Priority},
+        by_category=dict(sorted((int(bucket), count) for bucket, count in stats["category"].items())),
+        by_building=stats["building"],
+    )
+
+
+@router.get("/analytics/sla", response_model=SlaReportOut)
+@db_lane("read")
+def sla_report(
+    from_status: TicketStatus = TicketStatus.open,
+    to_status: TicketStatus | None = Query(default=None, description="Only time that ended in this status"),
+    since: date | None = None,
+    until: date | None = None,
+    group_by: str = Query(default="none", pattern="^(none|category|priority|building|day)$"),
+    category_id: int | None = None,
+    priority: Priority | None = None,
+    building: str | None = Query(default=None, pattern="^[A-Z]$"),
+    shards: ShardSessions = Depends(get_read_shards),
+) -> SlaReportOut:
+    until = until or datetime.utcnow().date()
+    since = since or until - timedelta(days=SLA_DEFAULT_DAYS - 1)
+    if since > until:
+        raise AppException(
+            status_code=400,
+            code="VALIDATION_ERROR",
+            message="Invalid date range",
+            details=[{"field": "since", "message": "Must not be after until"}],
+        )
+    filters = {
+        column: value
+        for column, value in (
+            ("category_id", category_id),
+            ("priority", priority.value if priority is not None else None),
+            ("building", building),
+        )
+        if value is not None
+    }
+    sessions = shards.all()
+    if building is not None and shards.sharded:
+        sessions = [db for db in (shards.session(building),) if db is not None]
+
+    grouped: dict[object, Durations] = {}
+    to_value = to_status.value if to_status is not None else None
+    for db in sessions:
+        rows = read_durations(db.connection(), from_status.value, to_value, since, until, group_by, filters)
+        for group, durations in rows.items():
+            grouped.setdefault(group, Durations()).merge(durations)
+
+    return SlaReportOut(
+        from_status=from_status,
+        to_status=to_status,
+        since=since,
+        until=until,
+        group_by=group_by,
+        groups=[
+            SlaGroupOut(
+                group=group,
+                count=durations.count,
+                mean_seconds=durations.total_seconds / durations.count,
+                p50_seconds=durations.percentile(0.5),
+                p90_seconds=durations.percentile(0.9),
+                p95_seconds=durations.percentile(0.95),
+                max_seconds=durations.max_seconds,
+            )
+            for group, durations in sorted(grouped.items(), key=lambda item: (item[0] is not None, item[0]))
+        ],
+    )
+
+
+@router.get("/search", response_model=list[TicketOut] | list[TicketSummaryOut])
+@db_lane("read")
+def search_tickets(
+    response: Response,
+    q: str = Query(min_length=1, max_length=200),
+    status_filter: TicketStatus | None = Query(default=None, alias="status"),
+    priority: Priority | None = None,
+    category_id: int | None = None,
+    room: str | None = None,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=10, ge=1, le=100),
+    view: str = Query(default="full", pattern="^(full|summary)$"),
+    shards: ShardSessions = Depends(get_read_shards),
+    config: Settings = Depends(get_config),
+) -> list[Ticket] | list[dict] | Response:
+    match = match_expression(q)
+    if match is None:
+        raise AppException(
+            status_code=400,
+            code="VALIDATION_ERROR",
+            message="Invalid search query",
+            details=[{"field": "q", "message": "Must contain at least one word"}],
+        )
+
+    hits = search_hits(match)
+    conditions = _ticket_filters(status_filter, priority, category_id, room)
+    if not shards.sharded:
+        db = shards.home
+        tickets = (
+            _listing_query(db, view, raw=config.fast_json)
+            .join(hits, hits.c.ticket_id == Ticket.id)
+            .filter(*conditions)
+            .order_by(hits.c.score.asc(), Ticket.id.asc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        return _listing_response(tickets, view, db, response, raw=config.fast_json)
+
+    # Scores come from each shard's own index, so the merged ranking is approximate across buildings.
+    sessions = shards.all()
+    pages = [
+        _listing_query(db, view, raw=True)
+        .add_columns(hits.c.score)
+        .join(hits, hits.c.ticket_id == Ticket.id)
+        .filter(*conditions)
+        .order_by(hits.c.score.asc(), Ticket.id.asc())
+        .limit(skip + limit)
+        .all()
+        for db in sessions
+    ]
+    entries = _merge_pages(pages, sessions, lambda row: (row.score, row.id), False, skip, skip + limit)
+    return _merged_listing_response(entries, view, response, raw=config.fast_json)
+
+
+@router.post("/bulk", response_model=list[BulkItemResult])
+@db_lane("write")
+def bulk_create_tickets(
+    payload: TicketBulkCreateRequest, shards: ShardSessions = Depends(get_shards)
+) -> list[BulkItemResult]:
+    categories = category_registry.snapshot(shards.home)
+
+    results: list[BulkItemResult] = []
+    created: dict[Session, list[tuple[int, Ticket]]] = defaultdict(list)
+    for index, item in enumerate(payload.items):
+        db = shards.session(building_of_room(item.room))
+        if categories.active(item.category_id) is None:
+            detail = {"field": "category_id", "message": "Category not found or inactive"}
+            message = "Invalid category"
+        elif db is None:
+            detail = {"field": "room", "message": f"No shard for building {building_of_room(item.room)}"}
+            message = "Invalid room"
+        else:
+            ticket = Ticket(**item.model_dump())
+            created[db].append((index, ticket))
+            results.append(BulkItemResult(index=index, ok=True))
+            continue
+        error = ErrorResponse(code="VALIDATION_ERROR", message=message, details=[detail])
+        results.append(BulkItemResult(index=index, ok=False, error=error))
+
+    # One transaction per shard: with DORM_SHARDS a failure can leave other buildings' items committed.
+    for db, tickets in created.items():
+        db.add_all(ticket for _, ticket in tickets)
+        db.flush()
+        for index, ticket in tickets:
+            results[index].ticket_id = ticket.id
+            results[index].status = ticket.status
+        db.commit()
+    return results
+
+
+@router.post("/claim", response_model=TicketOut)
+@db_lane("write")
+def claim_ticket(
+    response: Response,
+    category_id: int | None = None,
+    building: str | None = Query(default=None, pattern="^[A-Z]$"),
+    comment_limit: int | None = COMMENT_LIMIT_QUERY,
+    role: Role = Depends(get_role),
+    shards: ShardSessions = Depends(get_shards),
+    read_shards: ShardSessions = Depends(get_read_shards),
+) -> dict:
+    """Move the most urgent, oldest claimable ticket to in_progress and return it."""
+    if role != Role.technician:
+        raise AppException(status_code=403, code="FORBIDDEN", message="Only technician can claim tickets")
+
+    sources = [current for current, targets in VALID_TRANSITIONS.items() if TicketStatus.in_progress in targets]
+    conditions = [Ticket.status.in_(sources)]
+    if category_id is not None:
+        conditions.append(Ticket.category_id == category_id)
+    if building is not None:
+        conditions.append(func.substr(Ticket.room, 1, 1) == building)
+    queue_order = (Ticket.priority_rank.desc(), Ticket.created_at.asc(), Ticket.id.asc())
+    next_ticket = select(Ticket.id).where(*conditions).order_by(*queue_order).limit(1).scalar_subquery()
+
+    def claim(session: Session):
+        # One statement: SQLite takes the write lock before the subquery runs, so concurrent claims queue
+        # up behind each other and each one sees the previous claim committed.
+        return session.execute(
+            update(Ticket)
+            .where(Ticket.id == next_ticket, Ticket.status.in_(sources))
+            .values(status=TicketStatus.in_progress)
+            .returning(*TICKET_COLUMNS)
+            .execution_options(synchronize_session=False)
+        ).first()
+
+    if not shards.sharded:
+        candidates = [shards.home]
+    elif building is not None:
+        candidates = [db for db in (shards.session(building),) if db is not None]
+    else:
+        # Claim from the shard whose queue head is the most urgent and oldest; if another technician takes
+        # the last claimable ticket there first, fall back to the next shard. The heads come from the read
+        # sessions: a writer session would hold the shard's only writer connection the claim itself needs.
+        heads = []
+        for building in read_shards.buildings:
+            head = read_shards.session(building).execute(
+                select(Ticket.priority_rank, Ticket.created_at, Ticket.id)
+                .where(*conditions)
+                .order_by(*queue_order)
+                .limit(1)
+            ).first()
+            if head is not None:
+                heads.append(((-head.priority_rank, head.created_at, head.id), building))
+        candidates = [shards.session(building) for _, building in sorted(heads)]
+
+    for db in candidates:
+        row = run_write(claim, db, shards.write_queue(db))
+        if row is not None:
+            response.headers["ETag"] = _ticket_etag(row)
+            return _ticket_payload(row, db, comment_limit)
+    raise AppException(status_code=404, code="NOT_FOUND", message="No open ticket to claim")
+
+
+@router.put("/status/bulk", response_model=list[BulkItemResult])
+@db_lane("write")
+def bulk_update_ticket_status(
+    payload: TicketBulkStatusRequest,
+    role: Role = Depends(get_role),
+    shards: ShardSessions = Depends(get_shards),
+) -> list[BulkItemResult]:
+    if role != Role.technician:
+        raise AppException(status_code=403, code="FORBIDDEN", message="Only technician can update status")
+
+    # The status check is part of each UPDATE, so a concurrent transition of the same ticket cannot slip in
+    # between the check and the write, and the first statement already takes the write lock. Items run in
+    # order, so later items for the same ticket see earlier transitions, as if sent one by one.
+    results: list[BulkItemResult] = []
+    touched: set[Session] = set()
+    for index, item in enumerate(payload.items):
+        db = shards.session(building_of_id(item.ticket_id))
+        current = None
+        if db is not None:
+            touched.add(db)
+            sources = [status for status, targets in VALID_TRANSITIONS.items() if item.status in targets]
+            row = db.execute(
+                update(Ticket)
+                .where(Ticket.id == item.ticket_id, Ticket.status.in_(sources))
+                .values(status=item.status)
+                .returning(Ticket.id, Ticket.status)
+                .execution_options(synchronize_session=False)
+            ).first()
+            if row is not None:
+                results.append(BulkItemResult(index=index, ok=True, ticket_id=row.id, status=row.status))
+                continue
+            # Tickets the archiver has moved are done or rejected, so every transition out of them is invalid.
+            current = db.scalar(select(Ticket.status).where(Ticket.id == item.ticket_id))
+            if current is None:
+                current = db.scalar(select(ArchivedTicket.status).where(ArchivedTicket.id == item.ticket_id))
+        if current is None:
+            error = ErrorResponse(code="NOT_FOUND", message="Ticket not found")
+        else:
+            error = ErrorResponse(
+                code="INVALID_STATUS_TRANSITION",
+                message=f"Cannot transition from {current.value} to {item.status.value}",
+            )
+        results.append(BulkItemResult(index=index, ok=False, ticket_id=item.ticket_id, error=error))
+
+    for db in touched:
+        db.commit()
+    return results
+
+
+@router.delete("/bulk", response_model=list[BulkItemResult])
+@db_lane("write")
+def bulk_delete_tickets(
+    ids: list[int] = Query(min_length=1, max_length=500),
+    shards: ShardSessions = Depends(get_shards),
+) -> list[BulkItemResult]:
+    existing: set[int] = set()
+    archived: set[int] = set()
+    for db, shard_ids in _ids_by_shard(ids, shards).items():
+        found = set(db.scalars(select(Ticket.id).where(Ticket.id.in_(shard_ids))))
+        if found:
+            db.execute(delete(Comment).where(Comment.ticket_id.in_(found)))
+            db.execute(delete(Ticket).where(Ticket.id.in_(found)))
+        db.commit()
+        existing |= found
+        if shard_ids - found:
+            archived |= set(db.scalars(select(ArchivedTicket.id).where(ArchivedTicket.id.in_(shard_ids - found))))
+
+    results: list[BulkItemResult] = []
+    for index, ticket_id in enumerate(ids):
+        if ticket_id in existing:
+            results.append(BulkItemResult(index=index, ok=True, ticket_id=ticket_id))
+        else:
+            error = (
+                ErrorResponse(code="TICKET_ARCHIVED", message="Archived tickets are read-only")
+                if ticket_id in archived
+                else ErrorResponse(code="NOT_FOUND", message="Ticket not found")
+            )
+            results.append(BulkItemResult(index=index, ok=False, ticket_id=ticket_id, error=error))
+        # A repeated id is only deleted once.
+        existing.discard(ticket_id)
+    return results
 
 
 @router.get("/{ticket_id}", response_model=TicketOut)
-def get_ticket(ticket_id: int, db: Session = Depends(get_db)) -> Ticket:
-    return _get_ticket_or_404(ticket_id, db)
+@db_lane("read")
+def get_ticket(
+    ticket_id: int,
+    response: Response,
+    comment_limit: int | None = COMMENT_LIMIT_QUERY,
+    if_none_match: str | None = Header(default=None),
+    shards: ShardSessions = Depends(get_read_shards),
+    config: Settings = Depends(get_config),
+) -> Ticket | ArchivedTicket | Response:
+    db = shards.for_ticket(ticket_id)
+    if if_none_match is not None:
+        for model in (Ticket, ArchivedTicket):
+            current = db.execute(
+                select(model.id, model.updated_at, model.comment_count).where(model.id == ticket_id)
+            ).first()
+            if current is not None:
+                break
+        if current is not None and _etag_matches(if_none_match, _ticket_etag(current)):
+            return _not_modified(_ticket_etag(current))
 
+    ticket = _get_ticket_or_404(ticket_id, db, comment_limit)
+    response.headers["ETag"] = _ticket_etag(ticket)
+    if config.fast_json:
+        return json_response(ticket_dict(ticket, ticket.comments), response)
+    return ticket
 
-@router.put("/{ticket_id}", response_model=TicketOut)
+
+@router.put(
+    "/{ticket_id}",
+    response_model=TicketOut,
+    responses={204: {"description": "Updated; body omitted for `Prefer: return=minimal`"}},
+)
+@db_lane("write")
 def update_ticket(
     ticket_id: int,
     payload: TicketUpdate,
+    response: Response,
+    comment_limit: int | None = COMMENT_LIMIT_QUERY,
+    if_match: str | None = Header(default=None),
+    prefer: str | None = Header(default=None),
     role: Role = Depends(get_role),
-    db: Session = Depends(get_db),
-) -> Ticket:
-    ticket = _get_ticket_or_404(ticket_id, db)
+    shards: ShardSessions = Depends(get_shards),
+) -> dict | Response:
+    db = shards.for_ticket(ticket_id)
+    updates = payload.model_dump(exclude_unset=True)
 
-    if role == Role.student and ticket.status != TicketStatus.open:
+    if shards.sharded and "room" in updates and building_of_room(updates["room"]) != building_of_id(ticket_id):
         raise AppException(
-            status_code=403,
-            code="FORBIDDEN",
-            message="Student can edit ticket only when status is open",
+            status_code=400,
+            code="VALIDATION_ERROR",
+            message="Invalid room",
+            details=[{"field": "room", "message": "Must stay in the same building when tickets are sharded"}],
         )
 
-    updates = payload.model_dump(exclude_unset=True)
+    if "category_id" in updates and category_registry.snapshot(db).active(updates["category_id"]) is None:
+        raise AppException(
+            status_code=400,
+            code="VALIDATION_ERROR",
+            message="Invalid category",
+            details=[{"field": "category_id", "message": "Category not found or inactive"}],
+        )
+
+    # Every precondition is part of the UPDATE, so the happy path is a single round-trip.
+    conditions = [Ticket.id == ticket_id, *_if_match_conditions(if_match, ticket_id)]
+    if role == Role.student:
+        conditions.append(Ticket.status == TicketStatus.open)
+    if updates:
+        stmt = update(Ticket).where(*conditions).values(**updates)
+    else:
+        stmt = select(Ticket.__table__).where(*conditions)
+    row = db.execute(stmt.returning(*TICKET_COLUMNS) if updates else stmt).first()
 
-    if "category_id" in updates:
-        category = db.query(Category).filter(Category.id == updates["category_id"], Category.is_active.is_(True)).first()
-        if not category:
+    if row is None:
+        current = db.execute(select(Ticket.status).where(Ticket.id == ticket_id)).first()
+        if current is None:
+            raise _missing_ticket(ticket_id, db)
+        if role == Role.student and current.status != TicketStatus.open:
             raise AppException(
-                status_code=400,
-                code="VALIDATION_ERROR",
-                message="Invalid category",
-                details=[{"field": "category_id", "message": "Category not found or inactive"}],
+                status_code=403,
+                code="FORBIDDEN",
+                message="Student can edit ticket only when status is open",
             )
-
-    for key, value in updates.items():
-        setattr(ticket, key, value)
+        raise _precondition_failed()
 
     db.commit()
-    return _get_ticket_or_404(ticket_id, db)
+    etag = _ticket_etag(row)
+    if _prefers_minimal(prefer):
+        return _minimal_response(row.id, etag)
+    response.headers["ETag"] = etag
+    return _ticket_payload(row, db, comment_limit)
 
 
 @router.delete("/{ticket_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_ticket(ticket_id: int, db: Session = Depends(get_db)) -> Response:
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-    if not ticket:
-        raise AppException(status_code=404, code="NOT_FOUND", message="Ticket not found")
+@db_lane("write")
+def delete_ticket(ticket_id: int, shards: ShardSessions = Depends(get_shards)) -> Response:
+    db = shards.for_ticket(ticket_id)
+    deleted = db.execute(delete(Ticket).where(Ticket.id == ticket_id).returning(Ticket.id)).first()
+    if deleted is None:
+        raise _missing_ticket(ticket_id, db)
 
-    db.delete(ticket)
+    # foreign_keys is off on SQLite connections, so ON DELETE CASCADE does not fire by itself.
+    db.execute(delete(Comment).where(Comment.ticket_id == ticket_id))
     db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.post("/{ticket_id}/comments", response_model=CommentOut, status_code=status.HTTP_201_CREATED)
+@db_lane("write")
 def add_comment(
     ticket_id: int,
     payload: CommentCreate,
     role: Role = Depends(get_role),
-    db: Session = Depends(get_db),
-) -> Comment:
-    _get_ticket_or_404(ticket_id, db)
+    shards: ShardSessions = Depends(get_shards),
+) -> CommentOut:
+    db = shards.for_ticket(ticket_id)
+
+    def insert_comment(session: Session) -> CommentOut:
+        created_at = datetime.utcnow()
+        bumped = session.execute(
+            update(Ticket)
+            .where(Ticket.id == ticket_id)
+            .values(
+                comment_count=Ticket.comment_count + 1,
+                last_comment_at=created_at,
+                # A new comment is not an edit of the ticket itself.
+                updated_at=Ticket.updated_at,
+            )
+            .returning(Ticket.id)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if bumped is None:
+            raise _missing_ticket(ticket_id, session)
+
+        row = session.execute(
+            insert(Comment)
+            .values(ticket_id=ticket_id, message=payload.message, author_role=role, created_at=created_at)
+            .returning(Comment.id, Comment.message, Comment.author_role, Comment.created_at)
+        ).one()
+        return CommentOut.model_validate(row)
+
+    return run_write(insert_comment, db, shards.write_queue(db))
 
-    comment = Comment(ticket_id=ticket_id, message=payload.message, author_role=role)
-    db.add(comment)
-    db.commit()
-    db.refresh(comment)
-    return comment
 
+@router.get("/{ticket_id}/comments", response_model=list[CommentOut])
+@db_lane("read")
+def list_comments(
+    ticket_id: int,
+    response: Response,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    shards: ShardSessions = Depends(get_read_shards),
+    config: Settings = Depends(get_config),
+) -> list[Comment] | list[ArchivedComment] | Response:
+    db = shards.for_ticket(ticket_id)
+    for model, comment_model in ((Ticket, Comment), (ArchivedTicket, ArchivedComment)):
+        if db.query(model.id).filter(model.id == ticket_id).first() is not None:
+            break
+    else:
+        raise AppException(status_code=404, code="NOT_FOUND", message="Ticket not found")
 
-@router.put("/{ticket_id}/status", response_model=TicketOut)
+    query = db.query(comment_model).filter(comment_model.ticket_id == ticket_id)
+    if cursor is not None:
+        created_at, comment_id = _decode_cursor(cursor, 2)
+        try:
+            last_key = (datetime.fromisoformat(created_at), int(comment_id))
+        except (TypeError, ValueError):
+            raise _invalid_cursor() from None
+        query = query.filter(tuple_(comment_model.created_at, comment_model.id) > last_key)
+
+    comments = query.order_by(comment_model.created_at.asc(), comment_model.id.asc()).limit(limit + 1).all()
+    if len(comments) > limit:
+        comments = comments[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor([comments[-1].created_at, comments[-1].id])
+    if config.fast_json:
+        return json_response([comment_dict(comment) for comment in comments], response)
+    return comments
+
+
+@router.put(
+    "/{ticket_id}/status",
+    response_model=TicketOut,
+    responses={204: {"description": "Updated; body omitted for `Prefer: return=minimal`"}},
+)
+@db_lane("write")
 def update_ticket_status(
     ticket_id: int,
     payload: StatusUpdateRequest,
+    response: Response,
+    comment_limit: int | None = COMMENT_LIMIT_QUERY,
+    if_match: str | None = Header(default=None),
+    prefer: str | None = Header(default=None),
     role: Role = Depends(get_role),
-    db: Session = Depends(get_db),
-) -> Ticket:
+    shards: ShardSessions = Depends(get_shards),
+) -> dict | Response:
     if role != Role.technician:
         raise AppException(status_code=403, code="FORBIDDEN", message="Only technician can update status")
 
-    ticket = _get_ticket_or_404(ticket_id, db)
-    if payload.status not in VALID_TRANSITIONS[ticket.status]:
+    db = shards.for_ticket(ticket_id)
+    sources = [current for current, targets in VALID_TRANSITIONS.items() if payload.status in targets]
+    version = _if_match_conditions(if_match, ticket_id)
+
+    def transition(session: Session):
+        row = session.execute(
+            update(Ticket)
+            .where(Ticket.id == ticket_id, Ticket.status.in_(sources), *version)
+            .values(status=payload.status)
+            .returning(*TICKET_COLUMNS)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row is not None:
+            return row
+
+        current = session.execute(select(Ticket.status).where(Ticket.id == ticket_id)).first()
+        if current is None:
+            # Archived tickets are done or rejected, so a transition out of one is invalid like any other.
+            current = session.execute(select(ArchivedTicket.status).where(ArchivedTicket.id == ticket_id)).first()
+        if current is None:
+            raise AppException(status_code=404, code="NOT_FOUND", message="Ticket not found")
+        if current.status in sources:
+            raise _precondition_failed()
         raise AppException(
             status_code=409,
             code="INVALID_STATUS_TRANSITION",
-            message=f"Cannot transition from {ticket.status.value} to {payload.status.value}",
+            message=f"Cannot transition from {current.status.value} to {payload.status.value}",
         )
 
-    ticket.status = payload.status
-    db.commit()
-    return _get_ticket_or_404(ticket_id, db)
+    row = run_write(transition, db, shards.write_queue(db))
+    etag = _ticket_etag(row)
+    if _prefers_minimal(prefer):
+        return _minimal_response(row.id, etag)
+    response.headers["ETag"] = etag
+    return _ticket_payload(row, db, comment_limit)
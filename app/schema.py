@@ -0,0 +1,101 @@
+"""Create or upgrade a database once, then only compare a version stamp on every later boot.
+
+`schema_version()` hashes the DDL of the models and of every trigger set (search index, counters, change
+feed, SLA rollups, write generations). `bootstrap_schema` reads `PRAGMA user_version`; when it already
+holds the version the worker starts without touching the schema. Otherwise it runs init_db and every
+ensure_* step, which are idempotent, and stamps the file. Workers that boot at the same time against a
+new file can race on CREATE TABLE / ADD COLUMN or on the write lock; the loser retries and finds the
+objects in place.
+
+    python -m app.schema check      # print each database's stamp and whether it is current
+    python -m app.schema upgrade    # re-run every step, e.g. after dropping triggers by hand
+"""
+
+import argparse
+import functools
+import hashlib
+import logging
+import time
+
+from sqlalchemy import Engine
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.analytics import SLA_DDL, ensure_sla_rollups
+from app.database import COLUMN_BACKFILLS, Base, init_db
+from app.events import EVENTS_DDL, ensure_ticket_events
+from app.response_cache import GENERATION_DDL, ensure_ticket_generations
+from app.search import SEARCH_DDL, ensure_search_index
+from app.stats import STATS_DDL, ensure_ticket_stats
+
+logger = logging.getLogger(__name__)
+
+UPGRADE_ATTEMPTS = 5
+_RACE_ERRORS = ("already exists", "duplicate column name", "database is locked")
+
+
+@functools.cache
+def schema_version() -> int:
+    dialect = sqlite.dialect()
+    statements = [str(CreateTable(table).compile(dialect=dialect)) for table in Base.metadata.sorted_tables]
+    statements += [
+        str(CreateIndex(index).compile(dialect=dialect))
+        for table in Base.metadata.sorted_tables
+        for index in sorted(table.indexes, key=lambda index: index.name)
+    ]
+    statements += [*SEARCH_DDL, *STATS_DDL, *EVENTS_DDL, *SLA_DDL, *GENERATION_DDL, *COLUMN_BACKFILLS.values()]
+    digest = hashlib.sha256("\n".join(statements).encode()).digest()
+    # PRAGMA user_version is a signed 32-bit integer; 0 means never stamped.
+    return int.from_bytes(digest[:4], "big") & 0x7FFFFFFF or 1
+
+
+def stamped_version(bind: Engine) -> int:
+    with bind.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def upgrade_schema(bind: Engine) -> None:
+    init_db(bind)
+    ensure_search_index(bind)
+    ensure_ticket_stats(bind)
+    ensure_ticket_events(bind)
+    ensure_sla_rollups(bind)
+    ensure_ticket_generations(bind)
+    with bind.begin() as conn:
+        conn.exec_driver_sql(f"PRAGMA user_version = {schema_version()}")
+
+
+def bootstrap_schema(bind: Engine) -> bool:
+    """Upgrade `bind` unless it is stamped with the current schema version; True when it ran the upgrade."""
+    for attempt in range(UPGRADE_ATTEMPTS):
+        if stamped_version(bind) == schema_version():
+            return False
+        try:
+            upgrade_schema(bind)
+            return True
+        except OperationalError as exc:
+            if attempt == UPGRADE_ATTEMPTS - 1 or not any(error in str(exc) for error in _RACE_ERRORS):
+                raise
+            logger.info("schema upgrade raced another worker, retrying: %s", exc.orig)
+            time.sleep(0.05 * (attempt + 1))
+    return False
+
+
+def main() -> None:
+    from app.sharding import ticket_engines
+
+    parser = argparse.ArgumentParser(description="Check or upgrade the database schema")
+    parser.add_argument("command", choices=["check", "upgrade"])
+    args = parser.parse_args()
+
+    for bind in ticket_engines():
+        if args.command == "upgrade":
+            upgrade_schema(bind)
+        stamped = stamped_version(bind)
+        state = "current" if stamped == schema_version() else f"outdated (current is {schema_version()})"
+        print(f"{bind.url}: version {stamped}, {state}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -79,6 +79,68 @@ class TicketOut(TicketBase):
     status: TicketStatus
     created_at: datetime
     updated_at: datetime
+    comment_count: int = 0
+    last_comment_at: datetime | None = None
     comments: list[CommentOut] = Field(default_factory=list)
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class TicketSummaryOut(BaseModel):
+    id: int
+    title: str
+    room: str
+    priority: Priority
+    status: TicketStatus
+    category_id: int
+    created_at: datetime
+    updated_at: datetime
+    comment_count: int
+    latest_comment: CommentOut | None = None
+
+
+class TicketBulkCreateRequest(BaseModel):
+    items: list[TicketCreate] = Field(min_length=1, max_length=500)
+
+
+class StatusBulkItem(StatusUpdateRequest):
+    ticket_id: int
+
+
+class TicketBulkStatusRequest(BaseModel):
+    items: list[StatusBulkItem] = Field(min_length=1, max_length=500)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    ok: bool
+    ticket_id: int | None = None
+    status: TicketStatus | None = None
+    error: ErrorResponse | None = None
+
+
+class TicketStatsOut(BaseModel):
+    total: int
+    by_status: dict[TicketStatus, int]
+    by_priority: dict[Priority, int]
+    by_category: dict[int, int]
+    by_building: dict[str, int]
+
+
+class SlaGroupOut(BaseModel):
+    group: int | str | None
+    count: int
+    mean_seconds: float
+    p50_seconds: float
+    p90_seconds: float
+    p95_seconds: float
+    max_seconds: float
+
+
+class SlaReportOut(BaseModel):
+    from_status: TicketStatus
+    to_status: TicketStatus | None
+    since: date
+    until: date
+    group_by: str
+    groups: list[SlaGroupOut]
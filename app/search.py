@@ -0,0 +1,132 @@
+"""FTS5 full-text index over ticket titles/descriptions and comment messages.
+
+Both FTS tables are external-content tables kept in sync by triggers, so the text is stored once.
+Run `python -m app.search rebuild` once to index an existing database file.
+"""
+
+import argparse
+import re
+import time
+
+from sqlalchemy import DDL, Connection, Engine, Float, Integer, Subquery, event, text
+
+from app.models import Comment, Ticket
+
+TICKET_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5("
+    "title, description, content='tickets', content_rowid='id', tokenize='porter unicode61')",
+    """CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN
+        INSERT INTO tickets_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN
+        INSERT INTO tickets_fts(tickets_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tickets_fts_au AFTER UPDATE OF title, description ON tickets BEGIN
+        INSERT INTO tickets_fts(tickets_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tickets_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+COMMENT_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5("
+    "message, ticket_id UNINDEXED, content='comments', content_rowid='id', tokenize='porter unicode61')",
+    """CREATE TRIGGER IF NOT EXISTS comments_fts_ai AFTER INSERT ON comments BEGIN
+        INSERT INTO comments_fts(rowid, message, ticket_id) VALUES (new.id, new.message, new.ticket_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comments_fts_ad AFTER DELETE ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, message, ticket_id)
+        VALUES ('delete', old.id, old.message, old.ticket_id);
+    END""",
+]
+
+SEARCH_DDL = TICKET_SEARCH_DDL + COMMENT_SEARCH_DDL
+
+# bm25 column weights: title hits outrank description hits, which outrank comment hits.
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 2.0
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Fresh databases (including the test suite's create_all) get the index together with the tables.
+for _statement in TICKET_SEARCH_DDL:
+    event.listen(Ticket.__table__, "after_create", DDL(_statement))
+for _statement in COMMENT_SEARCH_DDL:
+    event.listen(Comment.__table__, "after_create", DDL(_statement))
+event.listen(Ticket.__table__, "before_drop", DDL("DROP TABLE IF EXISTS tickets_fts"))
+event.listen(Comment.__table__, "before_drop", DDL("DROP TABLE IF EXISTS comments_fts"))
+
+
+def match_expression(query: str) -> str | None:
+    """Turn free text into an FTS5 query: every word must match, each quoted so no input is FTS syntax."""
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"' for token in tokens)
+
+
+def search_hits(match: str) -> Subquery:
+    """(ticket_id, score) for every ticket whose text or comments match; lower score is more relevant."""
+    return (
+        text(
+            "SELECT ticket_id, MIN(score) AS score FROM ("
+            " SELECT rowid AS ticket_id, bm25(tickets_fts, :title_weight, :description_weight) AS score"
+            " FROM tickets_fts WHERE tickets_fts MATCH :match"
+            " UNION ALL"
+            " SELECT ticket_id, bm25(comments_fts) AS score FROM comments_fts WHERE comments_fts MATCH :match"
+            ") GROUP BY ticket_id"
+        )
+        .bindparams(match=match, title_weight=TITLE_WEIGHT, description_weight=DESCRIPTION_WEIGHT)
+        .columns(ticket_id=Integer, score=Float)
+        .subquery("hits")
+    )
+
+
+def ensure_search_index(bind: Engine) -> bool:
+    """Create any missing FTS tables/triggers; rebuild the index when it was just created on existing data."""
+    with bind.begin() as conn:
+        existing = set(
+            conn.execute(text("SELECT name FROM sqlite_master WHERE name IN ('tickets_fts', 'comments_fts')")).scalars()
+        )
+        for statement in SEARCH_DDL:
+            conn.execute(text(statement))
+        if existing != {"tickets_fts", "comments_fts"}:
+            _rebuild(conn)
+            return True
+    return False
+
+
+def _rebuild(conn: Connection) -> None:
+    conn.execute(text("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')"))
+    conn.execute(text("INSERT INTO comments_fts(comments_fts) VALUES ('rebuild')"))
+
+
+def rebuild_search_index(bind: Engine) -> None:
+    with bind.begin() as conn:
+        for statement in SEARCH_DDL:
+            conn.execute(text(statement))
+        _rebuild(conn)
+        conn.execute(text("INSERT INTO tickets_fts(tickets_fts) VALUES ('optimize')"))
+        conn.execute(text("INSERT INTO comments_fts(comments_fts) VALUES ('optimize')"))
+
+
+def main() -> None:
+    from app.sharding import ticket_engines
+
+    parser = argparse.ArgumentParser(description="Maintain the ticket full-text search index")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    started = time.perf_counter()
+    tickets = comments = 0
+    for bind in ticket_engines():
+        rebuild_search_index(bind)
+        with bind.connect() as conn:
+            tickets += conn.execute(text("SELECT COUNT(*) FROM tickets")).scalar()
+            comments += conn.execute(text("SELECT COUNT(*) FROM comments")).scalar()
+    print(f"indexed {tickets} tickets and {comments} comments in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
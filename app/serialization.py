@@ -0,0 +1,65 @@
+"""Encode ticket/comment rows straight to JSON bytes (`DORM_FAST_JSON`).
+
+The read endpoints normally hand ORM objects to FastAPI, which validates them against `response_model`
+and then serializes the validated copies. With fast JSON enabled they return a raw `Response` built
+here instead: plain dicts in the schema's field order, encoded by pydantic-core, so the bytes match
+the validated output without building a model per row. The route's `response_model` still drives the
+OpenAPI schema.
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+from fastapi import Response
+from pydantic_core import to_json
+
+COMMENT_FIELDS = ("message", "id", "author_role", "created_at")
+TICKET_FIELDS = (
+    "title",
+    "description",
+    "room",
+    "priority",
+    "category_id",
+    "id",
+    "status",
+    "created_at",
+    "updated_at",
+    "comment_count",
+    "last_comment_at",
+)
+SUMMARY_FIELDS = (
+    "id",
+    "title",
+    "room",
+    "priority",
+    "status",
+    "category_id",
+    "created_at",
+    "updated_at",
+    "comment_count",
+)
+
+
+def comment_dict(comment: Any) -> dict:
+    return {name: getattr(comment, name) for name in COMMENT_FIELDS}
+
+
+def ticket_dict(ticket: Any, comments: Iterable[Any]) -> dict:
+    payload = {name: getattr(ticket, name) for name in TICKET_FIELDS}
+    payload["comments"] = [comment_dict(comment) for comment in comments]
+    return payload
+
+
+def summary_dict(summary: dict) -> dict:
+    payload = {name: summary[name] for name in SUMMARY_FIELDS}
+    latest = summary["latest_comment"]
+    payload["latest_comment"] = None if latest is None else {name: latest[name] for name in COMMENT_FIELDS}
+    return payload
+
+
+def json_response(content: Any, response: Response | None = None) -> Response:
+    """JSON body for `content`, carrying over headers already set on the route's injected `response`."""
+    raw = Response(content=to_json(content), media_type="application/json")
+    if response is not None:
+        raw.headers.raw.extend(response.headers.raw)
+    return raw
@@ -0,0 +1,222 @@
+"""Per-building shards of the ticket store (`DORM_SHARDS`).
+
+    DORM_SHARDS=A,B,C DORM_SHARD_URL="sqlite:///./dorm_{building}.db" uvicorn app.main:app
+
+Each listed building gets its own SQLite file with its tickets, their comments, archive, stats and change feed,
+so writes in different buildings stop queueing behind one write lock. `DORM_DATABASE_URL` remains the home
+database: categories are written there and copied to every shard. A ticket id carries its building above
+`SHARD_ID_BITS` (A=1 ... Z=26; 0 is an unsharded database, whose ids are unchanged), so any request about one
+ticket touches exactly one shard. Listings, search, export and stats fan out to all of them.
+"""
+
+import string
+from collections.abc import AsyncGenerator, Iterable
+
+from fastapi import Depends, Request
+from sqlalchemy import Engine, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.category_cache import CATEGORY_VERSION
+from app.config import Settings, settings
+from app.database import create_sqlite_engine, get_db, get_read_db
+from app.errors import AppException
+from app.models import CacheVersion, Category, ShardInfo, Ticket
+from app.schema import bootstrap_schema
+from app.write_queue import GroupCommitQueue, create_write_queue, get_write_queue
+
+BUILDINGS = string.ascii_uppercase
+SHARD_ID_BITS = 40
+
+
+def id_base(building: str) -> int:
+    return (BUILDINGS.index(building) + 1) << SHARD_ID_BITS
+
+
+def building_of_id(ticket_id: int) -> str | None:
+    number = ticket_id >> SHARD_ID_BITS
+    return BUILDINGS[number - 1] if 0 < number <= len(BUILDINGS) else None
+
+
+def building_of_room(room: str) -> str:
+    return room[:1]
+
+
+def _upsert(conn, table, rows: list[dict], key: str) -> None:
+    stmt = insert(table).values(rows)
+    conn.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[key], set_={name: stmt.excluded[name] for name in rows[0] if name != key}
+        )
+    )
+
+
+class ShardSet:
+    """Engines, session factories and (with `DORM_WRITE_BATCHING`) a group-commit queue per building."""
+
+    def __init__(self, buildings: Iterable[str], url_template: str, config: Settings) -> None:
+        self.buildings = tuple(sorted(set(buildings)))
+        self.engines: dict[str, Engine] = {}
+        self.sessions: dict[str, sessionmaker] = {}
+        self.read_sessions: dict[str, sessionmaker] = {}
+        self.write_queues: dict[str, GroupCommitQueue | None] = {}
+        for building in self.buildings:
+            if len(building) != 1 or building not in BUILDINGS:
+                raise ValueError(f"Shard building must be a single letter A-Z, got {building!r}")
+            url = url_template.format(building=building)
+            writer = create_sqlite_engine(url, config)
+            reader = create_sqlite_engine(url, config, read_only=True) if config.sqlite_production else writer
+            self.engines[building] = writer
+            self.sessions[building] = sessionmaker(autocommit=False, autoflush=False, bind=writer)
+            self.read_sessions[building] = sessionmaker(autocommit=False, autoflush=False, bind=reader)
+            self.write_queues[building] = create_write_queue(self.sessions[building], config)
+
+    @classmethod
+    def from_config(cls, config: Settings) -> "ShardSet | None":
+        return cls(config.shards, config.shard_url, config) if config.shards else None
+
+    def open(self) -> None:
+        """Create or upgrade every shard file and stamp it with its building."""
+        for building, bind in self.engines.items():
+            bootstrap_schema(bind)
+            with bind.begin() as conn:
+                owner = conn.scalar(select(ShardInfo.building))
+                if owner is None and conn.scalar(select(func.count()).select_from(Ticket)):
+                    raise RuntimeError(f"{bind.url} already holds unsharded tickets")
+                if owner is None:
+                    conn.execute(insert(ShardInfo).values(building=building, id_base=id_base(building)))
+                elif owner != building:
+                    raise RuntimeError(f"{bind.url} is the shard of building {owner}, not {building}")
+
+    def replicate_categories(self, home: Engine) -> None:
+        """Copy the home database's categories, and their cache version, to every shard."""
+        with home.connect() as conn:
+            categories = [dict(row._mapping) for row in conn.execute(select(Category.__table__))]
+            versions = [
+                dict(row._mapping)
+                for row in conn.execute(select(CacheVersion.__table__).where(CacheVersion.name == CATEGORY_VERSION))
+            ]
+        for bind in self.engines.values():
+            with bind.begin() as conn:
+                # Categories are only ever deactivated, so an upsert of every row is a full copy.
+                if categories:
+                    _upsert(conn, Category.__table__, categories, "id")
+                if versions:
+                    _upsert(conn, CacheVersion.__table__, versions, "name")
+
+    def close(self) -> None:
+        for write_queue in self.write_queues.values():
+            if write_queue is not None:
+                write_queue.close()
+        for bind in self.engines.values():
+            bind.dispose()
+
+
+class ShardSessions:
+    """The sessions of one request: the home session, plus a session per shard it touches, opened on first use.
+
+    Without shards every lookup returns the home session, so handlers need no unsharded special case.
+    """
+
+    def __init__(
+        self,
+        home: Session,
+        write_queue: GroupCommitQueue | None,
+        shards: ShardSet | None,
+        read_only: bool = False,
+    ) -> None:
+        self.home = home
+        self._write_queue = write_queue
+        self._shards = shards
+        self._read_only = read_only
+        self._open: dict[str, Session] = {}
+
+    @property
+    def sharded(self) -> bool:
+        return self._shards is not None
+
+    @property
+    def buildings(self) -> tuple[str, ...]:
+        return () if self._shards is None else self._shards.buildings
+
+    def session(self, building: str | None) -> Session | None:
+        if self._shards is None:
+            return self.home
+        if building not in self._shards.engines:
+            return None
+        if building not in self._open:
+            factories = self._shards.read_sessions if self._read_only else self._shards.sessions
+            self._open[building] = factories[building]()
+        return self._open[building]
+
+    def for_ticket(self, ticket_id: int) -> Session:
+        db = self.session(building_of_id(ticket_id))
+        if db is None:
+            raise AppException(status_code=404, code="NOT_FOUND", message="Ticket not found")
+        return db
+
+    def for_room(self, room: str) -> Session:
+        db = self.session(building_of_room(room))
+        if db is None:
+            raise AppException(
+                status_code=400,
+                code="VALIDATION_ERROR",
+                message="Invalid room",
+                details=[{"field": "room", "message": f"No shard for building {building_of_room(room)}"}],
+            )
+        return db
+
+    def all(self) -> list[Session]:
+        if self._shards is None:
+            return [self.home]
+        return [self.session(building) for building in self._shards.buildings]
+
+    def write_queue(self, db: Session) -> GroupCommitQueue | None:
+        if self._shards is None:
+            return self._write_queue
+        building = next(building for building, session in self._open.items() if session is db)
+        return self._shards.write_queues[building]
+
+    def close(self) -> None:
+        for db in self._open.values():
+            db.close()
+        self._open.clear()
+
+
+def ticket_engines(config: Settings = settings) -> list[Engine]:
+    """Every database that holds tickets, for the command-line tools: the home database and each shard."""
+    home = create_sqlite_engine(config.database_url, config)
+    shards = ShardSet.from_config(config)
+    return [home] if shards is None else [home, *shards.engines.values()]
+
+
+# async, like get_write_queue: reading app state needs no thread pool round-trip.
+async def get_shard_set(request: Request) -> ShardSet | None:
+    return request.app.state.shard_set
+
+
+def replicate_categories(db: Session, shards: ShardSet | None) -> None:
+    if shards is not None:
+        shards.replicate_categories(db.get_bind())
+
+
+async def get_shards(
+    db: Session = Depends(get_db),
+    write_queue: GroupCommitQueue | None = Depends(get_write_queue),
+    shard_set: ShardSet | None = Depends(get_shard_set),
+) -> AsyncGenerator[ShardSessions, None]:
+    shards = ShardSessions(db, write_queue, shard_set)
+    try:
+        yield shards
+    finally:
+        shards.close()
+
+
+async def get_read_shards(
+    db: Session = Depends(get_read_db), shard_set: ShardSet | None = Depends(get_shard_set)
+) -> AsyncGenerator[ShardSessions, None]:
+    shards = ShardSessions(db, None, shard_set, read_only=True)
+    try:
+        yield shards
+    finally:
+        shards.close()
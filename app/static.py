@@ -0,0 +1,35 @@
+"""Static files served from memory: read and gzipped once per worker, revalidated with an ETag."""
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import Request, Response
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    body: bytes
+    gzipped: bytes
+    etag: str
+    media_type: str
+
+    @classmethod
+    def load(cls, path: Path, media_type: str) -> "StaticAsset":
+        body = path.read_bytes()
+        # mtime=0 keeps the compressed bytes identical across workers and restarts.
+        gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        return cls(body, gzipped, f'"{hashlib.sha256(body).hexdigest()[:32]}"', media_type)
+
+    def response(self, request: Request) -> Response:
+        # no-cache: browsers revalidate on every load and get an empty 304 until the file changes.
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if self.etag in tags or "*" in tags:
+                return Response(status_code=304, headers=headers)
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            return Response(self.gzipped, media_type=self.media_type, headers={**headers, "Content-Encoding": "gzip"})
+        return Response(self.body, media_type=self.media_type, headers=headers)
@@ -0,0 +1,138 @@
+"""Ticket counters by status, priority, category and building, maintained incrementally by triggers.
+
+Every insert/update/delete on `tickets` adjusts `ticket_stats` in the same transaction, so reading the
+stats costs one row per bucket. Archived tickets stay counted: `app.archive` moves them with the delete
+trigger dropped. Run `python -m app.stats reconcile` to rebuild the counters and report drift.
+"""
+
+import argparse
+from dataclasses import dataclass
+
+from sqlalchemy import DDL, Connection, Engine, event, text
+
+from app.models import Ticket
+
+# dimension -> SQL expression over the trigger row ("new"/"old") or the tickets table.
+DIMENSIONS = {
+    "status": "{row}.status",
+    "priority": "{row}.priority",
+    "category": "CAST({row}.category_id AS TEXT)",
+    "building": "substr({row}.room, 1, 1)",
+}
+DIMENSION_COLUMNS = {"status": "status", "priority": "priority", "category": "category_id", "building": "room"}
+
+_UPSERT = (
+    "INSERT INTO ticket_stats(dimension, bucket, count) VALUES {values} "
+    "ON CONFLICT(dimension, bucket) DO UPDATE SET count = count + excluded.count;"
+)
+
+
+def _values(row: str, delta: int, dimensions: list[str]) -> str:
+    return ", ".join(f"('{name}', {DIMENSIONS[name].format(row=row)}, {delta})" for name in dimensions)
+
+
+STATS_DDL = [
+    "CREATE TABLE IF NOT EXISTS ticket_stats ("
+    "dimension VARCHAR(20) NOT NULL, bucket VARCHAR(50) NOT NULL, count INTEGER NOT NULL DEFAULT 0, "
+    "PRIMARY KEY (dimension, bucket)) WITHOUT ROWID",
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_stats_ai AFTER INSERT ON tickets BEGIN
+        {_UPSERT.format(values=_values("new", 1, list(DIMENSIONS)))}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_stats_ad AFTER DELETE ON tickets BEGIN
+        {_UPSERT.format(values=_values("old", -1, list(DIMENSIONS)))}
+    END""",
+] + [
+    # One trigger per dimension so an update only touches the buckets whose value actually changed.
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_stats_au_{name} AFTER UPDATE OF {DIMENSION_COLUMNS[name]} ON tickets
+    WHEN {DIMENSIONS[name].format(row="old")} IS NOT {DIMENSIONS[name].format(row="new")} BEGIN
+        {_UPSERT.format(values=_values("old", -1, [name]) + ", " + _values("new", 1, [name]))}
+    END"""
+    for name in DIMENSIONS
+]
+
+
+def recount_sql(where: str = "", source: str = "tickets") -> str:
+    """(dimension, bucket, count) rows for the tickets in `source` matching `where`."""
+    return " UNION ALL ".join(
+        f"SELECT '{name}', {expression.format(row='tickets')}, COUNT(*) FROM {source} {where} GROUP BY 2"
+        for name, expression in DIMENSIONS.items()
+    )
+
+
+_COUNTED = "status, priority, category_id, room"
+RECOUNT_SQL = recount_sql(
+    source=f"(SELECT {_COUNTED} FROM tickets UNION ALL SELECT {_COUNTED} FROM archived_tickets) AS tickets"
+)
+
+for _statement in STATS_DDL:
+    event.listen(Ticket.__table__, "after_create", DDL(_statement))
+event.listen(Ticket.__table__, "before_drop", DDL("DROP TABLE IF EXISTS ticket_stats"))
+
+
+@dataclass(frozen=True)
+class Drift:
+    dimension: str
+    bucket: str
+    stored: int
+    actual: int
+
+
+def read_stats(conn: Connection) -> dict[str, dict[str, int]]:
+    stats: dict[str, dict[str, int]] = {name: {} for name in DIMENSIONS}
+    for dimension, bucket, count in conn.execute(
+        text("SELECT dimension, bucket, count FROM ticket_stats WHERE count != 0 ORDER BY dimension, bucket")
+    ):
+        stats.setdefault(dimension, {})[bucket] = count
+    return stats
+
+
+def _reconcile(conn: Connection) -> list[Drift]:
+    stored = {(d, b): c for d, b, c in conn.execute(text("SELECT dimension, bucket, count FROM ticket_stats"))}
+    actual = {(d, b): c for d, b, c in conn.execute(text(RECOUNT_SQL))}
+    drift = [
+        Drift(dimension, bucket, stored.get((dimension, bucket), 0), actual.get((dimension, bucket), 0))
+        for dimension, bucket in sorted(stored.keys() | actual.keys())
+        if stored.get((dimension, bucket), 0) != actual.get((dimension, bucket), 0)
+    ]
+    conn.execute(text("DELETE FROM ticket_stats"))
+    conn.execute(text(f"INSERT INTO ticket_stats(dimension, bucket, count) {RECOUNT_SQL}"))
+    return drift
+
+
+def reconcile_stats(bind: Engine) -> list[Drift]:
+    """Recount every bucket from `tickets`, replace the counters and return the buckets that had drifted."""
+    with bind.begin() as conn:
+        # Hold the write lock from the first read so no ticket write lands between the recount and the replace.
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        for statement in STATS_DDL:
+            conn.execute(text(statement))
+        return _reconcile(conn)
+
+
+def ensure_ticket_stats(bind: Engine) -> bool:
+    """Create missing counters/triggers; count existing tickets when the table was just created."""
+    with bind.begin() as conn:
+        existing = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'ticket_stats'")).first()
+        for statement in STATS_DDL:
+            conn.execute(text(statement))
+        if existing is None:
+            _reconcile(conn)
+            return True
+    return False
+
+
+def main() -> None:
+    from app.sharding import ticket_engines
+
+    parser = argparse.ArgumentParser(description="Maintain the incremental ticket statistics")
+    parser.add_argument("command", choices=["reconcile"])
+    parser.parse_args()
+
+    drift = [item for bind in ticket_engines() for item in reconcile_stats(bind)]
+    for item in drift:
+        print(f"{item.dimension}={item.bucket}: stored {item.stored}, actual {item.actual}")
+    print(f"reconciled ticket stats, {len(drift)} bucket(s) drifted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import TypeVar
+
+from fastapi import Request
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import Settings
+
+T = TypeVar("T")
+
+WriteWork = Callable[[Session], T]
+
+
+class GroupCommitQueue:
+    """Runs submitted write functions on one background thread, committing each batch in one transaction.
+
+    Every item runs inside its own savepoint, so an item that raises is rolled back and gets its own
+    exception while the rest of the batch still commits.
+    """
+
+    def __init__(self, session_factory: sessionmaker, max_items: int = 64, max_delay: float = 0.005):
+        self.session_factory = session_factory
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self._items: queue.Queue[tuple[WriteWork, Future] | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, work: WriteWork[T]) -> T:
+        self._ensure_started()
+        future: Future = Future()
+        self._items.put((work, future))
+        return future.result()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                return
+            self._items.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+                self._thread.start()
+
+    def _collect(self, first: tuple[WriteWork, Future]) -> tuple[list[tuple[WriteWork, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_items:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._items.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            first = self._items.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch: list[tuple[WriteWork, Future]]) -> None:
+        results: list[tuple[Future, object]] = []
+        db = self.session_factory()
+        try:
+            # pysqlite only opens a transaction before DML; without an explicit BEGIN the first
+            # savepoint would become the outer transaction and its RELEASE would commit on its own.
+            db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+            for work, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                savepoint = db.begin_nested()
+                try:
+                    result = work(db)
+                    savepoint.commit()
+                except Exception as exc:
+                    savepoint.rollback()
+                    future.set_exception(exc)
+                else:
+                    results.append((future, result))
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            for future, _ in results:
+                future.set_exception(exc)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            db.close()
+
+        for future, result in results:
+            future.set_result(result)
+
+
+def create_write_queue(session_factory: sessionmaker, config: Settings) -> GroupCommitQueue | None:
+    """The group-commit queue for one database, or None unless `DORM_WRITE_BATCHING` is on."""
+    if not config.write_batching:
+        return None
+    return GroupCommitQueue(
+        session_factory,
+        max_items=config.write_batch_max_items,
+        max_delay=config.write_batch_max_delay_ms / 1000,
+    )
+
+
+async def get_write_queue(request: Request) -> GroupCommitQueue | None:
+    return request.app.state.write_queue
+
+
+def run_write(work: WriteWork[T], db: Session, write_queue: GroupCommitQueue | None) -> T:
+    if write_queue is None:
+        result = work(db)
+        db.commit()
+        return result
+    return write_queue.submit(work)
@@ -0,0 +1,99 @@
+"""Technician latency under a student read burst, without and with admission control (`DORM_ADMISSION_CONTROL`).
+
+    python -m benchmarks.admission --tickets 100000 --students 64 --technicians 4 --seconds 10
+
+Students page through large listings as fast as they can; technicians claim tickets (a status change).
+Both runs use the production SQLite setup. With admission control the students, who all come from one
+address here, share one token bucket, and queued technician requests are admitted before student reads.
+"""
+
+import argparse
+import asyncio
+import shutil
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.concurrency import Tally, _free_port, _start_server
+from benchmarks.seed import seed_database
+
+
+async def _loop(client: httpx.AsyncClient, deadline: float, tally: Tally, request) -> None:
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+        started = time.perf_counter()
+        try:
+            resp = await request(client, n)
+            status_code = resp.status_code
+        except httpx.TransportError:
+            status_code = 599
+        tally.record(status_code, time.perf_counter() - started)
+        if status_code in (429, 503):
+            # What a well-behaved client does with Retry-After, without sleeping the whole second.
+            await asyncio.sleep(0.05)
+
+
+def _scan(client: httpx.AsyncClient, n: int):
+    params = {"sort_by": "updated_at", "limit": 100, "skip": n % 50 * 100}
+    return client.get("/tickets", params=params, headers={"X-Role": "student"})
+
+
+def _claim(client: httpx.AsyncClient, n: int):
+    return client.post("/tickets/claim", headers={"X-Role": "technician"})
+
+
+async def _drive(base_url: str, args: argparse.Namespace) -> dict[str, Tally]:
+    tallies = {"students": Tally(), "technicians": Tally()}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        deadline = time.perf_counter() + args.seconds
+        await asyncio.gather(
+            *(_loop(client, deadline, tallies["students"], _scan) for _ in range(args.students)),
+            *(_loop(client, deadline, tallies["technicians"], _claim) for _ in range(args.technicians)),
+        )
+    return tallies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--students", type=int, default=64)
+    parser.add_argument("--technicians", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--student-rps", type=int, default=20)
+    parser.add_argument("--db", type=Path, default=Path("bench_admission.db"))
+    args = parser.parse_args()
+
+    seed_database(args.db, args.tickets)
+    runs = (
+        ("no admission control", {"DORM_ADMISSION_CONTROL": "0"}),
+        (
+            "admission control",
+            {
+                "DORM_ADMISSION_CONTROL": "1",
+                "DORM_RATE_LIMIT_STUDENT_RPS": str(args.student_rps),
+                "DORM_RATE_LIMIT_STUDENT_BURST": str(args.student_rps),
+            },
+        ),
+    )
+    for name, extra_env in runs:
+        path = args.db.with_name(f"{args.db.stem}_run.db")
+        for sidecar in ("-wal", "-shm"):
+            Path(f"{path}{sidecar}").unlink(missing_ok=True)
+        shutil.copyfile(args.db, path)
+        port = _free_port()
+        server = _start_server(path, True, port, extra_env)
+        try:
+            tallies = asyncio.run(_drive(f"http://127.0.0.1:{port}", args))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"[{name}]")
+        for kind, tally in tallies.items():
+            print(f"  {kind:<12}{tally.summary(args.seconds)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Latency at high concurrency: sync handlers on the shared threadpool against DORM_ASYNC_HANDLERS lanes.
+
+    python -m benchmarks.async_lanes --tickets 100000 --writers 64 --scans 16 --probes 8 --seconds 10
+
+Writers add comments as fast as they can, scans page through large full listings, and probes make the
+requests a dashboard would (a single ticket and the healthcheck). Both modes run the production SQLite
+setup (WAL, one writer connection), so reads never wait for SQLite's write lock; only for worker threads.
+"""
+
+import argparse
+import asyncio
+import shutil
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.concurrency import Tally, _free_port, _start_server
+from benchmarks.seed import seed_database
+
+
+async def _loop(client: httpx.AsyncClient, deadline: float, tally: Tally, request) -> None:
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+        started = time.perf_counter()
+        try:
+            resp = await request(client, n)
+            status_code = resp.status_code
+        except httpx.TransportError:
+            status_code = 599
+        tally.record(status_code, time.perf_counter() - started)
+
+
+def _writer(tickets: int, worker: int):
+    def request(client: httpx.AsyncClient, n: int):
+        return client.post(
+            f"/tickets/{(worker * 7919 + n * 104729) % tickets + 1}/comments",
+            headers={"X-Role": "student"},
+            json={"message": f"Benchmark comment {n}"},
+        )
+
+    return request
+
+
+def _scan(client: httpx.AsyncClient, n: int):
+    return client.get("/tickets", params={"sort_by": "updated_at", "limit": 100, "skip": n % 50 * 100})
+
+
+def _probe(tickets: int):
+    def request(client: httpx.AsyncClient, n: int):
+        if n % 2:
+            return client.get("/")
+        return client.get(f"/tickets/{n * 7919 % tickets + 1}", params={"comment_limit": 5})
+
+    return request
+
+
+async def _drive(base_url: str, args: argparse.Namespace) -> dict[str, Tally]:
+    tallies = {"writes": Tally(), "scans": Tally(), "probes": Tally()}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        deadline = time.perf_counter() + args.seconds
+        await asyncio.gather(
+            *(_loop(client, deadline, tallies["writes"], _writer(args.tickets, i)) for i in range(args.writers)),
+            *(_loop(client, deadline, tallies["scans"], _scan) for _ in range(args.scans)),
+            *(_loop(client, deadline, tallies["probes"], _probe(args.tickets)) for _ in range(args.probes)),
+        )
+    return tallies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--writers", type=int, default=64)
+    parser.add_argument("--scans", type=int, default=16)
+    parser.add_argument("--probes", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--db", type=Path, default=Path("bench_async_lanes.db"))
+    args = parser.parse_args()
+
+    seed_database(args.db, args.tickets, max_comments=5)
+    for name, async_handlers in (("threadpool", "0"), ("async lanes", "1")):
+        path = args.db.with_name(f"{args.db.stem}_run.db")
+        for sidecar in ("-wal", "-shm"):
+            Path(f"{path}{sidecar}").unlink(missing_ok=True)
+        shutil.copyfile(args.db, path)
+        port = _free_port()
+        server = _start_server(path, True, port, {"DORM_ASYNC_HANDLERS": async_handlers})
+        try:
+            tallies = asyncio.run(_drive(f"http://127.0.0.1:{port}", args))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"[{name}]")
+        for kind, tally in tallies.items():
+            print(f"  {kind:<7}{tally.summary(args.seconds)}")
+
+
+if __name__ == "__main__":
+    main()
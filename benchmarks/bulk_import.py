@@ -0,0 +1,81 @@
+"""`python -m app.bulk_import` against one POST /tickets per row, both into a WAL-mode database.
+
+    python -m benchmarks.bulk_import --tickets 1000000
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.bulk_import import run_import
+from benchmarks.seed import _comment_rows, _ticket_rows, bench_client, seed_database
+
+TICKET_FIELDS = ("id", "title", "description", "room", "priority", "status", "category_id", "created_at", "updated_at")
+
+
+def write_input(path: Path, tickets: int, max_comments: int) -> int:
+    start = datetime(2025, 1, 1)
+    lines = 0
+    with path.open("w", encoding="utf-8") as out:
+        for row in _ticket_rows(tickets, random.Random(1), start):
+            out.write(json.dumps({"type": "ticket", **dict(zip(TICKET_FIELDS, row))}) + "\n")
+            lines += 1
+        for ticket_id, message, role, created_at in _comment_rows(tickets, max_comments, random.Random(2), start):
+            record = {"type": "comment", "ticket_id": ticket_id, "message": message, "author_role": role}
+            out.write(json.dumps({**record, "created_at": created_at}) + "\n")
+            lines += 1
+    return lines
+
+
+def _empty_wal_database(path: Path) -> None:
+    seed_database(path, 0)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--comments", type=int, default=3, help="max comments per ticket")
+    parser.add_argument("--api-tickets", type=int, default=2_000, help="tickets to time through POST /tickets")
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    parser.add_argument("--db", type=Path, default=Path("bench_import.db"))
+    args = parser.parse_args()
+
+    source = args.db.with_suffix(".ndjson")
+    lines = write_input(source, args.tickets, args.comments)
+    print(f"wrote {lines} records to {source}")
+
+    _empty_wal_database(args.db)
+    started = time.perf_counter()
+    with source.open(encoding="utf-8") as stream:
+        importer = run_import(f"sqlite:///{args.db}", stream, "ndjson", batch_size=args.batch_size)
+    elapsed = time.perf_counter() - started
+    tickets, comments = importer.counts["ticket"], importer.counts["comment"]
+    print(
+        f"bulk import     {tickets:>9} tickets {comments:>9} comments {elapsed:>6.1f}s "
+        f"{tickets / elapsed:>8.0f} tickets/s {(tickets + comments) / elapsed:>8.0f} rows/s "
+        f"rejected={importer.rejected}"
+    )
+
+    _empty_wal_database(args.db)
+    with source.open(encoding="utf-8") as stream, bench_client(args.db) as client:
+        payloads = [json.loads(next(stream)) for _ in range(args.api_tickets)]
+        fields = ("title", "description", "room", "priority", "category_id")
+        started = time.perf_counter()
+        for payload in payloads:
+            client.post("/tickets", json={key: payload[key] for key in fields})
+        elapsed = time.perf_counter() - started
+    print(
+        f"POST /tickets   {args.api_tickets:>9} tickets {'':>18} {elapsed:>6.1f}s "
+        f"{args.api_tickets / elapsed:>8.0f} tickets/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
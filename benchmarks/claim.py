@@ -0,0 +1,129 @@
+"""N technicians pulling work at once: POST /tickets/claim against "list the top open ticket, then claim it".
+
+    python -m benchmarks.claim --technicians 50 --seconds 10
+
+Every claimed id must be unique. The read-then-write baseline is what clients had to do before the claim
+endpoint: two technicians that read the same top ticket race for it, and the loser retries.
+"""
+
+import argparse
+import shutil
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+from benchmarks.concurrency import Tally, _free_port, _start_server
+from benchmarks.seed import seed_database
+
+TECHNICIAN = {"X-Role": "technician"}
+
+
+@dataclass
+class Claims:
+    tally: Tally = field(default_factory=Tally)
+    ids: list[int] = field(default_factory=list)
+    retries: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def claimed(self, ticket_id: int, elapsed: float) -> None:
+        self.tally.record(200, elapsed)
+        with self.lock:
+            self.ids.append(ticket_id)
+
+    def retried(self) -> None:
+        with self.lock:
+            self.retries += 1
+
+
+def _claim_endpoint(client: httpx.Client, claims: Claims) -> bool:
+    started = time.perf_counter()
+    resp = client.post("/tickets/claim", headers=TECHNICIAN, params={"comment_limit": 0})
+    if resp.status_code == 404:
+        return False
+    if resp.status_code == 200:
+        claims.claimed(resp.json()["id"], time.perf_counter() - started)
+    else:
+        claims.tally.record(resp.status_code, time.perf_counter() - started)
+    return True
+
+
+def _read_then_write(client: httpx.Client, claims: Claims) -> bool:
+    started = time.perf_counter()
+    while True:
+        top = client.get("/tickets", params={"status": "open", "sort_by": "priority", "limit": 1, "view": "summary"})
+        if top.status_code != 200 or not top.json():
+            return False
+        ticket_id = top.json()[0]["id"]
+        resp = client.put(
+            f"/tickets/{ticket_id}/status",
+            headers=TECHNICIAN,
+            params={"comment_limit": 0},
+            json={"status": "in_progress"},
+        )
+        if resp.status_code == 409:  # someone else got it first
+            claims.retried()
+            continue
+        if resp.status_code == 200:
+            claims.claimed(ticket_id, time.perf_counter() - started)
+        else:
+            claims.tally.record(resp.status_code, time.perf_counter() - started)
+        return True
+
+
+def _technician(base_url: str, strategy, deadline: float, claims: Claims) -> None:
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        while time.perf_counter() < deadline and strategy(client, claims):
+            pass
+
+
+def run(path: Path, production: bool, strategy, args: argparse.Namespace) -> tuple[Claims, float]:
+    port = _free_port()
+    server = _start_server(path, production, port)
+    try:
+        claims = Claims()
+        started = time.perf_counter()
+        deadline = started + args.seconds
+        workers = [
+            threading.Thread(target=_technician, args=(f"http://127.0.0.1:{port}", strategy, deadline, claims))
+            for _ in range(args.technicians)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return claims, time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--technicians", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--db", type=Path, default=Path("bench_claim.db"))
+    args = parser.parse_args()
+
+    seed_database(args.db, args.tickets)
+    strategies = (("POST /tickets/claim", _claim_endpoint), ("read then PUT status", _read_then_write))
+    for mode, production in (("default", False), ("production", True)):
+        for name, strategy in strategies:
+            path = args.db.with_name(f"{args.db.stem}_run.db")
+            # A WAL left behind by the previous (killed) server would be replayed onto the fresh copy.
+            for sidecar in ("-wal", "-shm"):
+                Path(f"{path}{sidecar}").unlink(missing_ok=True)
+            shutil.copyfile(args.db, path)
+            claims, elapsed = run(path, production, strategy, args)
+            duplicates = sum(count - 1 for count in Counter(claims.ids).values() if count > 1)
+            print(f"[{mode}] {name}")
+            print(f"  {claims.tally.summary(elapsed)}")
+            print(f"  duplicate claims={duplicates} retries={claims.retries}")
+
+
+if __name__ == "__main__":
+    main()
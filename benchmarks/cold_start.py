@@ -0,0 +1,99 @@
+"""Worker cold start: time from spawning uvicorn to its first answer, against DORM_COLD_START_BUDGET_MS.
+
+    python -m benchmarks.cold_start --tickets 100000 --runs 5
+
+Three databases: a new file (full schema creation), a populated file without a schema stamp (what every
+boot cost before the version check) and the same file stamped. The server's own breakdown comes from
+`dorm_worker_boot_seconds`. Exits with status 1 when the stamped median is over the budget.
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from app.config import settings
+from benchmarks.concurrency import _free_port
+from benchmarks.seed import seed_database
+
+
+def _boot(path: Path) -> tuple[float, dict[str, float]]:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "DORM_DATABASE_URL": f"sqlite:///{path.resolve()}"}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "error"], env=env
+    )
+    try:
+        # A bare connect per poll: building an HTTP client each time would steal CPU from the booting worker.
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError("benchmark server exited during start-up")
+                time.sleep(0.005)
+        httpx.get(base_url + "/").raise_for_status()
+        elapsed = time.perf_counter() - started
+        phases = {}
+        for line in httpx.get(base_url + "/metrics").text.splitlines():
+            if line.startswith("dorm_worker_boot_seconds{"):
+                phases[line.split('"')[1]] = float(line.rsplit(" ", 1)[1])
+        return elapsed, phases
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _unstamp(path: Path) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA user_version = 0")
+    conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=int, default=settings.cold_start_budget_ms)
+    parser.add_argument("--db", type=Path, default=Path("bench_cold_start.db"))
+    args = parser.parse_args()
+
+    seed_database(args.db, args.tickets, max_comments=3)
+    run_path = args.db.with_name(f"{args.db.stem}_run.db")
+    cases = (
+        ("new database", lambda: run_path.unlink(missing_ok=True)),
+        ("unstamped database", lambda: (shutil.copyfile(args.db, run_path), _unstamp(run_path))),
+        ("stamped database", lambda: shutil.copyfile(args.db, run_path)),
+    )
+    medians = {}
+    for name, prepare in cases:
+        timings = []
+        phases: dict[str, list[float]] = {}
+        for _ in range(args.runs):
+            prepare()
+            elapsed, boot = _boot(run_path)
+            timings.append(elapsed)
+            for phase, seconds in boot.items():
+                phases.setdefault(phase, []).append(seconds)
+        medians[name] = statistics.median(timings) * 1000
+        breakdown = " ".join(f"{phase}={statistics.median(values) * 1000:.0f}ms" for phase, values in phases.items())
+        print(f"[{name}] first response median={medians[name]:.0f}ms max={max(timings) * 1000:.0f}ms ({breakdown})")
+
+    within = medians["stamped database"] <= args.budget_ms
+    print(f"budget {args.budget_ms}ms: {'ok' if within else 'exceeded'}")
+    sys.exit(0 if within else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""N readers + M writers against the default SQLite setup and the production (WAL, split pool) mode.
+
+    python -m benchmarks.concurrency --readers 16 --writers 4 --seconds 10
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+from benchmarks.seed import seed_database
+
+
+@dataclass
+class Tally:
+    latencies: list[float] = field(default_factory=list)
+    errors: dict[int, int] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(self, status_code: int, elapsed: float) -> None:
+        with self.lock:
+            if status_code < 400:
+                self.latencies.append(elapsed)
+            else:
+                self.errors[status_code] = self.errors.get(status_code, 0) + 1
+
+    def summary(self, seconds: float) -> str:
+        if not self.latencies:
+            return f"ok=0 errors={self.errors}"
+        ordered = sorted(self.latencies)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        return (
+            f"ok={len(ordered):>6} rps={len(ordered) / seconds:>8.1f} "
+            f"p50={statistics.median(ordered) * 1000:>7.2f}ms p99={p99 * 1000:>8.2f}ms errors={self.errors}"
+        )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _reader(base_url: str, tickets: int, deadline: float, tally: Tally, worker: int) -> None:
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        n = worker
+        while time.perf_counter() < deadline:
+            n += 1
+            started = time.perf_counter()
+            if n % 2:
+                resp = client.get("/tickets", params={"status": "open", "limit": 20})
+            else:
+                resp = client.get(f"/tickets/{n * 7919 % tickets + 1}", params={"comment_limit": 5})
+            tally.record(resp.status_code, time.perf_counter() - started)
+
+
+def _writer(base_url: str, tickets: int, deadline: float, tally: Tally, worker: int) -> None:
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        n = worker
+        while time.perf_counter() < deadline:
+            n += 1
+            started = time.perf_counter()
+            if n % 2:
+                resp = client.post(
+                    f"/tickets/{n * 104729 % tickets + 1}/comments",
+                    headers={"X-Role": "student"},
+                    json={"message": f"Benchmark comment {n}"},
+                )
+            else:
+                resp = client.post(
+                    "/tickets",
+                    json={
+                        "title": f"Benchmark ticket {n}",
+                        "description": "Created by the concurrency benchmark.",
+                        "room": "B-0420",
+                        "priority": "medium",
+                        "category_id": 1,
+                    },
+                )
+            tally.record(resp.status_code, time.perf_counter() - started)
+
+
+def _start_server(path: Path, production: bool, port: int, extra_env: dict[str, str] | None = None) -> subprocess.Popen:
+    # A separate process keeps the load generator from competing with the server for the GIL.
+    env = {
+        **os.environ,
+        "DORM_DATABASE_URL": f"sqlite:///{path.resolve()}",
+        "DORM_SQLITE_PRODUCTION": "1" if production else "0",
+        **(extra_env or {}),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "error"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            httpx.get(base_url + "/", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("benchmark server did not start")
+
+
+def run_mode(name: str, path: Path, production: bool, args: argparse.Namespace) -> None:
+    port = _free_port()
+    server = _start_server(path, production, port)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        reads, writes = Tally(), Tally()
+        deadline = time.perf_counter() + args.seconds
+        workers = [
+            threading.Thread(target=_reader, args=(base_url, args.tickets, deadline, reads, i))
+            for i in range(args.readers)
+        ] + [
+            threading.Thread(target=_writer, args=(base_url, args.tickets, deadline, writes, i))
+            for i in range(args.writers)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"[{name}]")
+    print(f"  reads  {reads.summary(args.seconds)}")
+    print(f"  writes {writes.summary(args.seconds)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--db", type=Path, default=Path("bench_concurrency.db"))
+    args = parser.parse_args()
+
+    seed_database(args.db, args.tickets, max_comments=20)
+    for name, production in (("default", False), ("production", True)):
+        path = args.db.with_name(f"{args.db.stem}_{name}.db")
+        shutil.copyfile(args.db, path)
+        run_mode(name, path, production, args)
+
+
+if __name__ == "__main__":
+    main()
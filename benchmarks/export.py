@@ -0,0 +1,106 @@
+"""Streaming export vs paging through GET /tickets, measuring throughput and server peak memory.
+
+    python -m benchmarks.export --tickets 1000000
+"""
+
+import argparse
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.concurrency import _free_port, _start_server
+from benchmarks.seed import seed_database
+
+
+def _anon_rss_mib(pid: int) -> float:
+    # Anonymous memory only: the production engine mmaps the database file, which VmRSS would count.
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("RssAnon:"):
+            return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+class PeakSampler(threading.Thread):
+    def __init__(self, pid: int) -> None:
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak = 0.0
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(0.05):
+            self.peak = max(self.peak, _anon_rss_mib(self.pid))
+
+    def stop(self) -> float:
+        self.stopped.set()
+        self.join()
+        return self.peak
+
+
+def _export(client: httpx.Client, export_format: str, include_comments: bool) -> tuple[int, int]:
+    rows = size = 0
+    params = {"format": export_format, "include_comments": include_comments}
+    with client.stream("GET", "/tickets/export", params=params) as resp:
+        for chunk in resp.iter_bytes():
+            rows += chunk.count(b"\n")
+            size += len(chunk)
+    return rows, size
+
+
+def _paginate(client: httpx.Client, pages: int) -> int:
+    rows = 0
+    params = {"sort_by": "id", "sort_order": "asc", "limit": 100}
+    for _ in range(pages):
+        resp = client.get("/tickets", params=params)
+        rows += len(resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["cursor"] = cursor
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--comments", type=int, default=3, help="max comments per ticket")
+    parser.add_argument("--pages", type=int, default=200, help="list pages to time for the paging baseline")
+    parser.add_argument("--db", type=Path, default=Path("bench_export.db"))
+    args = parser.parse_args()
+
+    seed_database(args.db, args.tickets, max_comments=args.comments)
+    port = _free_port()
+    server = _start_server(args.db, True, port)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+            print(f"server idle anon RSS {_anon_rss_mib(server.pid):.1f} MiB")
+            for export_format in ("ndjson", "csv"):
+                for include_comments in (False, True):
+                    sampler = PeakSampler(server.pid)
+                    sampler.start()
+                    started = time.perf_counter()
+                    rows, size = _export(client, export_format, include_comments)
+                    elapsed = time.perf_counter() - started
+                    peak = sampler.stop()
+                    print(
+                        f"export {export_format:<6} comments={include_comments!s:<5} {rows:>9} lines "
+                        f"{size / 2**20:>8.1f} MiB {elapsed:>6.1f}s {rows / elapsed:>9.0f} lines/s "
+                        f"peak anon RSS {peak:.1f} MiB"
+                    )
+
+            started = time.perf_counter()
+            rows = _paginate(client, args.pages)
+            elapsed = time.perf_counter() - started
+            print(
+                f"paging limit=100   {rows:>9} rows {elapsed:>6.1f}s {rows / elapsed:>9.0f} rows/s "
+                f"(~{args.tickets / (rows / elapsed):.0f}s for every ticket)"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
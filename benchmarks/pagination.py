@@ -0,0 +1,70 @@
+"""Page 1 vs. deep-page latency of GET /tickets with offset and cursor pagination.
+
+    python -m benchmarks.pagination --tickets 1000000 --page 1000
+"""
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from benchmarks.seed import bench_client, seed_database
+
+
+def _timed_get(client: TestClient, params: dict, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        resp = client.get("/tickets", params=params)
+        samples.append(time.perf_counter() - started)
+        assert resp.status_code == 200, resp.text
+    return statistics.median(samples) * 1000
+
+
+def _cursor_for_page(client: TestClient, params: dict, page: int) -> str | None:
+    cursor = None
+    for _ in range(page - 1):
+        resp = client.get("/tickets", params={**params, **({"cursor": cursor} if cursor else {})})
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    return cursor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", type=Path, default=Path("bench_pagination.db"))
+    parser.add_argument("--reuse", action="store_true", help="reuse an already seeded --db file")
+    args = parser.parse_args()
+
+    if not args.reuse or not args.db.exists():
+        started = time.perf_counter()
+        seed_database(args.db, args.tickets)
+        print(f"seeded {args.tickets} tickets in {time.perf_counter() - started:.1f}s")
+
+    scenarios = {
+        "created_at desc": {"sort_by": "created_at", "sort_order": "desc"},
+        "status=open, created_at desc": {"status": "open", "sort_by": "created_at", "sort_order": "desc"},
+        "category_id=3, created_at asc": {"category_id": 3, "sort_by": "created_at", "sort_order": "asc"},
+        "updated_at desc": {"sort_by": "updated_at", "sort_order": "desc"},
+    }
+
+    with bench_client(args.db) as client:
+        print(f"{'scenario':32} {'page 1':>10} {'offset p' + str(args.page):>14} {'cursor p' + str(args.page):>14}")
+        for name, scenario in scenarios.items():
+            params = {**scenario, "limit": args.limit}
+            first = _timed_get(client, params, args.repeat)
+            offset = _timed_get(client, {**params, "skip": (args.page - 1) * args.limit}, args.repeat)
+            cursor = _cursor_for_page(client, params, args.page)
+            deep = _timed_get(client, {**params, "cursor": cursor}, args.repeat) if cursor else float("nan")
+            print(f"{name:32} {first:>8.2f}ms {offset:>12.2f}ms {deep:>12.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""SQL statements issued per request for each ticket endpoint.
+
+    python -m benchmarks.query_counts
+"""
+
+import argparse
+import sqlite3
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from httpx import Response
+from sqlalchemy import Engine, event
+
+from benchmarks.seed import bench_client, seed_database
+
+_statements: list[str] = []
+
+
+def _count(conn, cursor, statement, parameters, context, executemany) -> None:
+    _statements.append(statement)
+
+
+def _measure(name: str, call: Callable[[], Response], verbose: bool) -> None:
+    _statements.clear()
+    resp = call()
+    print(f"{name:52} {resp.status_code:>4} {len(_statements):>4}")
+    if verbose:
+        for statement in _statements:
+            print("      " + " ".join(statement.split())[:110])
+
+
+def run(client: TestClient, verbose: bool) -> None:
+    student = {"X-Role": "student"}
+    technician = {"X-Role": "technician"}
+    ticket = {
+        "title": "Shower drain clogged",
+        "description": "Water does not drain in the shared shower.",
+        "room": "A-0101",
+        "priority": "medium",
+        "category_id": 1,
+    }
+    minimal = {"Prefer": "return=minimal"}
+    # Warm the category cache so every request below sees the steady state.
+    client.get("/categories")
+
+    print(f"{'endpoint':52} {'code':>4} {'sql':>4}")
+    _measure("POST /tickets", lambda: client.post("/tickets", json=ticket), verbose)
+    _measure("POST /tickets (Prefer: return=minimal)", lambda: client.post("/tickets", json=ticket, headers=minimal), verbose)
+    _measure("GET /tickets/{id}", lambda: client.get("/tickets/1"), verbose)
+    _measure("GET /tickets/{id}?comment_limit=0", lambda: client.get("/tickets/1", params={"comment_limit": 0}), verbose)
+    _measure(
+        "PUT /tickets/{id}",
+        lambda: client.put("/tickets/2", headers=technician, json={"priority": "urgent"}),
+        verbose,
+    )
+    _measure(
+        "PUT /tickets/{id}?comment_limit=0",
+        lambda: client.put("/tickets/2", headers=technician, params={"comment_limit": 0}, json={"priority": "high"}),
+        verbose,
+    )
+    _measure(
+        "PUT /tickets/{id}/status",
+        lambda: client.put("/tickets/3/status", headers=technician, json={"status": "rejected"}),
+        verbose,
+    )
+    _measure(
+        "PUT /tickets/{id}/status (Prefer: return=minimal)",
+        lambda: client.put("/tickets/4/status", headers={**technician, **minimal}, json={"status": "rejected"}),
+        verbose,
+    )
+    _measure(
+        "POST /tickets/{id}/comments",
+        lambda: client.post("/tickets/5/comments", headers=student, json={"message": "Still broken."}),
+        verbose,
+    )
+    _measure("DELETE /tickets/{id}", lambda: client.delete("/tickets/6"), verbose)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verbose", action="store_true", help="print every statement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "query_counts.db"
+        seed_database(path, tickets=100, max_comments=5)
+        with sqlite3.connect(path) as conn:
+            # Every status change below must be a valid transition.
+            conn.execute("UPDATE tickets SET status = 'open'")
+        event.listen(Engine, "before_cursor_execute", _count)
+        try:
+            with bench_client(path) as client:
+                run(client, args.verbose)
+        finally:
+            event.remove(Engine, "before_cursor_execute", _count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Requests per second on repeated GET /tickets queries with and without DORM_RESPONSE_CACHE.
+
+    python -m benchmarks.response_cache --tickets 100000 --write-every 50
+
+A handful of popular queries is requested round-robin, as dashboards polling the same view would. With
+`--write-every N` one status change lands after every N reads, so the cache also pays for invalidation.
+"""
+
+import argparse
+import itertools
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from benchmarks.seed import bench_client, seed_database
+
+QUERIES = [
+    {"status": "open", "sort_by": "created_at", "limit": 10},
+    {"status": "open", "sort_by": "priority", "sort_order": "desc", "limit": 20},
+    {"view": "summary", "limit": 50},
+    {"category_id": 3, "status": "in_progress", "limit": 10},
+]
+
+
+def requests_per_second(client: TestClient, seconds: float, write_every: int) -> float:
+    count = 0
+    queries = itertools.cycle(QUERIES)
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        resp = client.get("/tickets", params=next(queries))
+        assert resp.status_code == 200, resp.text
+        count += 1
+        if write_every and count % write_every == 0:
+            ticket_id = count // write_every
+            resp = client.put(f"/tickets/{ticket_id}", headers={"X-Role": "technician"}, json={"title": f"Edited {count}"})
+            assert resp.status_code == 200, resp.text
+    return count / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--max-comments", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=5.0, help="measuring time per mode")
+    parser.add_argument("--write-every", type=int, nargs="+", default=[0, 50, 5])
+    parser.add_argument("--db", type=Path, default=Path("bench_response_cache.db"))
+    parser.add_argument("--reuse", action="store_true", help="reuse an already seeded --db file")
+    args = parser.parse_args()
+
+    if not args.reuse or not args.db.exists():
+        seed_database(args.db, args.tickets, max_comments=args.max_comments)
+
+    print(f"{'writes':>12} {'no cache':>12} {'cache':>12} {'speedup':>8} {'hit rate':>9}")
+    for write_every in args.write_every:
+        rates = []
+        for enabled in (False, True):
+            config = replace(settings, database_url=f"sqlite:///{args.db}", response_cache=enabled)
+            with bench_client(args.db, config) as client:
+                requests_per_second(client, 0.5, write_every)  # warm caches and the connection pool
+                list_cache = client.app.state.ticket_list_cache
+                if list_cache is not None:
+                    hits, misses = list_cache.hits, list_cache.misses
+                rates.append(requests_per_second(client, args.seconds, write_every))
+        lookups = list_cache.hits - hits + list_cache.misses - misses
+        hit_rate = (list_cache.hits - hits) / max(lookups, 1)
+        label = f"1/{write_every} reads" if write_every else "none"
+        print(f"{label:>12} {rates[0]:>8.1f} r/s {rates[1]:>8.1f} r/s {rates[1] / rates[0]:>7.2f}x {hit_rate:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""GET /tickets/search (FTS5, BM25-ranked) against a LIKE '%term%' scan of the same data.
+
+    python -m benchmarks.search --tickets 1000000
+"""
+
+import argparse
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+
+from benchmarks.seed import bench_client, seed_database
+
+# Common words match ~1 in 12 tickets; a ticket number matches one.
+TERMS = ["leak", "aircon", "mold smell", "replaced part", "4242"]
+
+# LIKE cannot rank, so the baseline is what clients do today: find every match, then sort it out themselves.
+LIKE_BASELINE = (
+    "SELECT DISTINCT tickets.id FROM tickets LEFT JOIN comments ON comments.ticket_id = tickets.id WHERE {clauses}"
+)
+
+
+def _median_ms(samples: list[float]) -> float:
+    return statistics.median(samples) * 1000
+
+
+def _like_baseline(path: Path, term: str, repeat: int) -> float:
+    clauses = " AND ".join(
+        "(tickets.title LIKE ? OR tickets.description LIKE ? OR comments.message LIKE ?)" for _ in term.split()
+    )
+    params = [f"%{word}%" for word in term.split() for _ in range(3)]
+    conn = sqlite3.connect(path)
+    try:
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(LIKE_BASELINE.format(clauses=clauses), params).fetchall()
+            samples.append(time.perf_counter() - started)
+    finally:
+        conn.close()
+    return _median_ms(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--max-comments", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", type=Path, default=Path("bench_search.db"))
+    parser.add_argument("--reuse", action="store_true", help="reuse an already seeded --db file")
+    args = parser.parse_args()
+
+    if not args.reuse or not args.db.exists():
+        started = time.perf_counter()
+        seed_database(args.db, args.tickets, max_comments=args.max_comments)
+        print(f"seeded {args.tickets} tickets in {time.perf_counter() - started:.1f}s")
+
+    with bench_client(args.db) as client:
+        print(f"{'query':20} {'search endpoint':>16} {'+status=open':>14} {'LIKE baseline':>15}")
+        for term in TERMS:
+            timings = []
+            for params in ({"q": term}, {"q": term, "status": "open"}):
+                samples = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    resp = client.get("/tickets/search", params={**params, "view": "summary"})
+                    samples.append(time.perf_counter() - started)
+                    assert resp.status_code == 200, resp.text
+                timings.append(_median_ms(samples))
+            baseline = _like_baseline(args.db, term, args.repeat)
+            print(f"{term:20} {timings[0]:>14.2f}ms {timings[1]:>12.2f}ms {baseline:>13.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
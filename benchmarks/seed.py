@@ -0,0 +1,164 @@
+import random
+import sqlite3
+from collections.abc import Generator, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.config import Settings
+from app.database import COLUMN_BACKFILLS, init_db
+from app.main import create_app
+from app.models import Priority, Role, TicketStatus
+from app.schema import upgrade_schema
+from app.search import rebuild_search_index
+from app.stats import reconcile_stats
+
+CATEGORY_NAMES = ["Electrical", "Plumbing", "Furniture", "Internet", "Cleaning", "Air conditioning"]
+BUILDINGS = "ABCDEFGH"
+ISSUES = [
+    "Water leak under the sink",
+    "Aircon not cooling",
+    "Broken window latch",
+    "Light bulb burnt out",
+    "Wifi keeps dropping",
+    "Door lock jammed",
+    "Shower drain clogged",
+    "Heater making loud noise",
+    "Mold on bathroom ceiling",
+    "Power socket sparking",
+    "Wardrobe hinge snapped",
+    "Fridge not cold",
+]
+DETAILS = [
+    "Started last night",
+    "It has been like this for a week",
+    "Please come after 6 PM",
+    "Roommate noticed it first",
+    "It gets worse when it rains",
+    "Happens every morning",
+    "Already reported once before",
+    "There is a strange smell",
+]
+REPLIES = [
+    "Technician scheduled for tomorrow",
+    "Part ordered from supplier",
+    "Still broken after the visit",
+    "Checked and could not reproduce",
+    "Replaced the faulty part",
+    "Please confirm it works now",
+]
+BATCH_SIZE = 50_000
+
+
+def _timestamp(value: datetime) -> str:
+    # Same textual format SQLAlchemy's SQLite DateTime type writes.
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _ticket_rows(tickets: int, rng: random.Random, start: datetime) -> Iterator[tuple]:
+    priorities = [p.value for p in Priority]
+    statuses = [s.value for s in TicketStatus]
+    for ticket_id in range(1, tickets + 1):
+        created = start + timedelta(seconds=ticket_id * 7 + rng.randrange(7))
+        yield (
+            ticket_id,
+            f"{rng.choice(ISSUES)} #{ticket_id}",
+            f"{rng.choice(ISSUES)}. {rng.choice(DETAILS)}. {rng.choice(DETAILS)}.",
+            f"{rng.choice(BUILDINGS)}-{rng.randrange(1, 10_000):04d}",
+            rng.choice(priorities),
+            rng.choice(statuses),
+            rng.randrange(1, len(CATEGORY_NAMES) + 1),
+            _timestamp(created),
+            _timestamp(created + timedelta(minutes=rng.randrange(600))),
+        )
+
+
+def _comment_rows(tickets: int, max_comments: int, rng: random.Random, start: datetime) -> Iterator[tuple]:
+    roles = [r.value for r in Role]
+    for ticket_id in range(1, tickets + 1):
+        # Skewed: most tickets have a couple of comments, a few have many.
+        count = min(max_comments, int(rng.paretovariate(1.5)) - 1)
+        for n in range(count):
+            yield (
+                ticket_id,
+                f"{rng.choice(REPLIES)} ({n})",
+                rng.choice(roles),
+                _timestamp(start + timedelta(seconds=ticket_id * 7 + n)),
+            )
+
+
+def _insert_batched(conn: sqlite3.Connection, sql: str, rows: Iterator[tuple]) -> int:
+    total = 0
+    batch: list[tuple] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            conn.executemany(sql, batch)
+            total += len(batch)
+            batch.clear()
+    if batch:
+        conn.executemany(sql, batch)
+        total += len(batch)
+    return total
+
+
+def seed_database(path: Path, tickets: int, max_comments: int = 0, seed: int = 42) -> None:
+    if path.exists():
+        path.unlink()
+    seed_engine = create_engine(f"sqlite:///{path}")
+    init_db(seed_engine)
+
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        # Per-row triggers (search index, counters) are far slower than rebuilding once after the load.
+        for (trigger,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+            conn.execute(f"DROP TRIGGER {trigger}")
+        conn.executemany(
+            "INSERT INTO categories (id, name, description, is_active, created_at) VALUES (?, ?, ?, 1, ?)",
+            [(i, name, f"{name} issues", _timestamp(start)) for i, name in enumerate(CATEGORY_NAMES, start=1)],
+        )
+        _insert_batched(
+            conn,
+            "INSERT INTO tickets (id, title, description, room, priority, status, category_id, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            _ticket_rows(tickets, rng, start),
+        )
+        if max_comments:
+            _insert_batched(
+                conn,
+                "INSERT INTO comments (ticket_id, message, author_role, created_at) VALUES (?, ?, ?, ?)",
+                _comment_rows(tickets, max_comments, rng, start),
+            )
+            for (table, column), backfill in COLUMN_BACKFILLS.items():
+                if table == "tickets":
+                    conn.execute(backfill)
+        conn.commit()
+    finally:
+        conn.close()
+
+    rebuild_search_index(seed_engine)
+    reconcile_stats(seed_engine)
+    # Recreates the dropped triggers and stamps the schema version, so servers boot without an upgrade.
+    upgrade_schema(seed_engine)
+    with seed_engine.begin() as seed_conn:
+        if tickets:
+            # Statistics of an empty database make SQLite pick full scans inside FTS5's own queries later.
+            seed_conn.exec_driver_sql("ANALYZE")
+        # Journal mode is persistent; leave the file as a plain rollback-journal database.
+        seed_conn.exec_driver_sql("PRAGMA journal_mode=DELETE")
+    seed_engine.dispose()
+
+
+@contextmanager
+def bench_client(path: Path, config: Settings | None = None) -> Generator[TestClient, None, None]:
+    """A client of an app whose database is the benchmark file, built with `config`."""
+    config = config or Settings(database_url=f"sqlite:///{path}")
+    with TestClient(create_app(config)) as client:
+        yield client
@@ -0,0 +1,59 @@
+"""Requests per second on GET /tickets?limit=100 with response_model validation against DORM_FAST_JSON.
+
+    python -m benchmarks.serialization --tickets 10000
+
+Both modes run in-process against the same database so the difference is the serialization path.
+"""
+
+import argparse
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from benchmarks.seed import bench_client, seed_database
+
+SCENARIOS = [
+    ("full", {"limit": 100}),
+    ("summary", {"limit": 100, "view": "summary"}),
+]
+
+
+def requests_per_second(client: TestClient, params: dict, seconds: float) -> float:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        resp = client.get("/tickets", params=params)
+        assert resp.status_code == 200, resp.text
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=10_000)
+    parser.add_argument("--max-comments", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=5.0, help="measuring time per mode and view")
+    parser.add_argument("--db", type=Path, default=Path("bench_serialization.db"))
+    parser.add_argument("--reuse", action="store_true", help="reuse an already seeded --db file")
+    args = parser.parse_args()
+
+    if not args.reuse or not args.db.exists():
+        seed_database(args.db, args.tickets, max_comments=args.max_comments)
+
+    print(f"{'view':8} {'response_model':>15} {'fast json':>10} {'speedup':>8}")
+    for view, params in SCENARIOS:
+        rates = []
+        for enabled in (False, True):
+            config = replace(settings, database_url=f"sqlite:///{args.db}", fast_json=enabled)
+            with bench_client(args.db, config) as client:
+                requests_per_second(client, params, 0.5)  # warm caches and the connection pool
+                rates.append(requests_per_second(client, params, args.seconds))
+        print(f"{view:8} {rates[0]:>11.1f} r/s {rates[1]:>6.1f} r/s {rates[1] / rates[0]:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Write throughput with one database against one SQLite file per building (`DORM_SHARDS`).
+
+    python -m benchmarks.sharding --writers 16 --buildings 4 --seconds 10
+
+Each writer creates tickets in its own building and comments on them, so with shards the writers of
+different buildings commit to different files.
+"""
+
+import argparse
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.concurrency import Tally, _free_port, _start_server
+from benchmarks.seed import BUILDINGS, seed_database
+
+
+def _writer(base_url: str, building: str, deadline: float, tally: Tally, worker: int) -> None:
+    ticket_id = None
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        n = 0
+        while time.perf_counter() < deadline:
+            n += 1
+            started = time.perf_counter()
+            if ticket_id is not None and n % 2:
+                resp = client.post(
+                    f"/tickets/{ticket_id}/comments",
+                    headers={"X-Role": "student"},
+                    json={"message": f"Benchmark comment {n}"},
+                )
+            else:
+                resp = client.post(
+                    "/tickets",
+                    params={"comment_limit": 0},
+                    json={
+                        "title": f"Benchmark ticket {worker}-{n}",
+                        "description": "Created by the sharding benchmark.",
+                        "room": f"{building}-{worker % 10_000:04d}",
+                        "priority": "medium",
+                        "category_id": 1,
+                    },
+                )
+                if resp.status_code == 201:
+                    ticket_id = resp.json()["id"]
+            tally.record(resp.status_code, time.perf_counter() - started)
+
+
+def run(path: Path, production: bool, shards: str, args: argparse.Namespace) -> tuple[Tally, float]:
+    for stale in path.parent.glob(f"{path.stem}*"):
+        stale.unlink()
+    seed_database(path, 0)
+    extra_env = {"DORM_SHARDS": shards, "DORM_SHARD_URL": f"sqlite:///{path.resolve().with_suffix('')}_{{building}}.db"}
+    port = _free_port()
+    server = _start_server(path, production, port, extra_env)
+    try:
+        tally = Tally()
+        started = time.perf_counter()
+        deadline = started + args.seconds
+        workers = [
+            threading.Thread(
+                target=_writer,
+                args=(f"http://127.0.0.1:{port}", BUILDINGS[i % args.buildings], deadline, tally, i),
+            )
+            for i in range(args.writers)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return tally, time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--buildings", type=int, default=4, choices=range(1, len(BUILDINGS) + 1))
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--db", type=Path, default=Path("bench_sharding.db"))
+    args = parser.parse_args()
+
+    for mode, production in (("default", False), ("production", True)):
+        for name, shards in (("one database", ""), (f"{args.buildings} shards", ",".join(BUILDINGS[: args.buildings]))):
+            tally, elapsed = run(args.db, production, shards, args)
+            print(f"[{mode}] {name}")
+            print(f"  writes {tally.summary(elapsed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""GET /tickets/analytics/sla work: rollup reads against recomputing durations from the raw event history.
+
+    python -m benchmarks.sla --tickets 200000 --days 730
+
+Synthesizes `--days` of ticket histories (created, then open -> in_progress -> done or rejected) straight
+into `ticket_events`, so the rollup trigger maintains `ticket_status_durations` as they load. Each report
+(time from open to in_progress by category, over the last week and the last year) is then computed both
+ways; percentile error is the rollup's bucket interpolation against exact percentiles of the raw durations.
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from app.analytics import read_durations
+from benchmarks.seed import BUILDINGS, CATEGORY_NAMES, _timestamp, seed_database
+
+RAW_SQL = """SELECT category_id, seconds FROM (
+    SELECT category_id, type, previous_status, status, date(created_at) AS day,
+        (julianday(created_at) - julianday(LAG(created_at) OVER (PARTITION BY ticket_id ORDER BY id))) * 86400.0
+            AS seconds
+    FROM ticket_events WHERE type IN ('created', 'status_changed')
+)
+WHERE type = 'status_changed' AND previous_status = 'open' AND status = 'in_progress' AND day BETWEEN ? AND ?"""
+
+EVENT_INSERT = (
+    "INSERT INTO ticket_events (ticket_id, type, status, previous_status, category_id, room, created_at, data)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _events(tickets: int, days: int, rng: random.Random, start: datetime):
+    priorities = ["low", "medium", "high", "urgent"]
+    for ticket_id in range(1, tickets + 1):
+        created = start + timedelta(seconds=rng.randrange(days * 86400))
+        category_id = rng.randrange(1, len(CATEGORY_NAMES) + 1)
+        room = f"{rng.choice(BUILDINGS)}-{rng.randrange(1, 10_000):04d}"
+        data = json.dumps({"priority": rng.choice(priorities)})
+        started = created + timedelta(seconds=rng.lognormvariate(8.5, 1.2))
+        closed = started + timedelta(seconds=rng.lognormvariate(10, 1))
+        final = "done" if rng.random() < 0.9 else "rejected"
+        yield ticket_id, "created", "open", None, category_id, room, _timestamp(created), data
+        yield ticket_id, "status_changed", "in_progress", "open", category_id, room, _timestamp(started), data
+        yield ticket_id, "status_changed", final, "in_progress", category_id, room, _timestamp(closed), data
+
+
+def _exact(durations: list[float], q: float) -> float:
+    ordered = sorted(durations)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", type=Path, default=Path("bench_sla.db"))
+    args = parser.parse_args()
+
+    seed_database(args.db, 0)
+    start = datetime(2024, 1, 1)
+    conn = sqlite3.connect(args.db)
+    started = time.perf_counter()
+    rows = list(_events(args.tickets, args.days, random.Random(42), start))
+    rows.sort(key=lambda row: row[6])
+    conn.executemany(EVENT_INSERT, rows)
+    conn.commit()
+    elapsed = time.perf_counter() - started
+    print(f"loaded {len(rows)} events through the rollup trigger in {elapsed:.1f}s ({len(rows) / elapsed:,.0f}/s)")
+    print(f"rollup rows: {conn.execute('SELECT COUNT(*) FROM ticket_status_durations').fetchone()[0]}")
+
+    bind = create_engine(f"sqlite:///{args.db}")
+    end = (start + timedelta(days=args.days)).date()
+    for label, days in (("last 7 days", 7), ("last 365 days", 365)):
+        since = end - timedelta(days=days - 1)
+        window = (since.isoformat(), end.isoformat())
+
+        raw_started = time.perf_counter()
+        for _ in range(args.repeat):
+            exact: dict[int, list[float]] = {}
+            for category_id, seconds in conn.execute(RAW_SQL, window):
+                exact.setdefault(category_id, []).append(seconds)
+        raw_ms = (time.perf_counter() - raw_started) / args.repeat * 1000
+
+        rollup_started = time.perf_counter()
+        for _ in range(args.repeat):
+            with bind.connect() as rollup_conn:
+                grouped = read_durations(
+                    rollup_conn, "open", "in_progress", date.fromisoformat(window[0]), end, "category", {}
+                )
+        rollup_ms = (time.perf_counter() - rollup_started) / args.repeat * 1000
+
+        errors = [
+            abs(grouped[category_id].percentile(q) - _exact(durations, q)) / _exact(durations, q)
+            for category_id, durations in exact.items()
+            for q in (0.5, 0.9, 0.95)
+        ]
+        assert sum(d.count for d in grouped.values()) == sum(len(d) for d in exact.values())
+        print(f"[{label}] {sum(len(d) for d in exact.values())} transitions")
+        print(f"  raw history  {raw_ms:8.1f} ms")
+        print(f"  rollups      {rollup_ms:8.1f} ms")
+        print(f"  percentile error: mean {sum(errors) / len(errors):.1%}, worst {max(errors):.1%}")
+    bind.dispose()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
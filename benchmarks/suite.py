@@ -0,0 +1,472 @@
+"""Latency, throughput and SQL statements per request for every route, with a baseline regression gate.
+
+    python -m benchmarks.suite --tickets 10000 100000 --out bench_results.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.5
+    python -m benchmarks.suite --update-baseline
+
+Each dataset is seeded once into bench_suite_<tickets>.db (skewed comment counts) and copied before every
+run, so writes never leak into the next one. Requests go through the ASGI app in-process, --concurrency at
+a time. A scenario regresses when its p95 grows or its throughput drops by more than --threshold, when it
+issues more SQL statements per request, or when more of its requests fail. Latency baselines are only
+comparable on similar hardware: the baseline is scaled by a short CPU calibration run, which absorbs a
+uniformly faster or slower host but not a different core count; regenerate it with --update-baseline then.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy import Engine, event
+
+from app.config import Settings
+from app.main import create_app
+from benchmarks.seed import seed_database
+
+BASELINE = Path(__file__).with_name("baseline.json")
+BULK_SIZE = 5
+STUDENT = {"X-Role": "student"}
+TECHNICIAN = {"X-Role": "technician"}
+# Never-ending stream; there is no response to time.
+SKIPPED_ROUTES = {"GET /tickets/events"}
+# Results are only comparable with a baseline recorded under the same load shape.
+COMPARABLE_META = ("requests", "concurrency", "max_comments", "production")
+
+_statements: ContextVar[list[int] | None] = ContextVar("bench_statements", default=None)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    # Sync routes run in the threadpool with a copy of the request's context, so the counter follows them.
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    route: str
+    build: Callable[[int], tuple[str, str, dict]]
+    expect: int = 200
+
+
+@dataclass
+class Pools:
+    """Ticket ids picked from the seeded data so every request of a scenario is valid."""
+
+    read_ids: list[int]
+    commented_ids: list[int]
+    open_ids: list[int]
+    closed_ids: list[int]
+    room: str
+    category_id: int = 1
+    bench_category_id: int = 0
+    taken: dict[str, int] = field(default_factory=dict)
+
+    def take(self, pool: str, count: int) -> list[int]:
+        ids = getattr(self, pool)
+        start = self.taken.get(pool, 0)
+        if start + count > len(ids):
+            raise SystemExit(f"dataset has only {len(ids)} {pool}; lower --requests or seed more tickets")
+        self.taken[pool] = start + count
+        return ids[start : start + count]
+
+
+def load_pools(path: Path, requests: int) -> Pools:
+    conn = sqlite3.connect(path)
+    try:
+
+        def ids(sql: str) -> list[int]:
+            return [row[0] for row in conn.execute(sql)]
+
+        return Pools(
+            read_ids=ids(f"SELECT id FROM tickets ORDER BY id LIMIT {requests}"),
+            commented_ids=ids(f"SELECT id FROM tickets WHERE comment_count > 0 ORDER BY id LIMIT {requests}"),
+            open_ids=ids("SELECT id FROM tickets WHERE status = 'open' ORDER BY id"),
+            # Deleted from the top so the low ids used by the read scenarios survive.
+            closed_ids=ids("SELECT id FROM tickets WHERE status != 'open' ORDER BY id DESC"),
+            room=conn.execute("SELECT room FROM tickets ORDER BY id LIMIT 1").fetchone()[0],
+        )
+    finally:
+        conn.close()
+
+
+def _ticket(n: int, category_id: int) -> dict:
+    return {
+        "title": f"Benchmark ticket {n}",
+        "description": "Created by the benchmark suite to time writes.",
+        "room": f"Z-{n % 10_000:04d}",
+        "priority": "medium",
+        "category_id": category_id,
+    }
+
+
+def scenarios(pools: Pools, requests: int) -> list[Scenario]:
+    read_ids, commented = pools.read_ids, pools.commented_ids
+    reads = [
+        Scenario("GET /", "GET /", lambda n: ("GET", "/", {})),
+        Scenario("GET /mock-ui", "GET /mock-ui", lambda n: ("GET", "/mock-ui", {})),
+        Scenario("GET /metrics", "GET /metrics", lambda n: ("GET", "/metrics", {})),
+        Scenario("GET /categories", "GET /categories", lambda n: ("GET", "/categories", {})),
+        Scenario(
+            "GET /categories/{id}",
+            "GET /categories/{category_id}",
+            lambda n: ("GET", f"/categories/{pools.category_id}", {}),
+        ),
+        Scenario("GET /tickets", "GET /tickets", lambda n: ("GET", "/tickets", {})),
+        Scenario(
+            "GET /tickets?limit=100",
+            "GET /tickets",
+            lambda n: ("GET", "/tickets", {"params": {"limit": 100}}),
+        ),
+        Scenario(
+            "GET /tickets?view=summary&limit=100",
+            "GET /tickets",
+            lambda n: ("GET", "/tickets", {"params": {"view": "summary", "limit": 100}}),
+        ),
+        Scenario(
+            "GET /tickets?status=open&sort_by=updated_at",
+            "GET /tickets",
+            lambda n: ("GET", "/tickets", {"params": {"status": "open", "sort_by": "updated_at"}}),
+        ),
+        Scenario(
+            "GET /tickets/export?room=",
+            "GET /tickets/export",
+            lambda n: ("GET", "/tickets/export", {"params": {"room": pools.room, "include_comments": True}}),
+        ),
+        Scenario("GET /tickets/stats", "GET /tickets/stats", lambda n: ("GET", "/tickets/stats", {})),
+        Scenario(
+            "GET /tickets/search?q=leak",
+            "GET /tickets/search",
+            lambda n: ("GET", "/tickets/search", {"params": {"q": "leak", "view": "summary"}}),
+        ),
+        Scenario(
+            "GET /tickets/{id}",
+            "GET /tickets/{ticket_id}",
+            lambda n: ("GET", f"/tickets/{read_ids[n % len(read_ids)]}", {}),
+        ),
+        Scenario(
+            "GET /tickets/{id}/comments",
+            "GET /tickets/{ticket_id}/comments",
+            lambda n: ("GET", f"/tickets/{commented[n % len(commented)]}/comments", {}),
+        ),
+    ]
+
+    status_ids = pools.take("open_ids", requests)
+    bulk_status_ids = pools.take("open_ids", requests * BULK_SIZE)
+    delete_ids = pools.take("closed_ids", requests)
+    bulk_delete_ids = pools.take("closed_ids", requests * BULK_SIZE)
+
+    def chunk(ids: list[int], n: int) -> list[int]:
+        return ids[n * BULK_SIZE : (n + 1) * BULK_SIZE]
+
+    writes = [
+        Scenario(
+            "POST /categories",
+            "POST /categories",
+            lambda n: ("POST", "/categories", {"json": {"name": f"Benchmark category {n}"}}),
+            expect=201,
+        ),
+        Scenario(
+            "PUT /categories/{id}",
+            "PUT /categories/{category_id}",
+            lambda n: ("PUT", f"/categories/{pools.bench_category_id}", {"json": {"description": f"Revision {n}"}}),
+        ),
+        Scenario(
+            "POST /tickets",
+            "POST /tickets",
+            lambda n: ("POST", "/tickets", {"json": _ticket(n, pools.category_id)}),
+            expect=201,
+        ),
+        Scenario(
+            "POST /tickets/bulk",
+            "POST /tickets/bulk",
+            lambda n: (
+                "POST",
+                "/tickets/bulk",
+                {"json": {"items": [_ticket(n * BULK_SIZE + i, pools.category_id) for i in range(BULK_SIZE)]}},
+            ),
+        ),
+        Scenario(
+            "PUT /tickets/{id}",
+            "PUT /tickets/{ticket_id}",
+            lambda n: (
+                "PUT",
+                f"/tickets/{read_ids[n % len(read_ids)]}",
+                {"headers": TECHNICIAN, "json": {"priority": ("low", "high")[n % 2]}},
+            ),
+        ),
+        Scenario(
+            "POST /tickets/{id}/comments",
+            "POST /tickets/{ticket_id}/comments",
+            lambda n: (
+                "POST",
+                f"/tickets/{read_ids[n % len(read_ids)]}/comments",
+                {"headers": STUDENT, "json": {"message": f"Benchmark comment {n}"}},
+            ),
+            expect=201,
+        ),
+        Scenario(
+            "PUT /tickets/{id}/status",
+            "PUT /tickets/{ticket_id}/status",
+            lambda n: (
+                "PUT",
+                f"/tickets/{status_ids[n]}/status",
+                {"headers": TECHNICIAN, "json": {"status": "rejected"}},
+            ),
+        ),
+        Scenario(
+            "PUT /tickets/status/bulk",
+            "PUT /tickets/status/bulk",
+            lambda n: (
+                "PUT",
+                "/tickets/status/bulk",
+                {
+                    "headers": TECHNICIAN,
+                    "json": {"items": [{"ticket_id": i, "status": "rejected"} for i in chunk(bulk_status_ids, n)]},
+                },
+            ),
+        ),
+        Scenario(
+            "DELETE /tickets/{id}",
+            "DELETE /tickets/{ticket_id}",
+            lambda n: ("DELETE", f"/tickets/{delete_ids[n]}", {}),
+            expect=204,
+        ),
+        Scenario(
+            "DELETE /tickets/bulk",
+            "DELETE /tickets/bulk",
+            lambda n: ("DELETE", "/tickets/bulk", {"params": {"ids": chunk(bulk_delete_ids, n)}}),
+        ),
+        Scenario(
+            "DELETE /categories/{id}",
+            "DELETE /categories/{category_id}",
+            lambda n: ("DELETE", f"/categories/{pools.bench_category_id}", {}),
+            expect=204,
+        ),
+    ]
+    return reads + writes
+
+
+def uncovered_routes(app: FastAPI, covered: set[str]) -> list[str]:
+    routes = {
+        f"{method} {route.path}" for route in app.routes if isinstance(route, APIRoute) for method in route.methods
+    }
+    return sorted(routes - covered - SKIPPED_ROUTES)
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    statements: list[int] = []
+    errors = 0
+    next_request = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for n in next_request:
+            method, url, kwargs = scenario.build(n)
+            counter = [0]
+            token = _statements.set(counter)
+            started = time.perf_counter()
+            try:
+                resp = await client.request(method, url, **kwargs)
+            finally:
+                _statements.reset(token)
+            latencies.append(time.perf_counter() - started)
+            statements.append(counter[0])
+            if resp.status_code != scenario.expect:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "sql_per_request": round(sum(statements) / requests, 2),
+    }
+
+
+async def run_dataset(path: Path, args: argparse.Namespace) -> dict[str, dict]:
+    pools = load_pools(path, args.requests)
+    suite = scenarios(pools, args.requests)
+    config = Settings(database_url=f"sqlite:///{path}", sqlite_production=args.production)
+    app = create_app(config)
+    missing = uncovered_routes(app, {scenario.route for scenario in suite})
+    if missing:
+        print(f"  routes without a scenario: {', '.join(missing)}")
+
+    results: dict[str, dict] = {}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            resp = await client.post("/categories", json={"name": "Benchmark target"})
+            pools.bench_category_id = resp.json()["id"]
+            for _ in range(3):
+                await client.get("/tickets")
+            for scenario in suite:
+                results[scenario.name] = result = await run_scenario(client, scenario, args.requests, args.concurrency)
+                print(
+                    f"  {scenario.name:44} p50={result['p50_ms']:>8.2f}ms p95={result['p95_ms']:>8.2f}ms "
+                    f"p99={result['p99_ms']:>8.2f}ms {result['throughput_rps']:>8.1f} r/s "
+                    f"sql={result['sql_per_request']:>5.2f} errors={result['errors']}"
+                )
+    finally:
+        app.state.database.dispose()
+    return results
+
+
+def calibrate() -> float:
+    """Milliseconds for a fixed CPU-bound workload, used to scale a baseline recorded on a faster or slower host."""
+    conn = sqlite3.connect(":memory:")
+    samples = []
+    for _ in range(5):
+        started = time.perf_counter()
+        rows = conn.execute(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n LIMIT 20000) SELECT i FROM n"
+        )
+        json.loads(json.dumps([{"id": i, "room": f"A-{i:04d}"} for (i,) in rows]))
+        samples.append(time.perf_counter() - started)
+    conn.close()
+    return round(min(samples) * 1000, 3)
+
+
+def best_of(runs: list[dict[str, dict]]) -> dict[str, dict]:
+    """Per scenario, the run with the lowest p95: scheduler noise only ever makes a run slower."""
+    return {name: min((run[name] for run in runs), key=lambda result: result["p95_ms"]) for name in runs[0]}
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    """Human-readable regressions of `results` against `baseline`; empty when within the threshold."""
+    regressions = []
+    concurrency = results["meta"]["concurrency"]
+    # >1 when this host is slower than the one that recorded the baseline.
+    speed = results["meta"]["calibration_ms"] / baseline["meta"]["calibration_ms"]
+    for dataset, scenarios_ in results["datasets"].items():
+        for name, current in scenarios_.items():
+            previous = baseline.get("datasets", {}).get(dataset, {}).get(name)
+            if previous is None:
+                continue
+            label = f"{dataset} tickets, {name}"
+            p95, rps = previous["p95_ms"] * speed, previous["throughput_rps"] / speed
+            if current["p95_ms"] > max(p95 * (1 + threshold), p95 + min_delta_ms):
+                regressions.append(f"{label}: p95 {p95:.2f}ms -> {current['p95_ms']:.2f}ms")
+            if current["throughput_rps"] < rps / (1 + threshold) and (
+                1000 / current["throughput_rps"] - 1000 / rps > min_delta_ms / concurrency
+            ):
+                regressions.append(f"{label}: throughput {rps:.1f} -> {current['throughput_rps']:.1f} r/s")
+            # Statement counts are deterministic, so any increase is a new query (or an N+1).
+            if current["sql_per_request"] > previous["sql_per_request"] + 0.05:
+                regressions.append(
+                    f"{label}: SQL per request {previous['sql_per_request']} -> {current['sql_per_request']}"
+                )
+            if current["errors"] > previous["errors"]:
+                regressions.append(f"{label}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, nargs="+", default=[10_000], help="dataset sizes, e.g. 10000 1000000")
+    parser.add_argument("--max-comments", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--production",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="WAL + split reader/writer pools (default); without it, writers contend in SQLite's busy handler",
+    )
+    parser.add_argument("--reseed", action="store_true", help="seed again even if the dataset file exists")
+    parser.add_argument("--out", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per dataset; each scenario keeps its best")
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed relative p95/throughput change")
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=5.0, help="ignore p95 (and per-request time) changes below this"
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="write the results to --baseline")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "max_comments": args.max_comments,
+            "production": args.production,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "calibration_ms": calibrate(),
+        },
+        "datasets": {},
+    }
+    event.listen(Engine, "before_cursor_execute", _count_statement)
+    try:
+        for tickets in args.tickets:
+            template = Path(f"bench_suite_{tickets}.db")
+            if args.reseed or not template.exists():
+                started = time.perf_counter()
+                seed_database(template, tickets, max_comments=args.max_comments)
+                print(f"seeded {tickets} tickets in {time.perf_counter() - started:.1f}s")
+            working = template.with_suffix(".run.db")
+            runs = []
+            for repeat in range(1, args.repeat + 1):
+                shutil.copyfile(template, working)
+                print(
+                    f"{tickets} tickets, {args.requests} requests per scenario, "
+                    f"concurrency {args.concurrency}, run {repeat}/{args.repeat}"
+                )
+                runs.append(asyncio.run(run_dataset(working, args)))
+                working.unlink()
+            results["datasets"][str(tickets)] = best_of(runs)
+    finally:
+        event.remove(Engine, "before_cursor_execute", _count_statement)
+
+    args.out.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"wrote {args.out}")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"updated baseline {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --update-baseline to record one")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    mismatched = [key for key in COMPARABLE_META if baseline["meta"].get(key) != results["meta"][key]]
+    if mismatched:
+        print(f"baseline was recorded with different {', '.join(mismatched)}; not comparing")
+        sys.exit(2)
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print(f"no regressions against {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
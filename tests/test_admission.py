@@ -0,0 +1,69 @@
+import asyncio
+from dataclasses import replace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.admission import STATUS_CHANGE, STUDENT, TECHNICIAN, AdmissionGate, AdmissionMiddleware
+from app.config import settings
+from app.metrics import render_metrics
+
+
+def test_rate_limits_are_per_role_and_answer_in_the_error_format() -> None:
+    app = FastAPI()
+    app.get("/")(lambda: {"ok": True})
+    app.get("/tickets")(lambda: [])
+    config = replace(
+        settings,
+        admission_control=True,
+        rate_limit_student_rps=1,
+        rate_limit_student_burst=2,
+        rate_limit_technician_rps=0,
+    )
+    app.add_middleware(AdmissionMiddleware, config=config)
+
+    with TestClient(app) as client:
+        assert [client.get("/tickets", headers={"X-Role": "student"}).status_code for _ in range(2)] == [200, 200]
+        resp = client.get("/tickets", headers={"X-Role": "student"})
+        assert resp.status_code == 429
+        assert resp.headers["Retry-After"] == "1"
+        assert resp.json()["code"] == "RATE_LIMITED"
+        assert resp.json()["details"][0]["field"] == "X-Role"
+        # No or unknown roles share the student limit; technicians and the healthcheck are not held back.
+        assert client.get("/tickets").status_code == 429
+        assert [client.get("/tickets", headers={"X-Role": "technician"}).status_code for _ in range(5)] == [200] * 5
+        assert client.get("/").status_code == 200
+
+    assert 'dorm_admission_rejections_total{reason="rate_limited",route_class="read",role="student"} 2' in (
+        render_metrics()
+    )
+
+
+def test_gate_admits_technician_status_changes_before_queued_student_reads() -> None:
+    async def scenario() -> list:
+        gate = AdmissionGate(max_inflight=2, limits={"read": 2, "write": 2, "bulk": 1}, reserved=1)
+        admitted: list[str] = []
+
+        async def request(label: str, name: str, priority: int, timeout: float = 1.0) -> None:
+            if await gate.acquire(name, priority, timeout):
+                admitted.append(label)
+            else:
+                admitted.append(f"{label} rejected")
+
+        # Students can never take the reserved slot, so the second read has to queue.
+        await request("read 1", "read", STUDENT)
+        queued = asyncio.create_task(request("read 2", "read", STUDENT))
+        await asyncio.sleep(0)
+        await request("status", "write", STATUS_CHANGE)
+        late = asyncio.create_task(request("technician read", "read", TECHNICIAN))
+        await request("read 3", "read", STUDENT, timeout=0.01)
+
+        gate.release("write")
+        await late
+        gate.release("read")
+        assert not queued.done()
+        gate.release("read")
+        await queued
+        return admitted
+
+    assert asyncio.run(scenario()) == ["read 1", "status", "read 3 rejected", "technician read", "read 2"]
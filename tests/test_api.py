@@ -1,42 +1,37 @@
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
 from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from datetime import timedelta
 from pathlib import Path
 
 import pytest
+from fastapi import Response
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import create_engine, text
 
-from app.database import Base, get_db
-from app.main import app
+from app.analytics import rebuild_sla_rollups
+from app.archive import archive_closed_tickets
+from app.category_cache import CATEGORY_VERSION, bump_version
+from app.config import Settings, settings
+from app.main import create_app
+from app.models import Category
+from app.response_cache import ResponseCache
+from app.schema import schema_version, stamped_version
+from app.sharding import SHARD_ID_BITS, ShardSet, building_of_id
+from app.stats import Drift, reconcile_stats
 
 
 @pytest.fixture()
-def client() -> Generator[TestClient, None, None]:
-    db_path = Path("test.db")
-    if db_path.exists():
-        db_path.unlink()
-
-    test_engine = create_engine("sqlite:///./test.db", connect_args={"check_same_thread": False})
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
-    Base.metadata.create_all(bind=test_engine)
-
-    def override_get_db() -> Generator[Session, None, None]:
-        db = TestingSessionLocal()
-        try:
-            yield db
-        finally:
-            db.close()
-
-    app.dependency_overrides[get_db] = override_get_db
-
-    with TestClient(app) as test_client:
+def client(tmp_path: Path) -> Generator[TestClient, None, None]:
+    with TestClient(create_app(Settings(database_url=f"sqlite:///{tmp_path / 'test.db'}"))) as test_client:
         yield test_client
 
-    app.dependency_overrides.clear()
-    Base.metadata.drop_all(bind=test_engine)
-    if db_path.exists():
-        db_path.unlink()
-
 
 def test_ticket_flow_with_roles_and_transitions(client: TestClient) -> None:
     category_resp = client.post(
@@ -107,3 +102,932 @@ def test_ticket_flow_with_roles_and_transitions(client: TestClient) -> None:
     )
     assert student_status_update.status_code == 403
     assert student_status_update.json()["code"] == "FORBIDDEN"
+
+
+def _same_database(client: TestClient, **changes: object) -> TestClient:
+    """A client of a second app on `client`'s database, built with `changes` to its settings."""
+    return TestClient(create_app(replace(client.app.state.config, **changes)))
+
+
+def _create_category(client: TestClient, name: str = "Electrical") -> int:
+    resp = client.post("/categories", json={"name": name, "description": "Power related issues"})
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+
+def _create_ticket(client: TestClient, category_id: int, **overrides: str) -> dict:
+    payload = {
+        "title": "Air conditioner broken",
+        "description": "The air conditioner has stopped cooling for two days.",
+        "room": "A-1207",
+        "priority": "high",
+        "category_id": category_id,
+    }
+    payload.update(overrides)
+    resp = client.post("/tickets", json=payload)
+    assert resp.status_code == 201
+    return resp.json()
+
+
+@pytest.mark.parametrize("sort_by", ["id", "created_at", "updated_at", "priority", "status"])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_list_tickets_cursor_pagination(client: TestClient, sort_by: str, sort_order: str) -> None:
+    category_id = _create_category(client)
+    for priority in ["low", "high", "high", "urgent", "medium", "low", "high"]:
+        _create_ticket(client, category_id, priority=priority)
+
+    params = {"sort_by": sort_by, "sort_order": sort_order}
+    expected = [t["id"] for t in client.get("/tickets", params={**params, "limit": 100}).json()]
+
+    seen: list[int] = []
+    cursor = None
+    while True:
+        page_params = {**params, "limit": 3}
+        if cursor:
+            page_params["cursor"] = cursor
+        resp = client.get("/tickets", params=page_params)
+        assert resp.status_code == 200
+        seen.extend(t["id"] for t in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert len(seen) == 7
+
+
+def test_list_tickets_rejects_bad_cursor(client: TestClient) -> None:
+    category_id = _create_category(client)
+    for _ in range(3):
+        _create_ticket(client, category_id)
+
+    first = client.get("/tickets", params={"limit": 2, "sort_by": "created_at"})
+    cursor = first.headers["X-Next-Cursor"]
+
+    mismatched = client.get("/tickets", params={"limit": 2, "sort_by": "id", "cursor": cursor})
+    assert mismatched.status_code == 400
+    assert mismatched.json()["details"][0]["field"] == "cursor"
+
+    garbage = client.get("/tickets", params={"cursor": "not-a-cursor"})
+    assert garbage.status_code == 400
+
+    with_skip = client.get("/tickets", params={"limit": 2, "skip": 1, "cursor": cursor})
+    assert with_skip.status_code == 400
+
+
+def test_list_tickets_summary_view(client: TestClient) -> None:
+    category_id = _create_category(client)
+    busy = _create_ticket(client, category_id)
+    quiet = _create_ticket(client, category_id, room="B-0101")
+    for message in ["First visit scheduled.", "Part ordered.", "Fixed, please confirm."]:
+        resp = client.post(f"/tickets/{busy['id']}/comments", headers={"X-Role": "technician"}, json={"message": message})
+        assert resp.status_code == 201
+
+    resp = client.get("/tickets", params={"view": "summary", "sort_by": "id", "sort_order": "asc"})
+    assert resp.status_code == 200
+    summaries = resp.json()
+    assert [s["id"] for s in summaries] == [busy["id"], quiet["id"]]
+    assert "comments" not in summaries[0]
+    assert "description" not in summaries[0]
+    assert summaries[0]["comment_count"] == 3
+    assert summaries[0]["latest_comment"]["message"] == "Fixed, please confirm."
+    assert summaries[1]["comment_count"] == 0
+    assert summaries[1]["latest_comment"] is None
+
+    full = client.get("/tickets", params={"sort_by": "id", "sort_order": "asc"}).json()
+    assert len(full[0]["comments"]) == 3
+    assert full[0]["comment_count"] == 3
+    assert "latest_comment" not in full[0]
+
+    assert client.get("/tickets", params={"view": "compact"}).status_code == 400
+
+
+def test_comment_pagination_and_counters(client: TestClient) -> None:
+    category_id = _create_category(client)
+    ticket = _create_ticket(client, category_id)
+    assert ticket["comment_count"] == 0
+    assert ticket["last_comment_at"] is None
+
+    messages = [f"Update number {n}" for n in range(7)]
+    for message in messages:
+        resp = client.post(f"/tickets/{ticket['id']}/comments", headers={"X-Role": "student"}, json={"message": message})
+        assert resp.status_code == 201
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        resp = client.get(f"/tickets/{ticket['id']}/comments", params=params)
+        assert resp.status_code == 200
+        seen.extend(c["message"] for c in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == messages
+
+    full = client.get(f"/tickets/{ticket['id']}").json()
+    assert full["comment_count"] == 7
+    assert full["last_comment_at"] == full["comments"][-1]["created_at"]
+    assert full["updated_at"] == ticket["updated_at"]
+    assert [c["message"] for c in full["comments"]] == messages
+
+    capped = client.get(f"/tickets/{ticket['id']}", params={"comment_limit": 2}).json()
+    assert [c["message"] for c in capped["comments"]] == messages[-2:]
+
+    status_update = client.put(
+        f"/tickets/{ticket['id']}/status",
+        headers={"X-Role": "technician"},
+        params={"comment_limit": 0},
+        json={"status": "in_progress"},
+    )
+    assert status_update.status_code == 200
+    assert status_update.json()["comments"] == []
+    assert status_update.json()["comment_count"] == 7
+    assert len(client.get(f"/tickets/{ticket['id']}").json()["comments"]) == 7
+
+    assert client.get("/tickets/999/comments").status_code == 404
+    assert client.get(f"/tickets/{ticket['id']}/comments", params={"cursor": "bogus"}).status_code == 400
+
+
+def test_bulk_ticket_endpoints(client: TestClient) -> None:
+    category_id = _create_category(client)
+    inactive_id = _create_category(client, name="Plumbing")
+    assert client.delete(f"/categories/{inactive_id}").status_code == 204
+
+    item = {
+        "title": "Broken window latch",
+        "description": "The window latch in the study room is broken.",
+        "room": "C-0312",
+        "priority": "medium",
+    }
+    items = [{**item, "category_id": cid} for cid in (category_id, inactive_id, category_id)]
+    created = client.post("/tickets/bulk", json={"items": items})
+    assert created.status_code == 200
+    results = created.json()
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert results[1]["error"]["code"] == "VALIDATION_ERROR"
+    first_id, second_id = results[0]["ticket_id"], results[2]["ticket_id"]
+    assert client.get(f"/tickets/{first_id}").json()["status"] == "open"
+
+    forbidden = client.put(
+        "/tickets/status/bulk",
+        headers={"X-Role": "student"},
+        json={"items": [{"ticket_id": first_id, "status": "in_progress"}]},
+    )
+    assert forbidden.status_code == 403
+    transitions = client.put(
+        "/tickets/status/bulk",
+        headers={"X-Role": "technician"},
+        json={
+            "items": [
+                {"ticket_id": first_id, "status": "in_progress"},
+                {"ticket_id": first_id, "status": "done"},
+                {"ticket_id": second_id, "status": "done"},
+                {"ticket_id": 999, "status": "rejected"},
+            ]
+        },
+    )
+    assert transitions.status_code == 200
+    results = transitions.json()
+    assert [r["ok"] for r in results] == [True, True, False, False]
+    assert results[2]["error"]["code"] == "INVALID_STATUS_TRANSITION"
+    assert results[3]["error"]["code"] == "NOT_FOUND"
+    assert client.get(f"/tickets/{first_id}").json()["status"] == "done"
+    assert client.get(f"/tickets/{second_id}").json()["status"] == "open"
+
+    deleted = client.delete("/tickets/bulk", params={"ids": [first_id, 999]})
+    assert deleted.status_code == 200
+    assert [r["ok"] for r in deleted.json()] == [True, False]
+    assert client.get(f"/tickets/{first_id}").status_code == 404
+    assert client.get(f"/tickets/{second_id}").status_code == 200
+
+
+def test_concurrent_bulk_transitions_apply_each_transition_once(client: TestClient) -> None:
+    category_id = _create_category(client)
+    ticket_ids = [_create_ticket(client, category_id)["id"] for _ in range(20)]
+    payload = {"items": [{"ticket_id": ticket_id, "status": "in_progress"} for ticket_id in ticket_ids]}
+
+    def move_all(_: int):
+        return client.put("/tickets/status/bulk", headers={"X-Role": "technician"}, json=payload)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(move_all, range(4)))
+    assert [resp.status_code for resp in responses] == [200] * 4
+    # in_progress -> in_progress is invalid, so exactly one request moves each ticket.
+    for index in range(len(ticket_ids)):
+        outcomes = [resp.json()[index] for resp in responses]
+        assert sum(outcome["ok"] for outcome in outcomes) == 1
+        assert {o["error"]["code"] for o in outcomes if not o["ok"]} == {"INVALID_STATUS_TRANSITION"}
+
+def test_category_cache_follows_writes_from_other_workers(client: TestClient) -> None:
+    category_id = _create_category(client)
+    assert [c["name"] for c in client.get("/categories").json()] == ["Electrical"]
+
+    # Another worker process renames and deactivates the category through its own connection.
+    other_worker = client.app.state.database.sessions()
+    other_worker.query(Category).filter(Category.id == category_id).update({"name": "Power", "is_active": False})
+    bump_version(other_worker, CATEGORY_VERSION)
+    other_worker.commit()
+    other_worker.close()
+
+    assert client.get("/categories").json() == []
+    assert client.get(f"/categories/{category_id}").json()["name"] == "Power"
+    inactive = client.post(
+        "/tickets",
+        json={
+            "title": "Air conditioner broken",
+            "description": "The air conditioner has stopped cooling for two days.",
+            "room": "A-1207",
+            "priority": "high",
+            "category_id": category_id,
+        },
+    )
+    assert inactive.status_code == 400
+
+    assert client.put(f"/categories/{category_id}", json={"is_active": True}).status_code == 200
+    assert [c["name"] for c in client.get("/categories").json()] == ["Power"]
+    _create_ticket(client, category_id)
+
+
+def test_ticket_etags_and_conditional_requests(client: TestClient) -> None:
+    category_id = _create_category(client)
+    created = client.post(
+        "/tickets",
+        json={
+            "title": "Air conditioner broken",
+            "description": "The air conditioner has stopped cooling for two days.",
+            "room": "A-1207",
+            "priority": "high",
+            "category_id": category_id,
+        },
+    )
+    ticket_id = created.json()["id"]
+    etag = created.headers["ETag"]
+
+    first = client.get(f"/tickets/{ticket_id}")
+    assert first.headers["ETag"] == etag
+    cached = client.get(f"/tickets/{ticket_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    list_etag = client.get("/tickets").headers["ETag"]
+    assert client.get("/tickets", headers={"If-None-Match": list_etag}).status_code == 304
+
+    comment = client.post(f"/tickets/{ticket_id}/comments", headers={"X-Role": "student"}, json={"message": "Any news?"})
+    assert comment.status_code == 201
+    assert client.get(f"/tickets/{ticket_id}", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/tickets", headers={"If-None-Match": list_etag}).status_code == 200
+
+    # Listings filtered by category only change with writes in that category, from any process.
+    by_category = {"category_id": category_id}
+    category_etag = client.get("/tickets", params=by_category).headers["ETag"]
+    other = _create_ticket(client, _create_category(client, name="Plumbing"))
+    assert client.get("/tickets", params=by_category, headers={"If-None-Match": category_etag}).status_code == 304
+    assert client.delete(f"/tickets/{other['id']}").status_code == 204
+    other_worker = create_engine(client.app.state.config.database_url)
+    try:
+        with other_worker.begin() as conn:
+            conn.execute(text("UPDATE tickets SET title = 'Sparking socket' WHERE id = :id"), {"id": ticket_id})
+    finally:
+        other_worker.dispose()
+    assert client.get("/tickets", params=by_category, headers={"If-None-Match": category_etag}).status_code == 200
+
+    current =client.get(f"/tickets/{ticket_id}").headers["ETag"]
+    stale = client.put(
+        f"/tickets/{ticket_id}/status",
+        headers={"X-Role": "technician", "If-Match": etag},
+        json={"status": "in_progress"},
+    )
+    assert stale.status_code == 412
+    assert stale.json()["code"] == "PRECONDITION_FAILED"
+
+    updated = client.put(
+        f"/tickets/{ticket_id}/status",
+        headers={"X-Role": "technician", "If-Match": current},
+        json={"status": "in_progress"},
+    )
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] != current
+
+    lost_update = client.put(
+        f"/tickets/{ticket_id}",
+        headers={"X-Role": "technician", "If-Match": current},
+        json={"priority": "urgent"},
+    )
+    assert lost_update.status_code == 412
+    edited = client.put(
+        f"/tickets/{ticket_id}",
+        headers={"X-Role": "technician", "If-Match": updated.headers["ETag"]},
+        json={"priority": "urgent"},
+    )
+    assert edited.status_code == 200
+    assert edited.json()["priority"] == "urgent"
+
+
+def test_prefer_return_minimal_and_write_responses(client: TestClient) -> None:
+    category_id = _create_category(client)
+    created = client.post(
+        "/tickets",
+        headers={"Prefer": "return=minimal"},
+        json={
+            "title": "Desk lamp flickering",
+            "description": "The desk lamp flickers whenever the fan is on.",
+            "room": "D-0404",
+            "priority": "low",
+            "category_id": category_id,
+        },
+    )
+    assert created.status_code == 204
+    assert created.content == b""
+    assert created.headers["Preference-Applied"] == "return=minimal"
+    location = created.headers["Location"]
+    assert client.get(location).headers["ETag"] == created.headers["ETag"]
+
+    comment = client.post(f"{location}/comments", headers={"X-Role": "student"}, json={"message": "Still flickering."})
+    assert comment.status_code == 201
+
+    edited = client.put(location, headers={"X-Role": "student"}, json={"priority": "medium"})
+    assert edited.status_code == 200
+    assert edited.json()["priority"] == "medium"
+    assert [c["message"] for c in edited.json()["comments"]] == ["Still flickering."]
+
+    moved = client.put(
+        f"{location}/status",
+        headers={"X-Role": "technician", "Prefer": "return=minimal"},
+        json={"status": "in_progress"},
+    )
+    assert moved.status_code == 204
+    assert client.get(location).json()["status"] == "in_progress"
+
+    forbidden = client.put(location, headers={"X-Role": "student"}, json={"priority": "low"})
+    assert forbidden.status_code == 403
+    assert client.put("/tickets/999", headers={"X-Role": "technician"}, json={"priority": "low"}).status_code == 404
+    assert client.delete(location).status_code == 204
+    assert client.delete(location).status_code == 404
+
+
+def test_search_tickets_ranks_and_filters(client: TestClient) -> None:
+    category_id = _create_category(client)
+    other_category = _create_category(client, name="Plumbing")
+    in_title = _create_ticket(
+        client, other_category, title="Water leak under sink", description="Water pools under the bathroom sink."
+    )
+    in_description = _create_ticket(
+        client, other_category, title="Bathroom floor wet", description="Probably a slow leak behind the toilet."
+    )
+    in_comment = _create_ticket(client, category_id, title="Ceiling stain", description="Brown stain on the ceiling.")
+    _create_ticket(client, category_id, title="Aircon not cooling", description="The aircon blows warm air all day.")
+    client.post(
+        f"/tickets/{in_comment['id']}/comments",
+        headers={"X-Role": "technician"},
+        json={"message": "Leaking pipe upstairs."},
+    )
+
+    resp = client.get("/tickets/search", params={"q": "leak"})
+    assert resp.status_code == 200
+    assert [t["id"] for t in resp.json()] == [in_title["id"], in_description["id"], in_comment["id"]]
+
+    filtered = client.get("/tickets/search", params={"q": "leak", "category_id": category_id, "view": "summary"})
+    assert [t["id"] for t in filtered.json()] == [in_comment["id"]]
+    assert filtered.json()[0]["comment_count"] == 1
+
+    client.put(f"/tickets/{in_title['id']}", headers={"X-Role": "student"}, json={"title": "Dripping tap in sink"})
+    client.delete(f"/tickets/{in_comment['id']}")
+    remaining = client.get("/tickets/search", params={"q": "leak"}).json()
+    assert [t["id"] for t in remaining] == [in_description["id"]]
+    assert [t["id"] for t in client.get("/tickets/search", params={"q": "dripping"}).json()] == [in_title["id"]]
+
+    assert client.get("/tickets/search", params={"q": '"leak'}).status_code == 200
+    assert client.get("/tickets/search", params={"q": "%%"}).status_code == 400
+
+
+def test_ticket_stats_follow_writes_and_reconcile(client: TestClient) -> None:
+    electrical = _create_category(client)
+    plumbing = _create_category(client, name="Plumbing")
+    first = _create_ticket(client, electrical, room="A-0101", priority="low")
+    second = _create_ticket(client, electrical, room="B-0202")
+    third = _create_ticket(client, plumbing, room="B-0203", priority="urgent")
+    bulk_item = {key: third[key] for key in ("title", "description", "priority", "category_id")}
+    client.post("/tickets/bulk", json={"items": [{**bulk_item, "room": "C-0301"}]})
+
+    client.put(f"/tickets/{first['id']}", headers={"X-Role": "student"}, json={"room": "C-0102", "priority": "high"})
+    client.put(f"/tickets/{second['id']}/status", headers={"X-Role": "technician"}, json={"status": "in_progress"})
+    client.put(f"/tickets/{third['id']}/status", headers={"X-Role": "technician"}, json={"status": "rejected"})
+    client.delete(f"/tickets/{second['id']}")
+
+    resp = client.get("/tickets/stats")
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "total": 3,
+        "by_status": {"open": 2, "in_progress": 0, "done": 0, "rejected": 1},
+        "by_priority": {"low": 0, "medium": 0, "high": 1, "urgent": 2},
+        "by_category": {str(electrical): 1, str(plumbing): 2},
+        "by_building": {"B": 1, "C": 2},
+    }
+
+    stats_engine = create_engine(client.app.state.config.database_url)
+    try:
+        assert reconcile_stats(stats_engine) == []
+        with stats_engine.begin() as conn:
+            conn.exec_driver_sql("UPDATE ticket_stats SET count = 7 WHERE dimension = 'building' AND bucket = 'B'")
+        assert reconcile_stats(stats_engine) == [Drift("building", "B", 7, 1)]
+    finally:
+        stats_engine.dispose()
+    assert client.get("/tickets/stats").json()["by_building"] == {"B": 1, "C": 2}
+
+
+def test_export_tickets_streams_ndjson_and_csv(client: TestClient) -> None:
+    category_id = _create_category(client)
+    first = _create_ticket(client, category_id, room="A-0101")
+    second = _create_ticket(client, category_id, room="B-0202", title="Lamp, \"desk\" flickers")
+    _create_ticket(client, category_id, room="C-0303", priority="low")
+    client.post(f"/tickets/{second['id']}/comments", headers={"X-Role": "technician"}, json={"message": "On it"})
+
+    resp = client.get("/tickets/export", params={"priority": "high", "include_comments": True})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [(line["type"], line["id"]) for line in lines[:2]] == [("ticket", first["id"]), ("ticket", second["id"])]
+    assert lines[1]["title"] == second["title"]
+    assert lines[1]["created_at"] == second["created_at"]
+    assert lines[1]["status"] == "open"
+    assert lines[2]["type"] == "comment"
+    assert (lines[2]["ticket_id"], lines[2]["message"], lines[2]["author_role"]) == (second["id"], "On it", "technician")
+    assert len(lines) == 3
+
+    resp = client.get("/tickets/export", params={"format": "csv", "include_comments": True})
+    assert resp.headers["content-type"].startswith("text/csv")
+    assert resp.headers["content-disposition"] == 'attachment; filename="tickets.csv"'
+    tickets_section, comments_section = resp.text.split("\n\n")
+    tickets = list(csv.DictReader(io.StringIO(tickets_section)))
+    assert [int(t["id"]) for t in tickets] == [first["id"], second["id"], second["id"] + 1]
+    assert tickets[1]["title"] == second["title"]
+    assert tickets[2]["priority"] == "low"
+    comments = list(csv.DictReader(io.StringIO(comments_section)))
+    assert [(int(c["ticket_id"]), c["message"]) for c in comments] == [(second["id"], "On it")]
+
+    assert client.get("/tickets/export", params={"format": "xml"}).status_code == 400
+
+
+def test_ticket_writes_append_change_events(client: TestClient) -> None:
+    category_id = _create_category(client)
+    ticket = _create_ticket(client, category_id)
+    client.put(f"/tickets/{ticket['id']}", headers={"X-Role": "student"}, json={"priority": "urgent"})
+    client.post(f"/tickets/{ticket['id']}/comments", headers={"X-Role": "technician"}, json={"message": "On it"})
+    client.put(f"/tickets/{ticket['id']}/status", headers={"X-Role": "technician"}, json={"status": "in_progress"})
+    client.delete(f"/tickets/{ticket['id']}")
+
+    events_engine = create_engine(client.app.state.config.database_url)
+    try:
+        with events_engine.connect() as conn:
+            rows = conn.execute(
+                text("SELECT ticket_id, type, status, previous_status, data FROM ticket_events ORDER BY id")
+            ).all()
+    finally:
+        events_engine.dispose()
+
+    assert [(row.type, row.status, row.previous_status) for row in rows] == [
+        ("created", "open", None),
+        ("updated", "open", None),
+        ("commented", "open", None),
+        ("status_changed", "in_progress", "open"),
+        ("deleted", "in_progress", None),
+    ]
+    assert {row.ticket_id for row in rows} == {ticket["id"]}
+    assert json.loads(rows[1].data)["priority"] == "urgent"
+    assert json.loads(rows[2].data)["message"] == "On it"
+    assert json.loads(rows[0].data)["created_at"] == ticket["created_at"]
+    assert client.get("/tickets/events", headers={"Last-Event-ID": "abc"}).status_code == 400
+
+
+def test_sla_report_reads_time_in_status_rollups(client: TestClient) -> None:
+    electrical = _create_category(client)
+    plumbing = _create_category(client, name="Plumbing")
+    waits = [(electrical, "A-0101", "in_progress", 7200), (electrical, "B-0202", "in_progress", 1800)]
+    waits.append((plumbing, "B-0203", "rejected", 86400))
+    analytics_engine = create_engine(client.app.state.config.database_url)
+    try:
+        for category_id, room, next_status, seconds in waits:
+            ticket = _create_ticket(client, category_id, room=room)
+            with analytics_engine.begin() as conn:
+                conn.execute(
+                    text("UPDATE ticket_events SET created_at = datetime(created_at, :shift) WHERE ticket_id = :id"),
+                    {"shift": f"-{seconds} seconds", "id": ticket["id"]},
+                )
+            technician = {"X-Role": "technician"}
+            client.put(f"/tickets/{ticket['id']}/status", headers=technician, json={"status": next_status})
+
+        resp = client.get("/tickets/analytics/sla", params={"to_status": "in_progress", "group_by": "category"})
+        assert resp.status_code == 200
+        report = resp.json()
+        assert (report["from_status"], report["to_status"], report["group_by"]) == ("open", "in_progress", "category")
+        [group] = report["groups"]
+        assert (group["group"], group["count"]) == (electrical, 2)
+        assert group["mean_seconds"] == pytest.approx(4500, abs=5)
+        assert group["max_seconds"] == pytest.approx(7200, abs=5)
+        assert 1800 <= group["p50_seconds"] <= group["p90_seconds"] <= group["p95_seconds"] <= group["max_seconds"]
+
+        by_building = client.get("/tickets/analytics/sla", params={"group_by": "building"}).json()["groups"]
+        assert [(g["group"], g["count"]) for g in by_building] == [("A", 1), ("B", 2)]
+        [plumbing_group] = client.get("/tickets/analytics/sla", params={"category_id": plumbing}).json()["groups"]
+        assert plumbing_group["max_seconds"] == pytest.approx(86400, abs=5)
+
+        rebuild_sla_rollups(analytics_engine)
+        assert client.get("/tickets/analytics/sla", params={"group_by": "building"}).json()["groups"] == by_building
+    finally:
+        analytics_engine.dispose()
+
+    resp = client.get("/tickets/analytics/sla", params={"since": "2026-02-01", "until": "2026-01-01"})
+    assert resp.status_code == 400
+    assert resp.json()["details"][0]["field"] == "since"
+
+
+def test_fast_json_matches_validated_responses(client: TestClient) -> None:
+    category_id = _create_category(client)
+    busy = _create_ticket(client, category_id, title="Leaking tap in dorm", description="Tap leaks — ça coule.")
+    _create_ticket(client, category_id, room="B-0101")
+    for message in ["Part ordered.", "Fixed, please confirm."]:
+        client.post(f"/tickets/{busy['id']}/comments", headers={"X-Role": "technician"}, json={"message": message})
+
+    requests = [
+        ("/tickets", {"sort_by": "id", "limit": 1}),
+        ("/tickets", {"view": "summary"}),
+        ("/tickets/search", {"q": "leak"}),
+        ("/tickets/search", {"q": "leak", "view": "summary"}),
+        (f"/tickets/{busy['id']}", {"comment_limit": 1}),
+        (f"/tickets/{busy['id']}/comments", {"limit": 1}),
+        ("/categories", {}),
+        (f"/categories/{category_id}", {}),
+    ]
+    validated = [client.get(url, params=params) for url, params in requests]
+    schema = client.get("/openapi.json").json()
+
+    with _same_database(client, fast_json=True) as fast:
+        for (url, params), expected in zip(requests, validated, strict=True):
+            resp = fast.get(url, params=params)
+            assert resp.status_code == 200
+            assert resp.content == expected.content, url
+            assert resp.headers["content-type"] == "application/json"
+            for header in ("ETag", "X-Next-Cursor"):
+                assert resp.headers.get(header) == expected.headers.get(header)
+        assert fast.get("/openapi.json").json() == schema
+        assert fast.get("/tickets/999").status_code == 404
+
+
+def test_importing_and_starting_the_app_leaves_the_default_database_alone(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    # A fresh interpreter, so importing app.main builds the module-level app with the default ./dorm.db.
+    env = {name: value for name, value in os.environ.items() if not name.startswith("DORM_")}
+    env["PYTHONPATH"] = str(Path(__file__).resolve().parents[1])
+    subprocess.run([sys.executable, "-c", "import app.main"], env=env, check=True)
+    assert list(tmp_path.iterdir()) == []
+
+    with TestClient(create_app(Settings(database_url=f"sqlite:///{tmp_path / 'own.db'}"))) as client:
+        assert client.post("/categories", json={"name": "Electrical"}).status_code == 201
+        assert stamped_version(client.app.state.database.engine) == schema_version()
+    assert [path.name for path in tmp_path.iterdir()] == ["own.db"]
+
+
+def test_mock_ui_and_large_json_bodies_are_gzipped(client: TestClient) -> None:
+    resp = client.get("/mock-ui")
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.text == Path("app/mock_ui.html").read_text(encoding="utf-8")
+    etag = resp.headers["etag"]
+    assert client.get("/mock-ui", headers={"If-None-Match": etag}).status_code == 304
+    plain = client.get("/mock-ui", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] == etag
+
+    category_id = _create_category(client)
+    for n in range(10):
+        _create_ticket(client, category_id, title=f"Broken heater number {n}")
+    listing = client.get("/tickets")
+    assert listing.headers["content-encoding"] == "gzip"
+    assert len(listing.json()) == 10
+    assert "content-encoding" not in client.get("/tickets", params={"limit": 1}).headers
+    assert "content-encoding" not in client.get("/tickets", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_metrics_and_server_timing(client: TestClient, caplog: pytest.LogCaptureFixture) -> None:
+    with _same_database(client, n_plus_one_threshold=2) as detecting:
+        category_id = _create_category(detecting)
+        ticket = _create_ticket(detecting, category_id)
+
+        resp = detecting.get(f"/tickets/{ticket['id']}")
+        assert resp.status_code == 200
+        assert resp.headers["Server-Timing"].startswith("db;dur=")
+        assert 'desc="2 queries"' in resp.headers["Server-Timing"]
+
+        item = {key: ticket[key] for key in ("title", "description", "room", "priority", "category_id")}
+        with caplog.at_level("WARNING", logger="app.metrics"):
+            detecting.post("/tickets/bulk", json={"items": [item] * 3})
+        assert any("possible N+1: POST /tickets/bulk" in record.getMessage() for record in caplog.records)
+
+        metrics = detecting.get("/metrics")
+        assert metrics.status_code == 200
+        assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+        samples = {
+            line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in metrics.text.splitlines()
+            if not line.startswith("#")
+        }
+        labels = 'method="GET",route="/tickets/{ticket_id}"'
+        assert samples[f'dorm_http_requests_total{{{labels},status="200"}}'] >= 1
+        assert samples[f"dorm_http_request_duration_seconds_count{{{labels}}}"] >= 1
+        assert samples[f"dorm_db_statements_total{{{labels}}}"] >= 2
+        assert samples[f"dorm_orm_rows_loaded_total{{{labels}}}"] >= 1
+        assert samples['dorm_n_plus_one_requests_total{method="POST",route="/tickets/bulk"}'] >= 1
+        assert "/metrics" not in json.dumps(detecting.get("/openapi.json").json()["paths"])
+
+    with _same_database(client, server_timing=False) as untimed:
+        assert "Server-Timing" not in untimed.get("/tickets").headers
+
+
+def test_claim_takes_most_urgent_oldest_ticket_once(client: TestClient) -> None:
+    category_id = _create_category(client)
+    other_category = _create_category(client, name="Plumbing")
+    low = _create_ticket(client, category_id, priority="low")
+    urgent_old = _create_ticket(client, category_id, priority="urgent", room="B-0101")
+    high = _create_ticket(client, other_category, priority="high")
+    urgent_new = _create_ticket(client, category_id, priority="urgent")
+    medium = _create_ticket(client, category_id, priority="medium", room="B-0202")
+
+    by_priority = client.get("/tickets", params={"sort_by": "priority", "sort_order": "desc", "limit": 2})
+    assert [t["priority"] for t in by_priority.json()] == ["urgent", "urgent"]
+    rest = client.get(
+        "/tickets",
+        params={"sort_by": "priority", "sort_order": "desc", "limit": 5, "cursor": by_priority.headers["X-Next-Cursor"]},
+    )
+    assert [t["priority"] for t in rest.json()] == ["high", "medium", "low"]
+
+    assert client.post("/tickets/claim", headers={"X-Role": "student"}).status_code == 403
+    claimed = client.post("/tickets/claim", headers={"X-Role": "technician"})
+    assert claimed.status_code == 200
+    assert claimed.json()["id"] == urgent_old["id"]
+    assert claimed.json()["status"] == "in_progress"
+    assert claimed.headers["ETag"]
+
+    in_building = client.post("/tickets/claim", headers={"X-Role": "technician"}, params={"building": "B"})
+    assert in_building.json()["id"] == medium["id"]
+    in_category = client.post("/tickets/claim", headers={"X-Role": "technician"}, params={"category_id": other_category})
+    assert in_category.json()["id"] == high["id"]
+    assert client.post("/tickets/claim", headers={"X-Role": "technician"}, params={"building": "b"}).status_code == 400
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: client.post("/tickets/claim", headers={"X-Role": "technician"}), range(4)))
+    assert sorted(r.status_code for r in results) == [200, 200, 404, 404]
+    assert [r.json()["id"] for r in results if r.status_code == 200] in (
+        [urgent_new["id"], low["id"]],
+        [low["id"], urgent_new["id"]],
+    )
+    assert {r.json()["code"] for r in results if r.status_code == 404} == {"NOT_FOUND"}
+
+
+def test_archive_moves_old_closed_tickets_out_of_the_hot_set(client: TestClient) -> None:
+    category_id = _create_category(client)
+    technician = {"X-Role": "technician"}
+    done = _create_ticket(client, category_id, room="A-0101")
+    rejected = _create_ticket(client, category_id, room="B-0202", priority="low")
+    recent = _create_ticket(client, category_id, room="B-0203")
+    still_open = _create_ticket(client, category_id, room="C-0301")
+    newest = _create_ticket(client, category_id, room="C-0302")
+    client.post(f"/tickets/{done['id']}/comments", headers=technician, json={"message": "Replaced the fuse"})
+    client.post(f"/tickets/{done['id']}/comments", headers=technician, json={"message": "Tested the outlet"})
+    client.put(f"/tickets/{done['id']}/status", headers=technician, json={"status": "in_progress"})
+    for ticket, target in ((done, "done"), (rejected, "rejected"), (recent, "rejected")):
+        client.put(f"/tickets/{ticket['id']}/status", headers=technician, json={"status": target})
+    stats = client.get("/tickets/stats").json()
+
+    archive_engine = create_engine(client.app.state.config.database_url)
+    try:
+        with archive_engine.begin() as conn:
+            conn.execute(
+                text("UPDATE tickets SET updated_at = '2020-01-01 00:00:00.000000' WHERE id IN (:done, :rejected)"),
+                {"done": done["id"], "rejected": rejected["id"]},
+            )
+        before = client.get(f"/tickets/{done['id']}").json()
+        run = archive_closed_tickets(archive_engine, timedelta(days=30), batch_size=1)
+        assert (run.tickets, run.comments, run.batches) == (2, 2, 2)
+        assert archive_closed_tickets(archive_engine, timedelta(days=30), batch_size=1).tickets == 0
+        with archive_engine.connect() as conn:
+            deleted = conn.execute(text("SELECT COUNT(*) FROM ticket_events WHERE type = 'deleted'")).scalar()
+        assert deleted == 0
+        assert reconcile_stats(archive_engine) == []
+    finally:
+        archive_engine.dispose()
+
+    hot = client.get("/tickets", params={"sort_by": "id", "sort_order": "asc"}).json()
+    assert [ticket["id"] for ticket in hot] == [recent["id"], still_open["id"], newest["id"]]
+    assert client.get("/tickets/stats").json() == stats
+
+    params = {"include_archived": True, "sort_by": "id", "sort_order": "asc", "limit": 2}
+    first_page = client.get("/tickets", params=params)
+    assert [ticket["id"] for ticket in first_page.json()] == [done["id"], rejected["id"]]
+    assert [comment["message"] for comment in first_page.json()[0]["comments"]] == [
+        "Replaced the fuse",
+        "Tested the outlet",
+    ]
+    next_page = client.get("/tickets", params={**params, "cursor": first_page.headers["X-Next-Cursor"]})
+    assert [ticket["id"] for ticket in next_page.json()] == [recent["id"], still_open["id"]]
+    summary = client.get("/tickets", params={"include_archived": True, "status": "done", "view": "summary"})
+    assert [(item["id"], item["latest_comment"]["message"]) for item in summary.json()] == [
+        (done["id"], "Tested the outlet")
+    ]
+
+    archived = client.get(f"/tickets/{done['id']}")
+    assert archived.status_code == 200
+    assert archived.json() == before
+    revalidated = client.get(f"/tickets/{done['id']}", headers={"If-None-Match": archived.headers["ETag"]})
+    assert revalidated.status_code == 304
+    latest = client.get(f"/tickets/{done['id']}", params={"comment_limit": 1}).json()["comments"]
+    assert [comment["message"] for comment in latest] == ["Tested the outlet"]
+    comments = client.get(f"/tickets/{done['id']}/comments", params={"limit": 1})
+    assert [comment["message"] for comment in comments.json()] == ["Replaced the fuse"]
+    assert "X-Next-Cursor" in comments.headers
+    # Writes to an archived ticket answer as they would for the closed ticket, not as if it were gone.
+    reopened = client.put(f"/tickets/{rejected['id']}/status", headers=technician, json={"status": "done"})
+    assert (reopened.status_code, reopened.json()["code"]) == (409, "INVALID_STATUS_TRANSITION")
+    assert reopened.json()["message"] == "Cannot transition from rejected to done"
+    for resp in (
+        client.post(f"/tickets/{done['id']}/comments", headers=technician, json={"message": "Back again"}),
+        client.put(f"/tickets/{done['id']}", headers=technician, json={"priority": "urgent"}),
+        client.delete(f"/tickets/{done['id']}"),
+    ):
+        assert (resp.status_code, resp.json()["code"]) == (409, "TICKET_ARCHIVED")
+    bulk_status = client.put(
+        "/tickets/status/bulk", headers=technician, json={"items": [{"ticket_id": done["id"], "status": "open"}]}
+    )
+    assert bulk_status.json()[0]["error"]["code"] == "INVALID_STATUS_TRANSITION"
+    bulk_delete = client.delete("/tickets/bulk", params={"ids": [rejected["id"], 999]}).json()
+    assert [item["error"]["code"] for item in bulk_delete] == ["TICKET_ARCHIVED", "NOT_FOUND"]
+    assert client.get(f"/tickets/{done['id']}").json() == before
+    assert client.put("/tickets/999/status", headers=technician, json={"status": "done"}).status_code == 404
+
+    # Ids of archived tickets are not handed out again, even once every newer ticket is gone.
+    for ticket in (recent, still_open, newest):
+        client.delete(f"/tickets/{ticket['id']}")
+    assert _create_ticket(client, category_id)["id"] == rejected["id"] + 1
+
+
+def test_ticket_list_cache_follows_write_generations(client: TestClient) -> None:
+    electrical = _create_category(client)
+    plumbing = _create_category(client, name="Plumbing")
+    first = _create_ticket(client, electrical)
+    _create_ticket(client, electrical, room="B-0101")
+    leak = _create_ticket(client, plumbing)
+    everything = {"status": "open", "sort_by": "created_at", "limit": 1}
+    expected = client.get("/tickets", params=everything)
+
+    assert client.app.state.ticket_list_cache is None
+    with _same_database(client, response_cache=True) as caching:
+        list_cache = caching.app.state.ticket_list_cache
+        hits = list_cache.hits
+        miss = caching.get("/tickets", params=everything)
+        hit = caching.get("/tickets", params={**everything, "limit": "01"})
+        assert list_cache.hits == hits + 1
+        for resp in (miss, hit):
+            assert resp.content == expected.content
+            for header in ("ETag", "X-Next-Cursor"):
+                assert resp.headers[header] == expected.headers[header]
+        revalidated = caching.get("/tickets", params=everything, headers={"If-None-Match": hit.headers["ETag"]})
+        assert revalidated.status_code == 304
+
+        by_category = {"category_id": electrical, "view": "summary"}
+        cached = caching.get("/tickets", params=by_category).json()
+        caching.put(f"/tickets/{leak['id']}/status", headers={"X-Role": "technician"}, json={"status": "in_progress"})
+        hits = list_cache.hits
+        assert caching.get("/tickets", params=by_category).json() == cached
+        assert list_cache.hits == hits + 1
+        assert caching.get("/tickets", params=everything).content != expected.content
+
+        student = {"X-Role": "student"}
+        caching.post(f"/tickets/{first['id']}/comments", headers=student, json={"message": "Still broken"})
+        refreshed = caching.get("/tickets", params=by_category).json()
+        latest = [item["latest_comment"] for item in refreshed if item["id"] == first["id"]][0]
+        assert latest["message"] == "Still broken"
+
+        # A write committed by another process invalidates the entries of this one.
+        caching.get("/tickets", params=by_category)
+        other_worker = create_engine(caching.app.state.config.database_url)
+        try:
+            with other_worker.begin() as conn:
+                conn.execute(text("UPDATE tickets SET title = 'Sparking socket' WHERE id = :id"), {"id": first["id"]})
+        finally:
+            other_worker.dispose()
+        titles = [item["title"] for item in caching.get("/tickets", params=by_category).json()]
+        assert "Sparking socket" in titles
+        assert 'dorm_response_cache_lookups_total{result="hit"}' in caching.get("/metrics").text
+
+
+def test_response_cache_expires_and_evicts_by_bytes() -> None:
+    response = Response(headers={"ETag": '"v1"'})
+    cache = ResponseCache(max_bytes=100, ttl_s=60)
+    cache.put("a", "g1", b"x" * 40, response)
+    cache.put("b", "g1", b"y" * 40, response)
+    assert cache.get("a", "g1").body == b"x" * 40
+    cache.put("c", "g1", b"z" * 40, response)
+    assert (cache.get("b", "g1"), cache.evictions) == (None, 1)
+    assert cache.get("a", "g2") is None and cache.get("a", "g1") is None
+    cache.put("huge", "g1", b"h" * 200, response)
+    assert cache.get("huge", "g1") is None
+    assert cache.size <= 100
+
+    expiring = ResponseCache(max_bytes=100, ttl_s=0)
+    expiring.put("a", "g1", b"x", response)
+    assert expiring.get("a", "g1") is None
+
+
+def test_sharded_tickets_route_by_building_and_merge_listings(
+    client: TestClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    shards = ShardSet(["A", "B"], f"sqlite:///{tmp_path}/dorm_{{building}}.db", settings)
+    shards.open()
+    monkeypatch.setattr(client.app.state, "shard_set", shards)
+    category_id = _create_category(client)
+    technician = {"X-Role": "technician"}
+
+    created = [
+        _create_ticket(client, category_id, room=room, priority=priority)
+        for room, priority in [
+            ("A-0101", "low"),
+            ("B-0201", "urgent"),
+            ("A-0102", "high"),
+            ("B-0202", "medium"),
+            ("A-0103", "urgent"),
+        ]
+    ]
+    assert [building_of_id(ticket["id"]) for ticket in created] == ["A", "B", "A", "B", "A"]
+    assert created[0]["id"] == (1 << SHARD_ID_BITS) + 1
+    with shards.engines["B"].connect() as conn:
+        assert conn.execute(text("SELECT room FROM tickets ORDER BY id")).scalars().all() == ["B-0201", "B-0202"]
+        assert conn.execute(text("SELECT name FROM categories")).scalars().all() == ["Electrical"]
+
+    bad_room = client.post("/tickets", json={**created[0], "room": "C-0101"})
+    assert (bad_room.status_code, bad_room.json()["details"][0]["field"]) == (400, "room")
+    assert client.get(f"/tickets/{(3 << SHARD_ID_BITS) + 1}").status_code == 404
+    assert client.get("/tickets/1").status_code == 404
+
+    newest_first = [ticket["id"] for ticket in reversed(created)]
+    assert [t["id"] for t in client.get("/tickets", params={"limit": 10}).json()] == newest_first
+    assert [t["id"] for t in client.get("/tickets", params={"skip": 1, "limit": 3}).json()] == newest_first[1:4]
+    page = client.get("/tickets", params={"limit": 2, "view": "summary"})
+    rest = client.get("/tickets", params={"limit": 10, "view": "summary", "cursor": page.headers["X-Next-Cursor"]})
+    assert [t["id"] for t in page.json() + rest.json()] == newest_first
+    by_priority = client.get("/tickets", params={"sort_by": "priority", "sort_order": "desc", "limit": 10})
+    assert [t["priority"] for t in by_priority.json()] == ["urgent", "urgent", "high", "medium", "low"]
+    in_room = client.get("/tickets", params={"room": "B-0202"}).json()
+    assert [t["id"] for t in in_room] == [created[3]["id"]]
+
+    ticket_b = created[1]["id"]
+    comment = client.post(f"/tickets/{ticket_b}/comments", headers=technician, json={"message": "On it"})
+    assert comment.status_code == 201
+    assert client.get(f"/tickets/{ticket_b}").json()["comments"][0]["message"] == "On it"
+    listed = client.get("/tickets", params={"limit": 10}).json()
+    assert next(t for t in listed if t["id"] == ticket_b)["comments"][0]["message"] == "On it"
+    moved = client.put(f"/tickets/{ticket_b}", headers=technician, json={"room": "A-0101"})
+    assert (moved.status_code, moved.json()["details"][0]["field"]) == (400, "room")
+
+    stats = client.get("/tickets/stats").json()
+    assert (stats["total"], stats["by_building"]) == (5, {"A": 3, "B": 2})
+    exported = client.get("/tickets/export").text.splitlines()
+    assert [json.loads(line)["id"] for line in exported] == sorted(ticket["id"] for ticket in created)
+    assert client.get("/tickets/events").status_code == 501
+
+    # The oldest urgent ticket is in building B even though A's shard is listed first.
+    claimed = client.post("/tickets/claim", headers=technician)
+    assert claimed.json()["id"] == ticket_b
+    assert client.post("/tickets/claim", headers=technician).json()["id"] == created[4]["id"]
+
+    bulk = client.post(
+        "/tickets/bulk",
+        json={"items": [{**created[0], "room": "B-0300"}, {**created[0], "room": "C-0300"}]},
+    ).json()
+    assert [item["ok"] for item in bulk] == [True, False]
+    assert building_of_id(bulk[0]["ticket_id"]) == "B"
+    deleted = client.delete("/tickets/bulk", params={"ids": [created[0]["id"], bulk[0]["ticket_id"], 1]}).json()
+    assert [item["ok"] for item in deleted] == [True, True, False]
+    assert client.get("/tickets/stats").json()["total"] == 4
+    found = client.get("/tickets/search", params={"q": "conditioner", "view": "summary", "limit": 3})
+    assert len(found.json()) == 3 and "score" not in found.json()[0]
+
+
+def test_claim_across_shards_with_one_writer_connection_and_write_batching(tmp_path: Path) -> None:
+    config = Settings(
+        database_url=f"sqlite:///{tmp_path / 'home.db'}",
+        shards=("A", "B"),
+        shard_url=f"sqlite:///{tmp_path}/dorm_{{building}}.db",
+        sqlite_production=True,
+        write_batching=True,
+    )
+    with TestClient(create_app(config)) as client:
+        category_id = _create_category(client)
+        low = _create_ticket(client, category_id, priority="low", room="A-0101")
+        urgent = _create_ticket(client, category_id, priority="urgent", room="B-0101")
+
+        technician = {"X-Role": "technician"}
+        assert client.post("/tickets/claim", headers=technician).json()["id"] == urgent["id"]
+        assert client.post("/tickets/claim", headers=technician).json()["id"] == low["id"]
+        assert client.post("/tickets/claim", headers=technician).status_code == 404
@@ -0,0 +1,154 @@
+import io
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.bulk_import import run_import
+from app.config import Settings
+from app.main import create_app
+from app.sharding import ShardSet, building_of_id
+from app.stats import reconcile_stats
+
+
+def _ndjson(*records: dict | str) -> io.StringIO:
+    return io.StringIO("".join((r if isinstance(r, str) else json.dumps(r)) + "\n" for r in records))
+
+
+def test_bulk_import_links_comments_and_rejects_bad_rows(tmp_path: Path) -> None:
+    url = f"sqlite:///{tmp_path / 'import.db'}"
+    ticket = {"title": "Water leak under sink", "description": "Water pools under the sink.", "priority": "high"}
+    stream = _ndjson(
+        {"type": "category", "name": "Plumbing", "description": "Pipes and drains"},
+        {**ticket, "id": 501, "room": "A-0101", "category": "Plumbing", "status": "done"},
+        {**ticket, "id": 502, "room": "B-0202", "category": "Plumbing", "created_at": "2025-03-01T08:00:00Z"},
+        {**ticket, "room": "B-12", "category": "Plumbing"},
+        {**ticket, "room": "C-0303", "category": "Electrical"},
+        {"type": "comment", "ticket_id": 502, "message": "Fixed the leaking trap", "author_role": "technician"},
+        {"type": "comment", "ticket_id": 502, "message": "Thanks", "author_role": "student"},
+        {"type": "comment", "ticket_id": 999, "message": "Orphan", "author_role": "student"},
+        "{not json",
+    )
+    rejects = io.StringIO()
+
+    importer = run_import(url, stream, "ndjson", batch_size=2, rejects=rejects)
+
+    assert importer.counts == {"category": 1, "ticket": 2, "comment": 2}
+    rejected = [json.loads(line) for line in rejects.getvalue().splitlines()]
+    assert sorted((r["line"], r["errors"][0]["field"]) for r in rejected) == [
+        (4, "room"),
+        (5, "category_id"),
+        (8, "ticket_id"),
+        (9, ""),
+    ]
+
+    engine = create_engine(url)
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT room, status, created_at, comment_count, last_comment_at IS NOT NULL"
+                    " FROM tickets ORDER BY id"
+                )
+            ).all()
+            assert rows == [
+                ("A-0101", "done", rows[0][2], 0, 0),
+                ("B-0202", "open", "2025-03-01 08:00:00.000000", 2, 1),
+            ]
+            matches = conn.execute(text("SELECT rowid FROM comments_fts WHERE comments_fts MATCH 'trap'")).scalars()
+            assert len(list(matches)) == 1
+            triggers = conn.execute(text("SELECT COUNT(*) FROM sqlite_master WHERE name = 'tickets_fts_ai'")).scalar()
+            assert triggers == 1
+        assert reconcile_stats(engine) == []
+    finally:
+        engine.dispose()
+
+
+def test_bulk_import_reads_csv(tmp_path: Path) -> None:
+    url = f"sqlite:///{tmp_path / 'import.db'}"
+    run_import(url, _ndjson({"type": "category", "name": "Electrical"}), "ndjson")
+    stream = io.StringIO(
+        "title,description,room,priority,category_id,status\n"
+        "Light bulb burnt out,Desk lamp bulb is dead.,D-0404,low,1,\n"
+        "Power socket sparking,Socket sparks when used.,D-0405,urgent,1,in_progress\n"
+    )
+
+    importer = run_import(url, stream, "csv", kind="ticket")
+
+    assert importer.counts["ticket"] == 2
+    assert importer.rejected == 0
+    engine = create_engine(url)
+    try:
+        with engine.connect() as conn:
+            statuses = conn.execute(text("SELECT status FROM tickets ORDER BY id")).scalars().all()
+        assert statuses == ["open", "in_progress"]
+    finally:
+        engine.dispose()
+
+
+def test_bulk_import_routes_tickets_and_comments_to_their_building_shard(tmp_path: Path) -> None:
+    config = Settings(
+        database_url=f"sqlite:///{tmp_path / 'home.db'}",
+        shards=("A", "B"),
+        shard_url=f"sqlite:///{tmp_path}/dorm_{{building}}.db",
+    )
+    ticket = {"title": "Water leak under sink", "description": "Water pools under the sink.", "priority": "high"}
+    stream = _ndjson(
+        {"type": "category", "name": "Plumbing"},
+        {**ticket, "id": 1, "room": "A-0101", "category": "Plumbing"},
+        {**ticket, "id": 2, "room": "B-0202", "category": "Plumbing"},
+        {**ticket, "id": 3, "room": "C-0303", "category": "Plumbing"},
+        {"type": "comment", "ticket_id": 2, "message": "Fixed the leaking trap", "author_role": "technician"},
+    )
+    rejects = io.StringIO()
+    shards = ShardSet.from_config(config)
+    try:
+        importer = run_import(config.database_url, stream, "ndjson", batch_size=10, rejects=rejects, shards=shards)
+        for building, bind in shards.engines.items():
+            with bind.connect() as conn:
+                rooms = conn.execute(text("SELECT room FROM tickets")).scalars().all()
+                assert rooms == {"A": ["A-0101"], "B": ["B-0202"]}[building]
+                assert conn.execute(text("SELECT name FROM categories")).scalars().all() == ["Plumbing"]
+            assert reconcile_stats(bind) == []
+    finally:
+        shards.close()
+
+    assert importer.counts == {"category": 1, "ticket": 2, "comment": 1}
+    assert [json.loads(line)["errors"][0]["field"] for line in rejects.getvalue().splitlines()] == ["room"]
+    with TestClient(create_app(config)) as client:
+        listed = client.get("/tickets", params={"sort_by": "id", "sort_order": "asc"}).json()
+        assert [(building_of_id(t["id"]), t["room"]) for t in listed] == [("A", "A-0101"), ("B", "B-0202")]
+        assert [c["message"] for c in listed[1]["comments"]] == ["Fixed the leaking trap"]
+
+
+def test_bulk_imported_tickets_count_in_the_sla_rollups(tmp_path: Path) -> None:
+    config = Settings(database_url=f"sqlite:///{tmp_path / 'import.db'}")
+    now = datetime.utcnow()
+    ticket = {"title": "Door lock jammed", "description": "The lock sticks.", "priority": "high", "room": "A-0101"}
+    stream = _ndjson(
+        {"type": "category", "name": "Doors"},
+        {**ticket, "category": "Doors", "created_at": (now - timedelta(hours=2)).isoformat()},
+        {
+            **ticket,
+            "category": "Doors",
+            "status": "in_progress",
+            "created_at": (now - timedelta(days=1)).isoformat(),
+            "updated_at": (now - timedelta(hours=1)).isoformat(),
+        },
+    )
+    run_import(config.database_url, stream, "ndjson")
+
+    with TestClient(create_app(config)) as client:
+        listed = client.get("/tickets", params={"sort_by": "id", "sort_order": "asc"}).json()
+        waiting, started = (item["id"] for item in listed)
+        technician = {"X-Role": "technician"}
+        client.put(f"/tickets/{waiting}/status", headers=technician, json={"status": "in_progress"})
+        client.put(f"/tickets/{started}/status", headers=technician, json={"status": "done"})
+
+        [opened] = client.get("/tickets/analytics/sla", params={"from_status": "open"}).json()["groups"]
+        assert (opened["count"], opened["max_seconds"]) == (1, pytest.approx(7200, abs=60))
+        [working] = client.get("/tickets/analytics/sla", params={"from_status": "in_progress"}).json()["groups"]
+        assert (working["count"], working["max_seconds"]) == (1, pytest.approx(3600, abs=60))
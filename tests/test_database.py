@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import models  # noqa: F401  (registers tables on Base.metadata)
+from app.config import Settings
+from app.database import create_sqlite_engine, init_db
+from app.schema import bootstrap_schema, schema_version, stamped_version
+
+
+def test_production_engines_use_wal_and_read_only_readers(tmp_path: Path) -> None:
+    url = f"sqlite:///{tmp_path / 'prod.db'}"
+    config = Settings(database_url=url, sqlite_production=True, sqlite_busy_timeout_ms=1234, sqlite_read_pool_size=3)
+    writer = create_sqlite_engine(url, config)
+    reader = create_sqlite_engine(url, config, read_only=True)
+    init_db(writer)
+
+    with writer.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+    assert writer.pool.size() == 1
+    assert reader.pool.size() == 3
+
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM tickets")).scalar() == 0
+        with pytest.raises(OperationalError):
+            conn.execute(text("DELETE FROM tickets"))
+
+    writer.dispose()
+    reader.dispose()
+
+
+def test_schema_bootstrap_upgrades_once_and_survives_concurrent_workers(tmp_path: Path) -> None:
+    url = f"sqlite:///{tmp_path / 'boot.db'}"
+    engines = [create_sqlite_engine(url, Settings(database_url=url)) for _ in range(4)]
+
+    # Several workers booting against a new file at once: one upgrades, none fails.
+    with ThreadPoolExecutor(max_workers=len(engines)) as pool:
+        upgraded = list(pool.map(bootstrap_schema, engines))
+    assert upgraded.count(True) >= 1
+    assert stamped_version(engines[0]) == schema_version()
+    assert bootstrap_schema(engines[0]) is False
+
+    with engines[0].begin() as conn:
+        conn.execute(text("DROP TRIGGER ticket_events_ai"))
+        conn.execute(text("PRAGMA user_version = 0"))
+    assert bootstrap_schema(engines[0]) is True
+    with engines[0].connect() as conn:
+        assert conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'ticket_events_ai'")).scalar() == 1
+
+    for bind in engines:
+        bind.dispose()
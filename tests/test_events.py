@@ -0,0 +1,88 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine, create_engine, text
+
+from app.database import init_db
+from app.events import TicketEventBroker, ensure_ticket_events
+
+
+@pytest.fixture()
+def engine(tmp_path: Path) -> Engine:
+    engine = create_engine(f"sqlite:///{tmp_path / 'events.db'}", connect_args={"check_same_thread": False})
+    init_db(engine)
+    ensure_ticket_events(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO categories (id, name, is_active, created_at) VALUES (1, 'Plumbing', 1, '2025-01-01')")
+        )
+    yield engine
+    engine.dispose()
+
+
+def _insert_ticket(engine: Engine, room: str, category_id: int = 1) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO tickets (title, description, room, priority, status, category_id, created_at, updated_at)"
+                " VALUES ('Leaking tap', 'The tap keeps dripping.', :room, 'low', 'open', :category_id,"
+                " '2025-01-01 00:00:00.000000', '2025-01-01 00:00:00.000000')"
+            ),
+            {"room": room, "category_id": category_id},
+        )
+
+
+def _frame_data(frame: str) -> dict:
+    return json.loads(frame.split("data: ", 1)[1])
+
+
+def test_broker_fans_out_and_resumes_from_ring_buffer(engine: Engine) -> None:
+    broker = TicketEventBroker(buffer_size=3, poll_interval=0.02, max_pending=100)
+
+    async def scenario() -> None:
+        loop = asyncio.get_running_loop()
+        subscription, backlog = broker.subscribe(engine, loop, None)
+        assert backlog == []
+        for room in ("A-0101", "B-0202", "A-0303", "C-0404"):
+            _insert_ticket(engine, room)
+        broker.wake()
+        received = [await asyncio.wait_for(subscription.queue.get(), 2) for _ in range(4)]
+        assert [message.room for message in received] == ["A-0101", "B-0202", "A-0303", "C-0404"]
+        assert [message.id for message in received] == sorted(message.id for message in received)
+        assert _frame_data(received[0].frame)["data"]["room"] == "A-0101"
+        assert received[0].frame.startswith(f"id: {received[0].id}\nevent: created\n")
+        assert received[2].matches("open", 1, "A-0303") and not received[2].matches(None, 2, None)
+        broker.unsubscribe(subscription)
+
+        # The buffer holds the newest three events: resuming after the first works, after none does not.
+        _, backlog = broker.subscribe(engine, loop, received[0].id)
+        assert [message.id for message in backlog] == [message.id for message in received[1:]]
+        _, backlog = broker.subscribe(engine, loop, received[0].id - 1)
+        assert backlog is None
+        _, backlog = broker.subscribe(engine, loop, received[-1].id)
+        assert backlog == []
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        broker.close()
+
+
+def test_slow_subscriber_is_reset_instead_of_buffering_forever(engine: Engine) -> None:
+    broker = TicketEventBroker(buffer_size=10, poll_interval=0.02, max_pending=2)
+
+    async def scenario() -> None:
+        subscription, _ = broker.subscribe(engine, asyncio.get_running_loop(), None)
+        for n in range(4):
+            _insert_ticket(engine, f"A-{n:04d}")
+        broker.wake()
+        await asyncio.sleep(0.3)
+        messages = [await asyncio.wait_for(subscription.queue.get(), 2) for _ in range(3)]
+        assert [message is None for message in messages] == [False, False, True]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        broker.close()
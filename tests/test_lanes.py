@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import anyio.to_thread
+from fastapi import FastAPI, Query
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.lanes import DbLanes
+from app.main import create_app
+
+
+def test_write_burst_cannot_take_the_read_lane() -> None:
+    lanes = DbLanes(read_workers=2, write_workers=1)
+    release = threading.Event()
+    running = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def slow_write() -> dict:
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        release.wait(5)
+        with lock:
+            running["now"] -= 1
+        return {"thread": threading.current_thread().name}
+
+    def read(item_id: int, q: str = Query(default="none")) -> dict:
+        return {"id": item_id, "q": q, "thread": threading.current_thread().name}
+
+    app = FastAPI()
+    app.post("/write")(lanes.wrap(slow_write, "write"))
+    app.get("/read/{item_id}")(lanes.wrap(read, "read"))
+
+    with TestClient(app) as client, ThreadPoolExecutor(max_workers=4) as pool:
+        writes = [pool.submit(client.post, "/write") for _ in range(4)]
+        # Every write is stuck or queued behind the single write thread, yet the read is served.
+        resp = client.get("/read/7", params={"q": "x"})
+        assert resp.json()["id"] == 7 and resp.json()["q"] == "x"
+        assert resp.json()["thread"].startswith("db-read")
+        release.set()
+        results = [write.result() for write in writes]
+
+    assert [r.status_code for r in results] == [200] * 4
+    assert {r.json()["thread"][:8] for r in results} == {"db-write"}
+    assert running["max"] == 1
+    lanes.shutdown()
+
+
+def test_async_handlers_are_chosen_per_app(tmp_path: Path) -> None:
+    def get_ticket_endpoint(app: FastAPI):
+        return next(
+            route.endpoint
+            for route in app.routes
+            if isinstance(route, APIRoute) and route.path == "/tickets/{ticket_id}" and "GET" in route.methods
+        )
+
+    url = f"sqlite:///{tmp_path / 'lanes.db'}"
+    laned = create_app(Settings(database_url=url, async_handlers=True, db_read_workers=1))
+    threadpool = create_app(Settings(database_url=url))
+
+    assert asyncio.iscoroutinefunction(get_ticket_endpoint(laned))
+    assert not asyncio.iscoroutinefunction(get_ticket_endpoint(threadpool))
+    with TestClient(laned) as client:
+        assert client.get("/tickets/1").json()["code"] == "NOT_FOUND"
+    with TestClient(threadpool) as client:
+        assert client.get("/tickets/1").json()["code"] == "NOT_FOUND"
+
+
+def test_laned_requests_make_no_thread_pool_hops(tmp_path: Path, monkeypatch) -> None:
+    hops: list[str] = []
+    run_sync = anyio.to_thread.run_sync
+
+    async def counting_run_sync(func, *args, **kwargs):
+        hops.append(getattr(func, "__name__", repr(func)))
+        return await run_sync(func, *args, **kwargs)
+
+    app = create_app(Settings(database_url=f"sqlite:///{tmp_path / 'hops.db'}", async_handlers=True))
+    with TestClient(app) as client:
+        category_id = client.post("/categories", json={"name": "Plumbing", "description": "Leaks"}).json()["id"]
+        monkeypatch.setattr(anyio.to_thread, "run_sync", counting_run_sync)
+        created = client.post(
+            "/tickets",
+            json={
+                "title": "Leaking sink",
+                "description": "The sink in the shared kitchen leaks.",
+                "room": "A-1207",
+                "priority": "high",
+                "category_id": category_id,
+            },
+        )
+        assert created.status_code == 201
+        assert client.get(f"/tickets/{created.json()['id']}").status_code == 200
+        assert client.get("/tickets").status_code == 200
+
+    # The session dependencies run on the event loop; only the lanes touch threads.
+    assert hops == []
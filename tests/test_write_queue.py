@@ -0,0 +1,59 @@
+import threading
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import init_db
+from app.errors import AppException
+from app.models import Category
+from app.write_queue import GroupCommitQueue
+
+
+@pytest.fixture()
+def session_factory(tmp_path: Path) -> sessionmaker:
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}", connect_args={"check_same_thread": False})
+    init_db(engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def test_group_commit_batches_items_and_isolates_failures(session_factory: sessionmaker) -> None:
+    commits = []
+    event.listen(session_factory.kw["bind"], "commit", lambda conn: commits.append(1))
+    write_queue = GroupCommitQueue(session_factory, max_items=100, max_delay=0.2)
+
+    def insert(name: str):
+        def work(db: Session) -> int:
+            category = Category(name=name)
+            db.add(category)
+            db.flush()
+            if name.endswith("7"):
+                raise AppException(status_code=400, code="VALIDATION_ERROR", message=f"bad {name}")
+            return category.id
+
+        return work
+
+    results: dict[str, object] = {}
+
+    def submit(name: str) -> None:
+        try:
+            results[name] = write_queue.submit(insert(name))
+        except AppException as exc:
+            results[name] = exc
+
+    threads = [threading.Thread(target=submit, args=(f"Category {n}",)) for n in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    write_queue.close()
+
+    failed = {name for name, value in results.items() if isinstance(value, AppException)}
+    assert failed == {"Category 7", "Category 17"}
+    assert len(commits) < 20
+
+    with session_factory() as db:
+        stored = {category.name: category.id for category in db.query(Category)}
+    assert stored == {name: value for name, value in results.items() if name not in failed}